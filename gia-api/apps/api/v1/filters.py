@@ -11,11 +11,21 @@ class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
 class DateFilter(filters.FilterSet):
     """Filter for dates."""
 
-    date = filters.CharFilter(lookup_expr="icontains", label="Дата экзамена")
+    date = filters.DateFilter(label="Дата экзамена")
+    date_from = filters.DateFilter(
+        field_name="date",
+        lookup_expr="gte",
+        label="Дата экзамена, с",
+    )
+    date_to = filters.DateFilter(
+        field_name="date",
+        lookup_expr="lte",
+        label="Дата экзамена, по",
+    )
 
     class Meta:
         model = models.Date
-        fields = ("date",)
+        fields = ("date", "date_from", "date_to")
 
 
 class LevelFilter(filters.FilterSet):
@@ -31,7 +41,7 @@ class LevelFilter(filters.FilterSet):
 class OrganisationFilter(filters.FilterSet):
     """Filter for organisations."""
 
-    name = filters.CharFilter(lookup_expr="icontains", label="Место работы")
+    name = filters.CharFilter(lookup_expr="trigram_icontains", label="Место работы")
     search = SearchVectorFilter(
         search_fields=["search_vector"],
         label="Поиск",
@@ -46,7 +56,7 @@ class OrganisationFilter(filters.FilterSet):
 class PositionFilter(filters.FilterSet):
     """Filter for positions."""
 
-    name = filters.CharFilter(lookup_expr="icontains", label="Должность в ППЭ")
+    name = filters.CharFilter(lookup_expr="trigram_icontains", label="Должность в ППЭ")
     search = SearchVectorFilter(
         search_fields=["search_vector"],
         label="Поиск",
@@ -63,15 +73,15 @@ class EmployeeFilter(filters.FilterSet):
 
     id = NumberInFilter(field_name="id", lookup_expr="in")
 
-    name = filters.CharFilter(lookup_expr="icontains", label="ФИО сотрудника")
+    name = filters.CharFilter(lookup_expr="trigram_icontains", label="ФИО сотрудника")
     org_id = filters.CharFilter(field_name="org__id", label="id места работы")
     org_name = filters.CharFilter(
         field_name="org__name",
-        lookup_expr="icontains",
+        lookup_expr="trigram_icontains",
         label="Место работы",
     )
     search = SearchVectorFilter(
-        search_fields=["search_vector", "org__search_vector"],
+        search_fields=["search_document"],
         label="Поиск",
         help_text="Full Text Search",
     )
@@ -86,8 +96,8 @@ class PlaceFilter(filters.FilterSet):
 
     id = NumberInFilter(field_name="id", lookup_expr="in")
 
-    name = filters.CharFilter(lookup_expr="icontains", label="Наименование ППЭ")
-    addr = filters.CharFilter(lookup_expr="icontains", label="Адрес ППЭ")
+    name = filters.CharFilter(lookup_expr="trigram_icontains", label="Наименование ППЭ")
+    addr = filters.CharFilter(lookup_expr="trigram_icontains", label="Адрес ППЭ")
     search = SearchVectorFilter(
         search_fields=["search_vector"],
         label="Поиск",
@@ -100,14 +110,93 @@ class PlaceFilter(filters.FilterSet):
 
 
 class ExamFilter(filters.FilterSet):
-    """Filter for exams."""
+    """Filter for exams in materialized view."""
+
+    id = NumberInFilter(field_name="id", lookup_expr="in")
+
+    date = filters.DateFilter(label="Дата экзамена")
+    date_from = filters.DateFilter(
+        field_name="date",
+        lookup_expr="gte",
+        label="Дата экзамена, с",
+    )
+    date_to = filters.DateFilter(
+        field_name="date",
+        lookup_expr="lte",
+        label="Дата экзамена, по",
+    )
+    level = filters.CharFilter(lookup_expr="icontains", label="Уровень")
+    pos = filters.CharFilter(
+        field_name="position",
+        lookup_expr="trigram_icontains",
+        label="Должность в ППЭ",
+    )
+    p_id = filters.CharFilter(field_name="place_id", label="id ППЭ")
+    p_code = filters.CharFilter(field_name="place_code", label="Код ППЭ")
+    p_name = filters.CharFilter(
+        field_name="place_name",
+        lookup_expr="trigram_icontains",
+        label="Наименование ППЭ",
+    )
+    p_addr = filters.CharFilter(
+        field_name="place_addr",
+        lookup_expr="trigram_icontains",
+        label="Адрес ППЭ",
+    )
+    emp_id = filters.CharFilter(field_name="employee_id", label="id сотрудника")
+    emp_name = filters.CharFilter(
+        field_name="employee",
+        lookup_expr="trigram_icontains",
+        label="ФИО сотрудника",
+    )
+    emp_org_id = filters.CharFilter(field_name="org_id", label="id места работы")
+    emp_org_name = filters.CharFilter(
+        field_name="org",
+        lookup_expr="trigram_icontains",
+        label="Место работы",
+    )
+    search = SearchVectorFilter(
+        search_fields=["search_vector"],
+        label="Поиск",
+        help_text="Full Text Search",
+    )
+
+    class Meta:
+        model = models.ExamView
+        fields = (
+            "id",
+            "date",
+            "date_from",
+            "date_to",
+            "level",
+            "pos",
+            "p_id",
+            "p_code",
+            "p_name",
+            "p_addr",
+            "emp_id",
+            "emp_name",
+            "emp_org_id",
+            "emp_org_name",
+            "search",
+        )
+
+
+class ExamFullFilter(filters.FilterSet):
+    """Filter for exams with joined related objects."""
 
     id = NumberInFilter(field_name="id", lookup_expr="in")
 
-    date = filters.DateFilter(
+    date = filters.DateFilter(field_name="date__date", label="Дата экзамена")
+    date_from = filters.DateFilter(
         field_name="date__date",
-        lookup_expr="icontains",
-        label="Дата экзамена",
+        lookup_expr="gte",
+        label="Дата экзамена, с",
+    )
+    date_to = filters.DateFilter(
+        field_name="date__date",
+        lookup_expr="lte",
+        label="Дата экзамена, по",
     )
     level = filters.CharFilter(
         field_name="level__level",
@@ -116,25 +205,25 @@ class ExamFilter(filters.FilterSet):
     )
     pos = filters.CharFilter(
         field_name="position__name",
-        lookup_expr="icontains",
+        lookup_expr="trigram_icontains",
         label="Должность в ППЭ",
     )
     p_id = filters.CharFilter(field_name="place__id", label="id ППЭ")
     p_code = filters.CharFilter(field_name="place__code", label="Код ППЭ")
     p_name = filters.CharFilter(
         field_name="place__name",
-        lookup_expr="icontains",
+        lookup_expr="trigram_icontains",
         label="Наименование ППЭ",
     )
     p_addr = filters.CharFilter(
         field_name="place__addr",
-        lookup_expr="icontains",
+        lookup_expr="trigram_icontains",
         label="Адрес ППЭ",
     )
     emp_id = filters.CharFilter(field_name="employee__id", label="id сотрудника")
     emp_name = filters.CharFilter(
         field_name="employee__name",
-        lookup_expr="icontains",
+        lookup_expr="trigram_icontains",
         label="ФИО сотрудника",
     )
     emp_org_id = filters.CharFilter(
@@ -143,7 +232,7 @@ class ExamFilter(filters.FilterSet):
     )
     emp_org_name = filters.CharFilter(
         field_name="employee__org__name",
-        lookup_expr="icontains",
+        lookup_expr="trigram_icontains",
         label="Место работы",
     )
     search = SearchVectorFilter(
@@ -162,6 +251,8 @@ class ExamFilter(filters.FilterSet):
         fields = (
             "id",
             "date",
+            "date_from",
+            "date_to",
             "level",
             "pos",
             "p_id",
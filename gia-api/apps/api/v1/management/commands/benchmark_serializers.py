@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from apps.api.v1 import serializers
+from apps.rcoi import models
+
+SERIALIZERS = {
+    "exam": (serializers.ExamSerializer, serializers.ExamValuesSerializer),
+    "flat": (serializers.ExamFlatSerializer, serializers.ExamFlatValuesSerializer),
+    "full": (serializers.ExamFullSerializer, serializers.ExamFullValuesSerializer),
+}
+
+
+class Command(BaseCommand):
+    """Benchmark serializers of exam API endpoints on exams from database."""
+
+    help = "Compare speed of model serializers and values serializers of exams"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=1000,
+            help="number of exams to serialize (default: 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="number of runs, best time is reported (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        limit, repeat = options["limit"], options["repeat"]
+        queryset = models.Exam.objects.select_related().order_by("id")[:limit]
+        ids = list(queryset.values_list("id", flat=True))
+        if not ids:
+            msg = "No exams to serialize"
+            raise CommandError(msg)
+        models.refresh_exam_view()
+
+        renderer = JSONRenderer()
+        for name, (model_serializer, values_serializer) in SERIALIZERS.items():
+            rows = values_serializer.model.objects.filter(id__in=ids).order_by("id")
+            model_time, model_data = self.measure(
+                repeat,
+                lambda s=model_serializer: s(list(queryset), many=True).data,
+            )
+            values_time, values_data = self.measure(
+                repeat,
+                lambda s=values_serializer, rows=rows: (
+                    s(list(s.get_rows(rows)), many=True).data
+                ),
+            )
+            if renderer.render(model_data) != renderer.render(values_data):
+                msg = f"{name}: output of {values_serializer.__name__} differs"
+                raise CommandError(msg)
+            self.stdout.write(
+                f"{name}: {len(model_data)} exams, "
+                f"{model_serializer.__name__} {model_time * 1000:.1f} ms, "
+                f"{values_serializer.__name__} {values_time * 1000:.1f} ms, "
+                f"x{model_time / values_time:.1f}",
+            )
+
+    @staticmethod
+    def measure(repeat, func):
+        """Run func `repeat` times.
+
+        :return: best time in seconds, result of the last run
+        """
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
@@ -0,0 +1,188 @@
+import base64
+import binascii
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page number pagination with optional keyset (cursor) mode.
+
+    Cursor mode is enabled by `cursor` query parameter (empty for the first page).
+    Pages are selected by values of `ordering` fields of the last seen row
+    instead of OFFSET, so every page costs the same. Total count is skipped
+    with `count=false`.
+
+    `ordering` must be columns of the paginated table matching one of its
+    indexes, so the page is read by index scan without sorting the whole
+    result.
+
+    Page number mode is unchanged.
+    """
+
+    ordering = ("-date__date", "id")
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        self.total_count = None
+        if request.query_params.get(self.count_query_param) != "false":
+            self.total_count = queryset.count()
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.reverse_field(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        try:
+            if position is not None:
+                queryset = queryset.filter(self.keyset_filter(position, reverse))
+            rows = list(queryset[: page_size + 1])
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message) from None
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            first, last = self.get_position(rows[0]), self.get_position(rows[-1])
+            if has_more or reverse:
+                self.next_position = last
+            if (has_more and reverse) or (position is not None and not reverse):
+                self.previous_position = first
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        response = {}
+        if self.total_count is not None:
+            response["count"] = self.total_count
+        response.update(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            },
+        )
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["required"] = ["results"]
+        return schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        return [
+            *parameters,
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor for keyset pagination, empty for the first page.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to false to skip total count in cursor mode.",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+    @staticmethod
+    def reverse_field(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    def get_position(self, obj):
+        """Get values of ordering fields from model instance or named values row."""
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if hasattr(obj, name):
+                position.append(getattr(obj, name))
+            else:
+                position.append(reduce(getattr, name.split("__"), obj))
+        return position
+
+    def keyset_filter(self, position, reverse):
+        """Build filter for rows after position in order of `ordering`.
+
+        (a, b) > (x, y) is (a > x) OR (a = x AND b > y). Redundant a >= x
+        is added, so the scan of index starts at position.
+        """
+        result = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position, strict=True):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            lookup = "lt" if descending != reverse else "gt"
+            if not equal:
+                start = Q(**{f"{name}__{lookup}e": value})
+            result |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return start & result
+
+    def decode_cursor(self, request):
+        """Decode cursor from request.
+
+        :return: position (or None for the first page), reverse flag
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = data["p"], bool(data["r"])
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message) from None
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        data = json.dumps({"p": position, "r": int(reverse)}, default=str)
+        encoded = base64.urlsafe_b64encode(data.encode("ascii")).decode("ascii")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+
+class ExamViewPagination(KeysetPagination):
+    """Keyset pagination for exams in materialized view.
+
+    Order is the same as Exam.Meta.ordering, by date of exam, and is served
+    by the (date DESC, id) index of the view.
+    """
+
+    ordering = ("-date", "id")
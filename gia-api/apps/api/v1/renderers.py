@@ -0,0 +1,74 @@
+import abc
+import csv
+import json
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingRenderer(abc.ABC, BaseRenderer):
+    """Renderer for export of rows as a stream of lines.
+
+    `stream` turns iterable of rows (tuples) into iterable of encoded chunks
+    for StreamingHttpResponse. Non-streaming responses (errors) are rendered
+    as JSON.
+    """
+
+    charset = "utf-8"
+    chunk_size = 1000
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False).encode()
+
+    def stream(self, columns, rows):
+        """Render header and rows in chunks of `chunk_size` rows."""
+        header = self.render_header(columns)
+        if header:
+            yield header.encode(self.charset)
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield self.render_rows(columns, chunk).encode(self.charset)
+
+    def render_header(self, columns):
+        return ""
+
+    @abc.abstractmethod
+    def render_rows(self, columns, rows):
+        """Render chunk of rows as text."""
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Render rows as newline delimited JSON objects."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render_rows(self, columns, rows):
+        encoder = JSONEncoder(ensure_ascii=False)
+        return "".join(
+            encoder.encode(dict(zip(columns, row, strict=True))) + "\n" for row in rows
+        )
+
+
+class _Buffer:
+    """File-like object for csv.writer that returns written line."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    """Render rows as CSV with header."""
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def __init__(self):
+        self.writer = csv.writer(_Buffer())
+
+    def render_header(self, columns):
+        return self.writer.writerow(columns)
+
+    def render_rows(self, columns, rows):
+        return "".join(map(self.writer.writerow, rows))
@@ -1,8 +1,10 @@
-from django.db.models import Count
+import abc
+
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
-from apps.rcoi import models
+from apps.rcoi import models, search
 
 
 class DateSerializer(serializers.ModelSerializer):
@@ -86,15 +88,275 @@ class ExamFlatSerializer(serializers.ModelSerializer):
         exclude = ("created", "modified")
 
 
+class EmployeeFullSerializer(serializers.ModelSerializer):
+    """Serializer for Employee model with nested fields included."""
+
+    search_vector = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = models.Employee
+        fields = ("id", "created", "modified", "name", "search_vector", "org")
+        depth = 1
+
+
+class DataFileFullSerializer(serializers.ModelSerializer):
+    """Serializer for DataFile model to be included in Exam, without etag."""
+
+    class Meta:
+        model = models.DataFile
+        exclude = ("etag",)
+
+
 class ExamFullSerializer(serializers.ModelSerializer):
     """Serializer for Exam model with nested fields included."""
 
+    employee = EmployeeFullSerializer()
+    datafile = DataFileFullSerializer()
+
     class Meta:
         model = models.Exam
-        fields = "__all__"
+        fields = (
+            "id",
+            "created",
+            "modified",
+            "date",
+            "level",
+            "place",
+            "employee",
+            "position",
+            "datafile",
+        )
         depth = 2
 
 
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _datetime(value):
+    """Format datetime like rest_framework DateTimeField with ISO 8601 format."""
+    if not value:
+        return None
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class ValuesSerializer(abc.ABC):
+    """Read-only serializer of `model.objects.values_list(*columns)` rows.
+
+    Rows are named tuples returned by `get_rows`, subclasses build dicts
+    from them by field name in `to_representation`, without serializer
+    fields machinery. Output of subclasses is the same as output of the
+    corresponding model serializer.
+    """
+
+    model = None
+    columns = ()
+
+    def __init__(self, instance, *, many=False):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def get_rows(cls, queryset):
+        """Fetch `columns` of queryset as named tuples."""
+        return queryset.values_list(*cls.columns, named=True)
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+    @abc.abstractmethod
+    def to_representation(self, row):
+        """Build dict from named tuple row."""
+
+
+class ExamValuesSerializer(ValuesSerializer):
+    """Fast serializer for Exam model, same output as ExamSerializer."""
+
+    model = models.ExamView
+    columns = (
+        "id",
+        "date_id",
+        "date",
+        "level_id",
+        "level",
+        "place_id",
+        "place_code",
+        "place_name",
+        "place_addr",
+        "position_id",
+        "position",
+        "employee_id",
+        "employee",
+        "org_id",
+        "org",
+        "datafile_id",
+    )
+
+    def to_representation(self, row):
+        return {
+            "id": row.id,
+            "date": {"id": row.date_id, "date": _date(row.date)},
+            "level": {"id": row.level_id, "level": row.level},
+            "place": {
+                "id": row.place_id,
+                "code": row.place_code,
+                "name": row.place_name,
+                "addr": row.place_addr,
+            },
+            "position": {"id": row.position_id, "name": row.position},
+            "employee": {
+                "id": row.employee_id,
+                "name": row.employee,
+                "org": {"id": row.org_id, "name": row.org},
+            },
+            "datafile": row.datafile_id,
+        }
+
+
+class ExamFlatValuesSerializer(ValuesSerializer):
+    """Fast serializer for Exam model, same output as ExamFlatSerializer."""
+
+    model = models.ExamView
+    columns = (
+        "id",
+        "date",
+        "level",
+        "place_code",
+        "place_name",
+        "place_addr",
+        "position",
+        "employee",
+        "org",
+        "datafile_id",
+    )
+
+    def to_representation(self, row):
+        return {
+            "id": row.id,
+            "date": _date(row.date),
+            "level": row.level,
+            "code": row.place_code,
+            "place": row.place_name,
+            "addr": row.place_addr,
+            "position": row.position,
+            "employee": row.employee,
+            "org": row.org,
+            "datafile": row.datafile_id,
+        }
+
+
+class ExamFullValuesSerializer(ValuesSerializer):
+    """Fast serializer for Exam model, same output as ExamFullSerializer."""
+
+    model = models.Exam
+    columns = (
+        "id",
+        "created",
+        "modified",
+        "date_id",
+        "date__created",
+        "date__modified",
+        "date__date",
+        "level_id",
+        "level__created",
+        "level__modified",
+        "level__level",
+        "place_id",
+        "place__created",
+        "place__modified",
+        "place__code",
+        "place__name",
+        "place__addr",
+        "place__search_vector",
+        "employee_id",
+        "employee__created",
+        "employee__modified",
+        "employee__name",
+        "employee__search_vector",
+        "employee__org_id",
+        "employee__org__created",
+        "employee__org__modified",
+        "employee__org__name",
+        "employee__org__search_vector",
+        "position_id",
+        "position__created",
+        "position__modified",
+        "position__name",
+        "position__search_vector",
+        "datafile_id",
+        "datafile__created",
+        "datafile__modified",
+        "datafile__name",
+        "datafile__url",
+        "datafile__size",
+        "datafile__last_modified",
+    )
+
+    def to_representation(self, row):
+        return {
+            "id": row.id,
+            "created": _datetime(row.created),
+            "modified": _datetime(row.modified),
+            "date": {
+                "id": row.date_id,
+                "created": _datetime(row.date__created),
+                "modified": _datetime(row.date__modified),
+                "date": _date(row.date__date),
+            },
+            "level": {
+                "id": row.level_id,
+                "created": _datetime(row.level__created),
+                "modified": _datetime(row.level__modified),
+                "level": row.level__level,
+            },
+            "place": {
+                "id": row.place_id,
+                "created": _datetime(row.place__created),
+                "modified": _datetime(row.place__modified),
+                "code": row.place__code,
+                "name": row.place__name,
+                "addr": row.place__addr,
+                "search_vector": row.place__search_vector,
+            },
+            "employee": {
+                "id": row.employee_id,
+                "created": _datetime(row.employee__created),
+                "modified": _datetime(row.employee__modified),
+                "name": row.employee__name,
+                "search_vector": row.employee__search_vector,
+                "org": {
+                    "id": row.employee__org_id,
+                    "created": _datetime(row.employee__org__created),
+                    "modified": _datetime(row.employee__org__modified),
+                    "name": row.employee__org__name,
+                    "search_vector": row.employee__org__search_vector,
+                },
+            },
+            "position": {
+                "id": row.position_id,
+                "created": _datetime(row.position__created),
+                "modified": _datetime(row.position__modified),
+                "name": row.position__name,
+                "search_vector": row.position__search_vector,
+            },
+            "datafile": {
+                "id": row.datafile_id,
+                "created": _datetime(row.datafile__created),
+                "modified": _datetime(row.datafile__modified),
+                "name": row.datafile__name,
+                "url": row.datafile__url,
+                "size": row.datafile__size,
+                "last_modified": _datetime(row.datafile__last_modified),
+            },
+        }
+
+
 class ExamForEmployeeSerializer(serializers.ModelSerializer):
     """Serializer for Exam to be included in Employee."""
 
@@ -130,23 +392,81 @@ class EmployeeForOrgSerializer(serializers.Serializer):
     exams = ExamForEmployeeSerializer(many=True)
 
 
+@extend_schema_field(EmployeeForOrgSerializer(many=True))
 class EmployeesAnnotatedField(serializers.Field):
-    """Annotated list of employees with exams."""
+    """List of employees with exams.
+
+    Employees are fetched with their exams in one joined query of tuples
+    and grouped here. Output is the same as of EmployeeForOrgSerializer.
+    """
+
+    columns = (
+        "id",
+        "name",
+        "org_id",
+        "exams__id",
+        "exams__date_id",
+        "exams__date__date",
+        "exams__level_id",
+        "exams__level__level",
+        "exams__position_id",
+        "exams__position__name",
+        "exams__place_id",
+        "exams__place__code",
+        "exams__place__name",
+        "exams__place__addr",
+        "exams__datafile_id",
+    )
 
     def to_representation(self, value):
-        s = (
-            value.annotate(num_exams=Count("exams"))
-            .prefetch_related(
-                "exams__date",
-                "exams__level",
-                "exams__place",
-                "exams__position",
-            )
-            .order_by("name")
-            .all()
-        )
-        ser = EmployeeForOrgSerializer(s, many=True)
-        return ser.data
+        rows = value.order_by("name", "id", "-exams__date__date", "exams__id")
+        employees = {}
+        for row in rows.values_list(*self.columns):
+            employee_id, name, org_id, exam_id = row[:4]
+            employee = employees.get(employee_id)
+            if employee is None:
+                employee = employees[employee_id] = {
+                    "id": employee_id,
+                    "name": name,
+                    "org": org_id,
+                    "num_exams": 0,
+                    "exams": [],
+                }
+            if exam_id is None:
+                continue
+            employee["num_exams"] += 1
+            employee["exams"].append(self.exam_representation(row[3:]))
+        return list(employees.values())
+
+    @staticmethod
+    def exam_representation(row):
+        (
+            id_,
+            date_id,
+            date,
+            level_id,
+            level,
+            position_id,
+            position,
+            place_id,
+            place_code,
+            place_name,
+            place_addr,
+            datafile_id,
+        ) = row
+        return {
+            "id": id_,
+            "date": {"id": date_id, "date": _date(date)},
+            "level": {"id": level_id, "level": level},
+            "position": {"id": position_id, "name": position},
+            "place": {
+                "id": place_id,
+                "code": place_code,
+                "name": place_name,
+                "addr": place_addr,
+            },
+            "datafile": datafile_id,
+        }
 
 
 class OrganisationDetailSerializer(serializers.ModelSerializer):
@@ -172,7 +492,42 @@ class DataFileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.DataFile
-        exclude = ("created", "modified")
+        exclude = ("created", "modified", "etag")
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    """Query parameters of autocomplete."""
+
+    q = serializers.CharField(label="Начало ФИО, места работы или ППЭ")
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=search.AUTOCOMPLETE_MAX_LIMIT,
+        default=search.AUTOCOMPLETE_LIMIT,
+    )
+
+
+class AutocompleteEmployeeSerializer(serializers.Serializer):
+    """Employee suggested by autocomplete."""
+
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    org_id = serializers.IntegerField()
+
+
+class AutocompletePlaceSerializer(serializers.Serializer):
+    """Place suggested by autocomplete."""
+
+    id = serializers.IntegerField()
+    code = serializers.CharField()
+    name = serializers.CharField()
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Suggestions of autocomplete."""
+
+    employees = AutocompleteEmployeeSerializer(many=True)
+    organisations = OrganisationSerializer(many=True)
+    places = AutocompletePlaceSerializer(many=True)
 
 
 def limit_subscriptions(fields):
@@ -1,11 +1,20 @@
+import base64
+import csv
+import datetime
+import io
 import json
 from http import HTTPStatus
 
 import pytest
 from ddf import G
+from django.core.management import call_command
+from django.db.models import Count
 from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
 
-from apps.rcoi import models
+from apps.api.v1 import renderers, serializers, views
+from apps.api.v1.pagination import KeysetPagination
+from apps.rcoi import caching, models
 
 pytestmark = pytest.mark.django_db
 
@@ -156,6 +165,7 @@ def test_api_exam_view_detail(client):
     Test API - Exam - Detail View (Default Serializer)
     """
     obj = G(models.Exam)
+    models.refresh_exam_view()
     url = reverse(
         "apiv1:exam-detail",
         args=[
@@ -171,6 +181,7 @@ def test_api_examflat_view_detail(client):
     Test API - Exam - Detail View (Flat Serializer)
     """
     obj = G(models.Exam)
+    models.refresh_exam_view()
     url = reverse(
         "apiv1:flat-detail",
         args=[
@@ -196,6 +207,24 @@ def test_api_examfull_view_detail(client):
     assert resp.status_code == HTTPStatus.OK
 
 
+def test_api_examfull_datafile_without_etag(client):
+    """
+    Test API - Exam - Full Serializer - datafile etag is not exposed
+    """
+    obj = G(models.Exam, datafile=G(models.DataFile, etag='"abc"'))
+    models.refresh_exam_view()
+    list_resp = client.get(reverse("apiv1:full-list"))
+    detail_resp = client.get(reverse("apiv1:full-detail", args=[obj.pk]))
+
+    datafiles = [
+        list_resp.json()["results"][0]["datafile"],
+        detail_resp.json()["datafile"],
+    ]
+    for datafile in datafiles:
+        assert datafile["id"] == obj.datafile_id
+        assert "etag" not in datafile
+
+
 def test_api_datasource_view_detail(client):
     """
     Test API - DataSource - Detail View
@@ -224,3 +253,318 @@ def test_api_datafile_view_detail(client):
     )
     resp = client.get(url)
     assert resp.status_code == HTTPStatus.OK
+
+
+@pytest.fixture
+def exams_for_cursor():
+    # reserve day published later has greater id than later dates
+    dates = [G(models.Date, date=datetime.date(2020, 6, day)) for day in (2, 3, 1)]
+    exams = [G(models.Exam, date=date) for date in dates for _ in range(4)]
+    models.refresh_exam_view()
+    return sorted(exams, key=lambda exam: (-exam.date.date.toordinal(), exam.id))
+
+
+@pytest.mark.parametrize("view_name", ["exam", "flat", "full"])
+def test_api_exam_cursor_pagination(client, mocker, view_name, exams_for_cursor):
+    """
+    Test API - Exam - Keyset pagination walks all rows forward and back
+    """
+    mocker.patch.object(KeysetPagination, "page_size", 5)
+    url = reverse(f"apiv1:{view_name}-list")
+    # same order as in page number mode
+    for page in (1, 2, 3):
+        resp = client.get(url, {"page": page})
+        assert [row["id"] for row in resp.json()["results"]] == [
+            e.id for e in exams_for_cursor[(page - 1) * 5 : page * 5]
+        ]
+
+    pages = []
+    resp = client.get(url, {"cursor": ""})
+    while True:
+        content = resp.json()
+        assert content["count"] == len(exams_for_cursor)
+        pages.append([row["id"] for row in content["results"]])
+        if not content["next"]:
+            break
+        resp = client.get(content["next"])
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert [i for page in pages for i in page] == [e.id for e in exams_for_cursor]
+
+    # previous pages from the last one
+    resp = client.get(content["previous"])
+    assert [row["id"] for row in resp.json()["results"]] == pages[1]
+    resp = client.get(resp.json()["previous"])
+    content = resp.json()
+    assert [row["id"] for row in content["results"]] == pages[0]
+    assert content["previous"] is None
+
+
+def test_api_exam_cursor_pagination_without_count(
+    client,
+    django_assert_num_queries,
+    exams_for_cursor,
+):
+    """
+    Test API - Exam - Keyset pagination skips count query
+    """
+    url = reverse("apiv1:exam-list")
+    # savepoint, select, release savepoint
+    with django_assert_num_queries(3) as captured:
+        resp = client.get(url, {"cursor": "", "count": "false"})
+    assert not any("COUNT" in query["sql"] for query in captured.captured_queries)
+    content = resp.json()
+    assert "count" not in content
+    assert content["next"] is None
+    assert len(content["results"]) == len(exams_for_cursor)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "bad",
+        base64.urlsafe_b64encode(b'{"p": [1], "r": 0}').decode(),
+        base64.urlsafe_b64encode(b'{"p": ["bad date", 1], "r": 0}').decode(),
+    ],
+)
+def test_api_exam_cursor_pagination_invalid_cursor(client, cursor):
+    """
+    Test API - Exam - Keyset pagination with invalid cursor
+    """
+    url = reverse("apiv1:exam-list")
+    resp = client.get(url, {"cursor": cursor})
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_exam_export_ndjson(client, exams_for_cursor):
+    """
+    Test API - Exam - Export filtered exams as NDJSON
+    """
+    url = reverse("apiv1:export-list")
+    resp = client.get(url, {"date": "2020-06-02"})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.streaming
+    assert resp["Content-Type"] == "application/x-ndjson; charset=utf-8"
+
+    rows = [json.loads(line) for line in b"".join(resp.streaming_content).splitlines()]
+    flat = client.get(reverse("apiv1:flat-list"), {"date": "2020-06-02"}).json()
+    assert rows == flat["results"]
+
+
+def test_api_exam_export_csv(client, exams_for_cursor):
+    """
+    Test API - Exam - Export all exams as CSV
+    """
+    url = reverse("apiv1:export-list")
+    resp = client.get(url, {"format": "csv"})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp["Content-Disposition"] == 'attachment; filename="exams.csv"'
+
+    content = b"".join(resp.streaming_content).decode()
+    reader = csv.DictReader(io.StringIO(content))
+    assert reader.fieldnames == list(views.ExamExportViewSet.columns)
+    rows = list(reader)
+    assert len(rows) == len(exams_for_cursor)
+    assert {row["date"] for row in rows} == {"2020-06-01", "2020-06-02", "2020-06-03"}
+
+
+@pytest.mark.parametrize(
+    ("model_serializer", "values_serializer"),
+    [
+        (serializers.ExamSerializer, serializers.ExamValuesSerializer),
+        (serializers.ExamFlatSerializer, serializers.ExamFlatValuesSerializer),
+        (serializers.ExamFullSerializer, serializers.ExamFullValuesSerializer),
+    ],
+)
+def test_api_exam_values_serializer_output(model_serializer, values_serializer):
+    """
+    Test API - Exam - values serializer output is the same as model serializer output
+    """
+    G(models.Exam, n=3)
+    G(models.Exam, place=G(models.Place, addr=""))
+    models.refresh_exam_view()
+    queryset = models.Exam.objects.select_related().order_by("id")
+
+    expected = JSONRenderer().render(model_serializer(queryset, many=True).data)
+    rows = values_serializer.get_rows(
+        values_serializer.model.objects.order_by("id"),
+    )
+    result = JSONRenderer().render(values_serializer(rows, many=True).data)
+
+    assert result == expected
+
+
+def test_api_values_serializer_is_abstract():
+    """
+    Test API - values serializer without to_representation can not be created
+    """
+
+    class IncompleteValuesSerializer(serializers.ValuesSerializer):
+        model = models.Exam
+        columns = ("id",)
+
+    with pytest.raises(TypeError, match="to_representation"):
+        IncompleteValuesSerializer([])
+
+
+def test_api_streaming_renderer_is_abstract():
+    """
+    Test API - streaming renderer without render_rows can not be created
+    """
+
+    class IncompleteRenderer(renderers.StreamingRenderer):
+        media_type = "text/plain"
+
+    with pytest.raises(TypeError, match="render_rows"):
+        IncompleteRenderer()
+
+
+def test_benchmark_serializers_command():
+    """
+    Test API - benchmark_serializers command compares output and reports timings
+    """
+    G(models.Exam, n=2)
+    out = io.StringIO()
+    call_command("benchmark_serializers", repeat=1, stdout=out)
+    assert out.getvalue().count("2 exams") == 3
+
+
+def test_api_organisation_detail_employees(client, django_assert_num_queries):
+    """
+    Test API - Organisation - Detail View - employees with exams in one query
+    """
+    org = G(models.Organisation)
+    employee1 = G(models.Employee, name="Employee 1", org=org)
+    employee2 = G(models.Employee, name="Employee 2", org=org)
+    G(models.Exam, employee=employee1, n=3)
+    G(models.Exam, employee=G(models.Employee))
+    employees = (
+        org.employees.annotate(num_exams=Count("exams"))
+        .prefetch_related("exams__date", "exams__level", "exams__place")
+        .order_by("name")
+    )
+    expected = serializers.EmployeeForOrgSerializer(employees, many=True).data
+    url = reverse("apiv1:organisation-detail", args=[org.pk])
+
+    # get organisation, get employees with exams, savepoint, release savepoint
+    with django_assert_num_queries(4):
+        resp = client.get(url)
+
+    content = json.loads(resp.content)
+    assert content["id"] == org.pk
+    assert content["employees"] == json.loads(JSONRenderer().render(expected))
+    assert [e["num_exams"] for e in content["employees"]] == [3, 0]
+    assert content["employees"][1]["id"] == employee2.pk
+
+
+def test_api_organisation_detail_cached_until_data_update(client):
+    """
+    Test API - Organisation - Detail View - cached until data version is changed
+    """
+    org = G(models.Organisation)
+    url = reverse("apiv1:organisation-detail", args=[org.pk])
+    assert client.get(url).json()["employees"] == []
+
+    G(models.Employee, org=org)
+    assert client.get(url).json()["employees"] == []
+
+    caching.bump_data_version()
+    assert len(client.get(url).json()["employees"]) == 1
+
+
+@pytest.mark.parametrize("view_name", ["exam", "flat", "full", "export"])
+def test_api_exam_filter_by_substring_and_date(client, view_name):
+    """
+    Test API - Exam - filter by substring of names and by exact date or date range
+    """
+    date1 = G(models.Date, date=datetime.date(2020, 6, 1))
+    date2 = G(models.Date, date=datetime.date(2020, 6, 2))
+    G(models.Exam, date=date1, employee=G(models.Employee, name="Петров Пётр"))
+    G(models.Exam, date=date2, employee=G(models.Employee, name="Иванов Иван"))
+    models.refresh_exam_view()
+    url = reverse(f"apiv1:{view_name}-list")
+
+    def get_ids(params):
+        resp = client.get(url, params)
+        assert resp.status_code == HTTPStatus.OK
+        if view_name == "export":
+            content = b"".join(resp.streaming_content).decode()
+            return [json.loads(line)["id"] for line in content.splitlines()]
+        return [exam["id"] for exam in resp.json()["results"]]
+
+    exams = models.Exam.objects.order_by("date__date")
+    assert get_ids({"emp_name": "петров"}) == [exams[0].id]
+    assert get_ids({"date": "2020-06-02"}) == [exams[1].id]
+    assert len(get_ids({"date_from": "2020-06-01", "date_to": "2020-06-02"})) == 2
+    assert get_ids({"date_from": "2020-06-02"}) == [exams[1].id]
+    if view_name != "export":
+        assert get_ids({"cursor": "", "emp_name": "петров"}) == [exams[0].id]
+        assert get_ids({"cursor": "", "date_from": "2020-06-02"}) == [exams[1].id]
+
+
+def test_api_autocomplete(client):
+    """
+    Test API - Autocomplete - suggestions by prefix of names
+    """
+    org = G(models.Organisation, name="Школа 1")
+    employee = G(models.Employee, name="Иванов Иван Иванович", org=org)
+    G(models.Employee, name="Петров Пётр Петрович", org=org)
+    place = G(models.Place, code="1234", name="Школа 2")
+    caching.bump_data_version()
+    url = reverse("apiv1:autocomplete-list")
+
+    resp = client.get(url, {"q": "иван"})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == {
+        "employees": [{"id": employee.id, "name": employee.name, "org_id": org.id}],
+        "organisations": [],
+        "places": [],
+    }
+
+    content = client.get(url, {"q": "шк", "limit": 1}).json()
+    assert content["employees"] == []
+    assert len(content["organisations"]) == 1
+    assert content["places"] == [{"id": place.id, "code": "1234", "name": "Школа 2"}]
+
+    # words before the last one should match fully
+    assert client.get(url, {"q": "иванов ив"}).json()["employees"]
+    assert not client.get(url, {"q": "петров ив"}).json()["employees"]
+
+
+def test_api_autocomplete_cached_until_data_update(client, django_assert_num_queries):
+    """
+    Test API - Autocomplete - suggestions are memoized until data version is changed
+    """
+    caching.bump_data_version()
+    url = reverse("apiv1:autocomplete-list")
+    assert client.get(url, {"q": "сидоров"}).json()["employees"] == []
+
+    G(models.Employee, name="Сидоров Сидор")
+    # savepoint and release savepoint only
+    with django_assert_num_queries(2):
+        assert client.get(url, {"q": "сидоров"}).json()["employees"] == []
+
+    caching.bump_data_version()
+    assert len(client.get(url, {"q": "Сидоров"}).json()["employees"]) == 1
+
+
+@pytest.mark.parametrize(
+    ("params", "status"),
+    [({}, HTTPStatus.BAD_REQUEST), ({"q": "ив", "limit": 100}, HTTPStatus.BAD_REQUEST)],
+)
+def test_api_autocomplete_invalid_params(client, params, status):
+    """
+    Test API - Autocomplete - invalid query parameters
+    """
+    resp = client.get(reverse("apiv1:autocomplete-list"), params)
+    assert resp.status_code == status
+
+
+def test_api_autocomplete_short_query(client, django_assert_num_queries):
+    """
+    Test API - Autocomplete - query shorter than min length is not searched
+    """
+    G(models.Employee, name="Иванов Иван")
+    with django_assert_num_queries(2):
+        resp = client.get(reverse("apiv1:autocomplete-list"), {"q": "и :*"})
+    assert resp.json() == {"employees": [], "organisations": [], "places": []}
@@ -17,9 +17,11 @@ router.register(r"organisation", views.OrganisationViewSet)
 router.register(r"position", views.PositionViewSet)
 router.register(r"employee", views.EmployeeViewSet, basename="employee")
 router.register(r"place", views.PlaceViewSet)
-router.register(r"exam", views.ExamViewSet)
+router.register(r"exam", views.ExamViewSet, basename="exam")
 router.register(r"examflat", views.ExamFlatViewSet, basename="flat")
 router.register(r"examfull", views.ExamFullViewSet, basename="full")
+router.register(r"examexport", views.ExamExportViewSet, basename="export")
+router.register(r"autocomplete", views.AutocompleteViewSet, basename="autocomplete")
 router.register(r"datasource", views.DataSourceViewSet)
 router.register(r"datafile", views.DataFileViewSet)
 router.register(r"subscription", views.SubscriptionViewSet, basename="subscription")
@@ -1,18 +1,60 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
+from django_filters.utils import translate_validation
+from drf_spectacular.utils import extend_schema
 from rest_framework import permissions, viewsets
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework_extensions.mixins import DetailSerializerMixin
 
-from apps.rcoi import models
+from apps.rcoi import models, search
+from apps.rcoi.caching import versioned_key
 
-from . import filters, serializers
+from . import filters, renderers, serializers
+from .pagination import ExamViewPagination
 from .permissions import IsOwner
 
 
+class ValuesSerializerMixin:
+    """Serialize rows with fast values serializer instead of model serializer.
+
+    Rows are fetched with `values_serializer_class.get_rows()` as named
+    tuples, so model instances are not created.
+    """
+
+    values_serializer_class = None
+
+    def get_values_queryset(self):
+        return self.values_serializer_class.get_rows(
+            self.filter_queryset(self.get_queryset()),
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.values_serializer_class
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = serializer_class(queryset, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_values_queryset(),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(request, row)
+        return Response(self.values_serializer_class(row).data)
+
+
 class DateViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for the Date class."""
 
@@ -45,6 +87,16 @@ class OrganisationViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
     serializer_detail_class = serializers.OrganisationDetailSerializer
     filterset_class = filters.OrganisationFilter
 
+    def retrieve(self, request, *args, **kwargs):
+        """Organisation with employees and exams, cached until next data update."""
+        instance = self.get_object()
+        key = versioned_key("api:organisation", instance.pk)
+        data = cache.get(key)
+        if data is None:
+            data = self.get_serializer(instance).data
+            cache.set(key, data, settings.CACHE_MIDDLEWARE_SECONDS)
+        return Response(data)
+
 
 class EmployeeViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for the Employee class."""
@@ -69,28 +121,128 @@ class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = filters.PlaceFilter
 
 
-class ExamViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for the Exam class."""
+class ExamViewSet(ValuesSerializerMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for the Exam class, reads materialized view."""
 
-    queryset = models.Exam.objects.select_related()
+    queryset = models.ExamView.objects.all()
+    pagination_class = ExamViewPagination
     serializer_class = serializers.ExamSerializer
+    values_serializer_class = serializers.ExamValuesSerializer
     filterset_class = filters.ExamFilter
 
 
-class ExamFlatViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for the ExamFlat class."""
+class ExamFlatViewSet(ValuesSerializerMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for the ExamFlat class, reads materialized view."""
 
-    queryset = models.Exam.objects.select_related()
+    queryset = models.ExamView.objects.all()
+    pagination_class = ExamViewPagination
     serializer_class = serializers.ExamFlatSerializer
+    values_serializer_class = serializers.ExamFlatValuesSerializer
     filterset_class = filters.ExamFilter
 
 
-class ExamFullViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for the ExamFull class."""
+class ExamFullViewSet(ValuesSerializerMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for the ExamFull class.
+
+    In cursor mode the page of ids is read from materialized view by its
+    (date DESC, id) index with the same filters, then full rows of exams
+    are read for the page. Order of exams is the same in both modes.
+    """
 
     queryset = models.Exam.objects.select_related()
+    pagination_class = ExamViewPagination
     serializer_class = serializers.ExamFullSerializer
+    values_serializer_class = serializers.ExamFullValuesSerializer
+    filterset_class = filters.ExamFullFilter
+    view_filterset_class = filters.ExamFilter
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator.cursor_query_param not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(
+            self.filter_view_queryset().values_list("id", "date", named=True),
+        )
+        ids = [row.id for row in page]
+        rows = {
+            row.id: row
+            for row in self.values_serializer_class.get_rows(
+                self.get_queryset().filter(id__in=ids),
+            )
+        }
+        serializer = self.values_serializer_class(
+            # exams deleted after refresh of view are skipped
+            [rows[id_] for id_ in ids if id_ in rows],
+            many=True,
+        )
+        return self.get_paginated_response(serializer.data)
+
+    def filter_view_queryset(self):
+        """Filter materialized view with filters of request."""
+        filterset = self.view_filterset_class(
+            self.request.query_params,
+            queryset=models.ExamView.objects.all(),
+            request=self.request,
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+
+class ExamExportViewSet(viewsets.GenericViewSet):
+    """Export all filtered exams as NDJSON (default) or CSV (`?format=csv`).
+
+    Rows are read from a server-side cursor as tuples and written
+    to the streaming response, without model instances and serializers.
+    """
+
+    queryset = models.ExamView.objects.all()
+    # describes exported rows in schema, not used for export
+    serializer_class = serializers.ExamFlatSerializer
     filterset_class = filters.ExamFilter
+    renderer_classes = (renderers.NDJSONRenderer, renderers.CSVRenderer)
+    pagination_class = None
+    columns = {
+        "id": "id",
+        "date": "date",
+        "level": "level",
+        "code": "place_code",
+        "place": "place_name",
+        "addr": "place_addr",
+        "position": "position",
+        "employee": "employee",
+        "org": "org",
+        "datafile": "datafile_id",
+    }
+    chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*self.columns.values()).iterator(
+            chunk_size=self.chunk_size,
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(list(self.columns), rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="exams.{renderer.format}"'
+        )
+        return response
+
+
+class AutocompleteViewSet(viewsets.GenericViewSet):
+    """Suggest employees, organisations and places by beginning of their names."""
+
+    serializer_class = serializers.AutocompleteSerializer
+    pagination_class = None
+    filter_backends = ()
+
+    @extend_schema(parameters=[serializers.AutocompleteQuerySerializer])
+    def list(self, request, *args, **kwargs):
+        params = serializers.AutocompleteQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(search.autocomplete(**params.validated_data))
 
 
 class DataSourceViewSet(viewsets.ReadOnlyModelViewSet):
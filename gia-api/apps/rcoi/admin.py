@@ -53,7 +53,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     list_display = ("name", "org", "created", "modified", "id")
     list_filter = ("created", "modified")
     search_fields = ("name", "org__name")
-    exclude = ("search_vector",)
+    exclude = ("search_vector", "search_document")
 
 
 @admin.register(models.Place)
@@ -89,6 +89,44 @@ class DataFileAdmin(admin.ModelAdmin):
     list_filter = ("name", "created", "modified")
 
 
+@admin.register(models.ImportRun)
+class ImportRunAdmin(admin.ModelAdmin):
+    """ImportRun admin view, runs are saved by data updates only."""
+
+    list_display = (
+        "created",
+        "status",
+        "duration_display",
+        "stages_display",
+        "files_found",
+        "files_downloaded",
+        "files_skipped",
+        "files_unparsed",
+        "bytes_downloaded",
+        "rows_inserted",
+        "rows_updated",
+        "rows_deleted",
+        "id",
+    )
+    list_filter = ("status", "created")
+
+    @admin.display(description="Длительность, с", ordering="duration")
+    def duration_display(self, obj):
+        return f"{obj.duration:.1f}"
+
+    @admin.display(description="Длительность этапов, с")
+    def stages_display(self, obj):
+        """Durations of stages, the slowest stage first."""
+        stages = sorted(obj.stages.items(), key=lambda stage: stage[1], reverse=True)
+        return ", ".join(f"{stage} {seconds:.1f}" for stage, seconds in stages)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(models.Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     """Subscription admin view."""
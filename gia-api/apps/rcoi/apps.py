@@ -6,3 +6,10 @@ class RcoiConfig(AppConfig):
 
     default_auto_field = "django.db.models.AutoField"
     name = "apps.rcoi"
+
+    def ready(self):
+        from django.db.models import CharField
+
+        from .lookups import TrigramIContains
+
+        CharField.register_lookup(TrigramIContains)
@@ -0,0 +1,168 @@
+"""Cache invalidation after data updates.
+
+Cached pages are stored under keys prefixed with data version. Update of data
+bumps the version, so new pages are cached under new keys while old ones
+expire by TTL, instead of clearing the whole cache at once.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.core.cache import cache
+from django.middleware.cache import (
+    CacheMiddleware,
+    FetchFromCacheMiddleware,
+    UpdateCacheMiddleware,
+)
+from django.utils.decorators import decorator_from_middleware_with_args
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "rcoi:data_version"
+
+_request_data_version = ContextVar("request_data_version", default=None)
+"""data version of request handled by cache middleware in current context"""
+
+
+def get_data_version():
+    """Get current data version.
+
+    :rtype: int
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # start from timestamp, so lost key does not reuse old versions
+        cache.add(DATA_VERSION_KEY, int(time.time()), timeout=None)
+        version = cache.get(DATA_VERSION_KEY, int(time.time()))
+    return version
+
+
+def bump_data_version():
+    """Increment data version.
+
+    :return: new data version
+    :rtype: int
+    """
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        version = int(time.time())
+        cache.set(DATA_VERSION_KEY, version, timeout=None)
+        return version
+
+
+def versioned_key(*parts):
+    """Build cache key from parts and current data version.
+
+    :return: key like "rcoi:part1:part2:v123"
+    :rtype: str
+    """
+    return ":".join(["rcoi", *map(str, parts), f"v{get_data_version()}"])
+
+
+def invalidate_querysets(models):
+    """Invalidate querysets of models cached by cacheops.
+
+    Rows written with raw SQL are not seen by cacheops, so querysets must be
+    invalidated before reading the changed tables with ORM again.
+
+    :param models: changed models
+    :type models: collections.abc.Iterable
+    """
+    if apps.is_installed("cacheops"):
+        from cacheops import invalidate_model
+
+        for model in set(models):
+            invalidate_model(model)
+
+
+def invalidate_models(models):
+    """Invalidate cached querysets of models and cached pages.
+
+    :param models: changed models
+    :type models: collections.abc.Iterable
+    """
+    models = set(models)
+    invalidate_querysets(models)
+    version = bump_data_version()
+    logger.debug(
+        "caches invalidated: %s, data version: %s",
+        sorted(model._meta.label for model in models),  # noqa: SLF001
+        version,
+    )
+
+
+def get_request_data_version(request):
+    """Get data version of request, it is read once per request.
+
+    :rtype: int
+    """
+    if not hasattr(request, "_cache_data_version"):
+        request._cache_data_version = get_data_version()  # noqa: SLF001
+    return request._cache_data_version  # noqa: SLF001
+
+
+class VersionedKeyPrefixMixin:
+    """Add data version of request to key prefix of cache middleware.
+
+    Fetch and update of cached page use the version read at the start
+    of request, so page rendered from data of old version is not stored
+    under key of new version bumped while it was rendered.
+    """
+
+    @property
+    def key_prefix(self):
+        version = _request_data_version.get()
+        if version is None:
+            version = get_data_version()
+        return f"{self._key_prefix}v{version}"
+
+    @key_prefix.setter
+    def key_prefix(self, value):
+        self._key_prefix = value
+
+    def process_request(self, request):
+        token = _request_data_version.set(get_request_data_version(request))
+        try:
+            if hasattr(super(), "process_request"):
+                return super().process_request(request)
+            return None
+        finally:
+            _request_data_version.reset(token)
+
+    def process_response(self, request, response):
+        token = _request_data_version.set(get_request_data_version(request))
+        try:
+            if hasattr(super(), "process_response"):
+                return super().process_response(request, response)
+            return response
+        finally:
+            _request_data_version.reset(token)
+
+
+class VersionedUpdateCacheMiddleware(VersionedKeyPrefixMixin, UpdateCacheMiddleware):
+    """UpdateCacheMiddleware with data version in cache keys."""
+
+
+class VersionedFetchFromCacheMiddleware(
+    VersionedKeyPrefixMixin,
+    FetchFromCacheMiddleware,
+):
+    """FetchFromCacheMiddleware with data version in cache keys."""
+
+
+class VersionedCacheMiddleware(VersionedKeyPrefixMixin, CacheMiddleware):
+    """CacheMiddleware with data version in cache keys."""
+
+
+def cache_page(timeout):
+    """Cache page like `django.views.decorators.cache.cache_page`, with versioned key.
+
+    :param timeout: TTL of cached page in seconds
+    :type timeout: int
+    """
+    return decorator_from_middleware_with_args(VersionedCacheMiddleware)(
+        page_timeout=timeout,
+    )
@@ -0,0 +1,37 @@
+"""Template context shared by all pages."""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caching
+from .models import DataFile, DataSource
+
+SITE_METADATA_KEY = "site_metadata"
+
+
+def get_site_metadata():
+    """Get data sources and time of the last data update.
+
+    Stored in cache under versioned key, so it is rebuilt only after
+    data update by RcoiUpdater or ExamImporter.
+
+    :return: {"sources": [DataSource], "updated": datetime or ""}
+    :rtype: dict
+    """
+    key = caching.versioned_key(SITE_METADATA_KEY)
+    metadata = cache.get(key)
+    if metadata is None:
+        try:
+            updated = DataFile.objects.latest("modified").modified
+        except DataFile.DoesNotExist:
+            updated = ""
+        metadata = {"sources": list(DataSource.objects.all()), "updated": updated}
+        cache.set(key, metadata, settings.CACHE_MIDDLEWARE_SECONDS)
+    return metadata
+
+
+def site_metadata(request):
+    """Add data sources and last update to context, once per request."""
+    if not hasattr(request, "_site_metadata"):
+        request._site_metadata = get_site_metadata()  # noqa: SLF001
+    return request._site_metadata  # noqa: SLF001
@@ -44,6 +44,10 @@ class SearchVectorFilter(django_filters.CharFilter):
     def filter(self, qs, value):
         """Full text search.
 
+        Search fields should be one precomputed (combined) vector, so search is
+        one `@@` condition on its GIN index, and only matched rows are ranked
+        for top-N sort of the page.
+
         :type qs: object
         :type value: str
         """
@@ -64,12 +68,7 @@ class SearchVectorFilter(django_filters.CharFilter):
         # Output: Q(search_vector=query) | Q(org__search_vector=query)  # noqa: ERA001
         filters = [{field: query} for field in self.search_fields]
         combined_filters = functools.reduce(operator.or_, [Q(**kw) for kw in filters])
-        return (
-            qs.annotate(rank=sum_of_ranks)
-            .filter(rank__gt=0.0)
-            .filter(combined_filters)
-            .order_by("-rank")
-        )
+        return qs.filter(combined_filters).annotate(rank=sum_of_ranks).order_by("-rank")
 
 
 class FilterWithHelper(django_filters.FilterSet):
@@ -116,10 +115,7 @@ class FilterWithHelper(django_filters.FilterSet):
 class EmployeeFilter(FilterWithHelper):
     """Filter for employees."""
 
-    search = SearchVectorFilter(
-        search_fields=["search_vector", "org__search_vector"],
-        label="Поиск",
-    )
+    search = SearchVectorFilter(search_fields=["search_document"], label="Поиск")
 
     class Meta:
         model = models.Employee
@@ -149,18 +145,10 @@ class PlaceFilter(FilterWithHelper):
 class ExamFilter(FilterWithHelper):
     """Filter for exams."""
 
-    search = SearchVectorFilter(
-        search_fields=[
-            "employee__search_vector",
-            "employee__org__search_vector",
-            "position__search_vector",
-            "place__search_vector",
-        ],
-        label="Поиск",
-    )
+    search = SearchVectorFilter(search_fields=["search_vector"], label="Поиск")
 
     class Meta:
-        model = models.Exam
+        model = models.ExamView
         fields = ["search"]
 
 
@@ -197,16 +185,13 @@ class PlaceWithExamsFilter(FilterWithHelper):
     date = django_filters.ModelChoiceFilter(
         queryset=dates_filtered_by_exams_in_place,
         empty_label="Все даты",
+        method="filter_date",
     )
-    search = SearchVectorFilter(
-        search_fields=[
-            "employee__search_vector",
-            "employee__org__search_vector",
-            "position__search_vector",
-        ],
-        label="Поиск",
-    )
+    search = SearchVectorFilter(search_fields=["search_vector"], label="Поиск")
 
     class Meta:
-        model = models.Exam
+        model = models.ExamView
         fields = ["date", "search"]
+
+    def filter_date(self, queryset, name, value):
+        return queryset.filter(date_id=value.pk)
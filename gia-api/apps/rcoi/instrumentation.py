@@ -0,0 +1,61 @@
+"""Metrics and traces of data import.
+
+Prometheus metrics are exported by django_prometheus together with other
+metrics. With PROMETHEUS_MULTIPROC_DIR set, metrics of gunicorn workers,
+import jobs and parser processes are written to files in that directory
+and summed on export. Spans are created by tracer provider configured in
+`config.telemetry` (gunicorn workers and import jobs) if tracing is enabled.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+
+STAGE_SECONDS = Histogram(
+    "rcoi_import_stage_seconds",
+    "Duration of data import stages",
+    ["stage"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float("inf")),
+)
+FILES = Counter(
+    "rcoi_import_files",
+    "Data files found, downloaded, skipped and unparsed by data import",
+    ["result"],
+)
+DOWNLOADED_BYTES = Counter(
+    "rcoi_import_downloaded_bytes",
+    "Size of data files downloaded by data import",
+)
+ROWS = Counter(
+    "rcoi_import_rows",
+    "Rows inserted, updated and deleted by data import",
+    ["table", "action"],
+)
+RUNS = Counter("rcoi_import_runs", "Data import runs", ["status"])
+
+
+def tracing_enabled():
+    """Tracing is configured with the same settings as in gunicorn workers."""
+    return bool(settings.OTEL_TRACING_ENABLED and settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Start span as current span.
+
+    :param name: span name
+    :type name: str
+    :return: span or None if tracing is disabled
+    """
+    if not tracing_enabled():
+        yield None
+        return
+
+    from opentelemetry import trace
+
+    with trace.get_tracer(__name__).start_as_current_span(
+        name,
+        attributes=attributes,
+    ) as current_span:
+        yield current_span
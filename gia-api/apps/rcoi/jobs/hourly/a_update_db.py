@@ -7,6 +7,12 @@ class Job(HourlyJob):
     help = "Parse xlsx from rcoi.mcko.ru and update database."
 
     def execute(self):
+        from apps.rcoi import instrumentation
         from apps.rcoi.models import RcoiUpdater
 
-        RcoiUpdater().run()
+        if instrumentation.tracing_enabled():
+            from config.telemetry import configure_opentelemetry
+
+            configure_opentelemetry()
+        with instrumentation.span("rcoi.update"):
+            RcoiUpdater().run()
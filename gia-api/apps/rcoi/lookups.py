@@ -0,0 +1,17 @@
+from django.db.models.lookups import PatternLookup
+
+
+class TrigramIContains(PatternLookup):
+    """Case-insensitive containment with ILIKE.
+
+    Unlike `icontains`, which compares UPPER(column), ILIKE on the column itself
+    can use GIN index with gin_trgm_ops, so `%value%` patterns are not full scans.
+    """
+
+    lookup_name = "trigram_icontains"
+    param_pattern = "%%%s%%"
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
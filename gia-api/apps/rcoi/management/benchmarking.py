@@ -0,0 +1,276 @@
+"""Synthetic exam workbooks and local HTTP server for benchmarks and tests.
+
+Workbooks look like the files published by RCOI: the target sheet with
+"список" mark in the first row is surrounded by empty and note sheets,
+names of organisations are long and quoted in different ways, row
+counters are sometimes float and footer rows are not data.
+
+StubServer serves exam pages and workbooks locally, so downloads are
+benchmarked and tested without network.
+"""
+
+from __future__ import annotations
+
+import io
+import random
+import threading
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+from openpyxl import Workbook
+
+from apps.rcoi.xlsx_to_csv import http_date, parse_http_date
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+TITLE = (
+    "Список работников образовательных организаций, задействованных в работе "
+    "пунктов проведения экзаменов при проведении \nединого государственного экзамена"
+)
+HEADER = (
+    "№ п/п",
+    "Код ППЭ",
+    "Наименование ППЭ",
+    "Адрес ППЭ",
+    "Должность в ППЭ",
+    "Ф. И. О.",
+    "Место работы",
+)
+HEADER_MSU = (HEADER[0], "Код МСУ", *HEADER[1:])
+ORG_TYPES = (
+    "Государственное бюджетное общеобразовательное учреждение города Москвы",
+    "Государственное автономное общеобразовательное учреждение города Москвы",
+    "Государственное бюджетное профессиональное общеобразовательное учреждение "
+    "города Москвы",
+    "Государствнное бюджетного образовательное уччреждение",
+    "ГБОУ",
+)
+ORG_NAMES = (
+    "Школа № {number}",
+    '"Школа № {number}"',
+    "«Школа №{number} имени Героя Советского Союза И.И. Иванова»",
+    "„Лицей № {number}“",
+    '"Школа № {number} ""На Яузе"""',
+    "'Гимназия  №  {number} '",
+)
+POSITIONS = (
+    "Организатор в аудитории ППЭ",
+    "Организатор вне аудитории ППЭ",
+    "Технический специалист ППЭ",
+    "Руководитель ППЭ",
+    "Член ГЭК",
+    "Медицинский работник",
+)
+SURNAMES = ("ИВАНОВ", "Петров", "сидоров", "Кузнецова", "Смирнова", "Попов")
+INITIALS = "АБВГДЕИКЛМНОПРСТ"
+FLOAT_COUNTERS = 0.01
+"""share of rows with float counter"""
+STREETS = ("ул. Тверская", "просп. Федеративный", "Ленинский пр-т", "ул. Арбат")
+
+
+def org_name(rng: random.Random, number: int) -> str:
+    """Long organisation name quoted in one of the ways found in real files."""
+    return f"{rng.choice(ORG_TYPES)} {rng.choice(ORG_NAMES).format(number=number)}"
+
+
+def employee_name(rng: random.Random) -> str:
+    """Employee name with extra spaces and random case of surname."""
+    surname = rng.choice(SURNAMES)
+    return f"{surname}  {rng.choice(INITIALS)}. {rng.choice(INITIALS)}."
+
+
+def generate_rows(
+    rows: int,
+    *,
+    seed: int = 0,
+    places: int = 300,
+    organisations: int = 2000,
+    msu: bool = False,
+):
+    """Yield rows of the target sheet after the header.
+
+    Some counters are float (merged cells in real files), footer rows have
+    text counters and are skipped by parser.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    place_names = [org_name(rng, i) for i in range(1, places + 1)]
+    org_names = [org_name(rng, i) for i in range(1, organisations + 1)]
+    for i in range(1, rows + 1):
+        place = rng.randrange(places)
+        row = [
+            i if rng.random() > FLOAT_COUNTERS else i + 0.333,
+            1000 + place,
+            place_names[place],
+            f"123{place:03d}, г. Москва, {STREETS[place % len(STREETS)]}, "
+            f"д.  {place + 1}, Центральный район",
+            rng.choice(POSITIONS),
+            employee_name(rng),
+            org_names[rng.randrange(organisations)],
+        ]
+        if msu:
+            row.insert(1, place % 10)
+        yield row
+    yield ["Итого", None, None, None, None, None, f"{rows} чел."]
+
+
+def generate_workbook(rows: int, *, seed: int = 0, msu: bool = False) -> bytes:
+    """Generate exam workbook with `rows` data rows.
+
+    :return: content of xlsx file
+    """
+    header = HEADER_MSU if msu else HEADER
+    wb = Workbook()
+    wb.active.title = "empty"
+    notes = wb.create_sheet("notes")
+    notes.append([None, "some random notes from workbook author"])
+    ws = wb.create_sheet("Лист1")
+    ws.append([TITLE])
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(header))
+    ws.append(header)
+    for row in generate_rows(rows, seed=seed, msu=msu):
+        ws.append(row)
+    wb.create_sheet("notes again").append(["more random notes"])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@dataclass
+class StubFile:
+    """File served by StubServer.
+
+    If truncate_at is set, the first full response is cut off after that many bytes.
+    """
+
+    content: bytes
+    etag: str = ""
+    last_modified: datetime | None = None
+    truncate_at: int | None = None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Conditional and range GET of files, POST of content blocks."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        file = self.server.files.get(self.path)
+        if file is None:
+            self.send_bodyless(HTTPStatus.NOT_FOUND, file)
+            return
+        if self.is_not_modified(file):
+            self.send_bodyless(HTTPStatus.NOT_MODIFIED, file)
+            return
+
+        content = file.content
+        status = HTTPStatus.OK
+        headers = {}
+        offset = self.range_offset(file)
+        if offset is not None:
+            content = content[offset:]
+            status = HTTPStatus.PARTIAL_CONTENT
+            headers["Content-Range"] = (
+                f"bytes {offset}-{len(file.content) - 1}/{len(file.content)}"
+            )
+        elif file.truncate_at is not None:
+            # announce full length, but close connection in the middle of body
+            self.send_file_headers(status, file, len(content), headers)
+            self.wfile.write(content[: file.truncate_at])
+            file.truncate_at = None
+            self.close_connection = True
+            return
+
+        self.send_file_headers(status, file, len(content), headers)
+        self.wfile.write(content)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode()
+        self.server.requests.append((self.path, dict(self.headers)))
+        file = self.server.files.get((self.path, body))
+        if file is None:
+            self.send_bodyless(HTTPStatus.NOT_FOUND, file)
+            return
+        self.send_file_headers(HTTPStatus.OK, file, len(file.content), {})
+        self.wfile.write(file.content)
+
+    def is_not_modified(self, file: StubFile) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return bool(file.etag) and if_none_match == file.etag
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and file.last_modified:
+            return file.last_modified <= parse_http_date(if_modified_since)
+        return False
+
+    def range_offset(self, file: StubFile) -> int | None:
+        value = self.headers.get("Range", "")
+        if not value.startswith("bytes=") or not value.endswith("-"):
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range not in {file.etag, self.last_modified_header(file)}:
+            return None
+        return int(value[len("bytes=") : -1])
+
+    @staticmethod
+    def last_modified_header(file: StubFile) -> str | None:
+        return http_date(file.last_modified) if file.last_modified else None
+
+    def send_file_headers(self, status, file, length, headers):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        if file.etag:
+            self.send_header("ETag", file.etag)
+        if file.last_modified:
+            self.send_header("Last-Modified", self.last_modified_header(file))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_bodyless(self, status, file):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        if file and file.etag:
+            self.send_header("ETag", file.etag)
+        self.end_headers()
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serve files from dict {path: StubFile} in a background thread.
+
+    POST requests are served by (path, body) keys.
+
+    Usage::
+
+        with StubServer({"/file.xlsx": StubFile(b"...")}) as server:
+            requests.get(server.url("/file.xlsx"))
+    """
+
+    daemon_threads = True
+
+    def __init__(self, files: dict[str | tuple[str, str], StubFile]):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.files = files
+        self.requests = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
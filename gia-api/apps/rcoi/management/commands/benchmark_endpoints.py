@@ -0,0 +1,196 @@
+import json
+import math
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.rcoi import caching, models
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile.
+
+    :type values: list
+    :type percent: int
+    """
+    values = sorted(values)
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    """Measure queries, latency and size of responses of public pages and API."""
+
+    help = "Benchmark public endpoints and compare results with baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="number of requests to each endpoint (default: 20)",
+        )
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="keep caches between requests (default: data version is bumped "
+            "before each request, so cached pages are not served)",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            help="JSON file with results to compare with",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            type=Path,
+            help="save results to JSON file",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="allowed relative increase of latency and size (default: 0.5)",
+        )
+        parser.add_argument("--host", default="localhost", help="HTTP Host header")
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST=options["host"])
+        results = {}
+        for name, url in self.get_endpoints().items():
+            results[name] = self.measure(
+                client,
+                url,
+                options["repeat"],
+                options["warm"],
+            )
+            self.stdout.write(self.format_result(name, results[name]))
+
+        if options["save_baseline"]:
+            options["save_baseline"].write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"baseline saved to {options['save_baseline']}")
+        if options["baseline"]:
+            baseline = json.loads(options["baseline"].read_text())
+            regressions = self.compare(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+            self.stdout.write("no regressions")
+
+    def get_endpoints(self):
+        """Urls of endpoints for the largest organisation and sample exam.
+
+        :return: {name: url}
+        :rtype: dict
+        """
+        org = (
+            models.Organisation.objects.annotate(num_employees=Count("employees"))
+            .order_by("-num_employees")
+            .values_list("id", flat=True)
+            .first()
+        )
+        exam = models.Exam.objects.values("id", "employee_id", "place_id").first()
+        if org is None or exam is None:
+            msg = "No data to benchmark, see generate_data command"
+            raise CommandError(msg)
+        employee = models.Employee.objects.get(pk=exam["employee_id"])
+        search = employee.name.split()[0]
+        return {
+            "home": reverse("rcoi:home"),
+            "exam_table": reverse("rcoi:exam"),
+            "exam_table_page": reverse("rcoi:exam") + "?page=100",
+            "exam_table_search": reverse("rcoi:exam") + f"?search={search}",
+            "employee_table": reverse("rcoi:employee"),
+            "employee_table_search": reverse("rcoi:employee") + f"?search={search}",
+            "place_table": reverse("rcoi:place"),
+            "organisation_detail": reverse("rcoi:organisation_detail", args=(org,)),
+            "employee_detail": employee.get_absolute_url(),
+            "place_detail": reverse("rcoi:place_detail", args=(exam["place_id"],)),
+            "exam_detail": reverse("rcoi:exam_detail", args=(exam["id"],)),
+            "sitemap": reverse("rcoi:sitemap"),
+            "sitemap_employee": reverse("rcoi:sitemap_section", args=("employee",)),
+            "api_exam_list": reverse("apiv1:exam-list"),
+            "api_exam_list_cursor": reverse("apiv1:exam-list") + "?cursor=&count=false",
+            "api_examfull_list": reverse("apiv1:full-list"),
+            "api_employee_detail": reverse(
+                "apiv1:employee-detail",
+                args=(employee.pk,),
+            ),
+            "api_organisation_detail": reverse(
+                "apiv1:organisation-detail",
+                args=(org,),
+            ),
+            "api_autocomplete": reverse("apiv1:autocomplete-list") + f"?q={search}",
+        }
+
+    @staticmethod
+    def measure(client, url, repeat, warm):
+        """Request url `repeat` times.
+
+        :return: {"queries": max number, "p50": ms, "p95": ms, "bytes": size}
+        :rtype: dict
+        """
+        latencies = []
+        queries = size = 0
+        for _ in range(repeat):
+            if not warm:
+                caching.bump_data_version()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                content = (
+                    b"".join(response.streaming_content)
+                    if response.streaming
+                    else response.content
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:  # noqa: PLR2004
+                msg = f"{url}: status {response.status_code}"
+                raise CommandError(msg)
+            queries = max(queries, len(captured))
+            size = len(content)
+        return {
+            "queries": queries,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "bytes": size,
+        }
+
+    @staticmethod
+    def format_result(name, result):
+        return (
+            f"{name:<24} {result['queries']:>4} queries, "
+            f"p50 {result['p50']:>8.1f} ms, p95 {result['p95']:>8.1f} ms, "
+            f"{result['bytes']:>9} bytes"
+        )
+
+    @staticmethod
+    def compare(results, baseline, tolerance):
+        """Find regressions of results against baseline.
+
+        Number of queries must not grow, latency (p95) and size may grow
+        by `tolerance` of baseline.
+
+        :return: descriptions of regressions
+        :rtype: list
+        """
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if result["queries"] > base["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, baseline {base['queries']}",
+                )
+            for metric, unit in (("p95", "ms"), ("bytes", "bytes")):
+                if result[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{name}: {metric} {result[metric]} {unit}, "
+                        f"baseline {base[metric]} {unit}",
+                    )
+        return regressions
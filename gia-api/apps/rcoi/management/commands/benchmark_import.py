@@ -0,0 +1,153 @@
+import datetime
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from apps.rcoi import models
+from apps.rcoi.management.benchmarking import StubFile, StubServer, generate_workbook
+
+SOURCES = {"/ege/?period=1": "11", "/oge/?period=1": "9"}
+"""paths of stub exam pages and levels of their files"""
+
+
+def max_rss(who=resource.RUSAGE_SELF):
+    """Peak resident set size in MiB (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(who).ru_maxrss / 2**10
+
+
+class BenchmarkUpdater(models.RcoiUpdater):
+    """RcoiUpdater recording memory of stages.
+
+    `rss` is peak RSS of process after stage, `traced` is peak of Python
+    allocations during stage (if tracemalloc is started).
+    """
+
+    def __init__(self):
+        self.rss = {}
+        self.traced = {}
+        super().__init__()
+
+    @contextmanager
+    def stage(self, name):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        with super().stage(name):
+            yield
+        self.rss[name] = max_rss()
+        if tracemalloc.is_tracing():
+            self.traced[name] = tracemalloc.get_traced_memory()[1] / 2**20
+
+
+class Command(BaseCommand):
+    """Import synthetic workbooks from local stub server and measure stages."""
+
+    help = "Benchmark stages of import from discover to invalidate_caches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--files",
+            type=int,
+            default=20,
+            help="number of workbooks (default: 20)",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=20_000,
+            help="number of rows in each workbook (default: 20000)",
+        )
+        parser.add_argument(
+            "--parse-workers",
+            type=int,
+            default=settings.RCOI_PARSE_WORKERS,
+            help="number of parser processes, 1 to parse in this process "
+            "(default: RCOI_PARSE_WORKERS)",
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="trace peak of Python allocations of each stage with tracemalloc, "
+            "it slows down stages several times",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        files = self.generate_files(options["files"], options["rows"], options["seed"])
+        size = sum(len(file.content) for file in files.values())
+        self.stdout.write(
+            f"{options['files']} workbooks, {size / 2**20:.1f} MiB generated "
+            f"in {time.perf_counter() - start:.1f} s",
+        )
+
+        with (
+            StubServer(files) as server,
+            override_settings(RCOI_PARSE_WORKERS=options["parse_workers"]),
+            transaction.atomic(),
+        ):
+            models.DataSource.objects.all().delete()
+            for path in SOURCES:
+                models.DataSource.objects.create(name=path, url=server.url(path))
+            if options["trace_memory"]:
+                tracemalloc.start()
+            try:
+                updater = BenchmarkUpdater()
+                updater.run()
+            finally:
+                tracemalloc.stop()
+                # benchmark must not change data
+                transaction.set_rollback(True)
+
+        rows = len(updater.data) if updater.data else 0
+        self.stdout.write(f"{rows} rows imported")
+        for stage, seconds in updater.stages.items():
+            line = (
+                f"{stage:<17} {seconds:8.2f} s, "
+                f"{rows / max(seconds, 1e-9):>10.0f} rows/s, "
+                f"max RSS {updater.rss.get(stage, 0):8.1f} MiB"
+            )
+            if stage in updater.traced:
+                line += f", traced peak {updater.traced[stage]:8.1f} MiB"
+            self.stdout.write(line)
+        self.stdout.write(
+            f"max RSS of parser processes {max_rss(resource.RUSAGE_CHILDREN):.1f} MiB",
+        )
+
+    @staticmethod
+    def generate_files(number, rows, seed):
+        """Exam pages, content blocks and workbooks served by stub server.
+
+        :return: {path or (path, body): StubFile}
+        :rtype: dict
+        """
+        files = {}
+        blocks = {path: [] for path in SOURCES}
+        last_modified = datetime.datetime(2020, 5, 1, tzinfo=datetime.UTC)
+        for i in range(number):
+            path = list(SOURCES)[i % len(SOURCES)]
+            ident = (datetime.date(2020, 5, 25) + datetime.timedelta(days=i)).strftime(
+                "%Y%m%d",
+            )
+            file_path = f"/files/{ident}_{SOURCES[path]}_rab.xlsx"
+            blocks[path].append(
+                f'<span data-class="info" data-id="{i}" data-ident="{ident}"></span>',
+            )
+            files[path, f"id={i}&data={ident}&val=1"] = StubFile(
+                f'<p><a href="{file_path}">Работники ППЭ</a></p>'.encode(),
+            )
+            files[file_path] = StubFile(
+                generate_workbook(rows, seed=seed + i, msu=i % 3 == 0),
+                etag=f'"{ident}"',
+                last_modified=last_modified,
+            )
+        for path, spans in blocks.items():
+            files[path] = StubFile(
+                f"<html><body>{''.join(spans)}</body></html>".encode(),
+            )
+        return files
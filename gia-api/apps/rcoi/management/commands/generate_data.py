@@ -0,0 +1,252 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.rcoi import caching, models
+
+LEVELS = ("11", "9")
+POSITIONS = (
+    "Организатор в аудитории",
+    "Организатор вне аудитории",
+    "Технический специалист",
+    "Руководитель ППЭ",
+    "Член ГЭК",
+    "Медицинский работник",
+)
+SURNAMES = (
+    "Иванов",
+    "Смирнов",
+    "Кузнецов",
+    "Попов",
+    "Васильев",
+    "Петров",
+    "Соколов",
+    "Михайлов",
+    "Новиков",
+    "Федоров",
+    "Морозов",
+    "Волков",
+    "Алексеев",
+    "Лебедев",
+    "Семенов",
+    "Егоров",
+    "Павлов",
+    "Козлов",
+    "Степанов",
+    "Николаев",
+)
+FIRST_NAMES = (
+    "Александр",
+    "Алексей",
+    "Андрей",
+    "Дмитрий",
+    "Евгений",
+    "Иван",
+    "Михаил",
+    "Николай",
+    "Сергей",
+    "Юрий",
+)
+PATRONYMICS = (
+    "Александрович",
+    "Андреевич",
+    "Викторович",
+    "Владимирович",
+    "Дмитриевич",
+    "Иванович",
+    "Николаевич",
+    "Петрович",
+    "Сергеевич",
+    "Юрьевич",
+)
+MAX_EMPLOYEES_PER_ORG = len(SURNAMES) * len(FIRST_NAMES) * len(PATRONYMICS)
+STREETS = ("Ленинский пр-т", "ул. Тверская", "ул. Арбат", "Кутузовский пр-т")
+
+
+class Command(BaseCommand):
+    """Fill database with synthetic exams for benchmarks."""
+
+    help = "Generate synthetic organisations, employees, places and exams"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exams", type=int, default=500_000)
+        parser.add_argument("--employees", type=int, default=50_000)
+        parser.add_argument("--organisations", type=int, default=5_000)
+        parser.add_argument("--places", type=int, default=2_000)
+        parser.add_argument("--dates", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["exams"] > options["employees"] * options["dates"]:
+            msg = "Too many exams: at most one exam per employee and date"
+            raise CommandError(msg)
+        if options["employees"] > options["organisations"] * MAX_EMPLOYEES_PER_ORG:
+            msg = (
+                f"Too many employees: at most {MAX_EMPLOYEES_PER_ORG} per organisation"
+            )
+            raise CommandError(msg)
+        if models.Exam.objects.exists():
+            msg = "Database is not empty, use empty database for synthetic data"
+            raise CommandError(msg)
+        self.rng = random.Random(options["seed"])  # noqa: S311
+        self.batch_size = options["batch_size"]
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            dates = self.create_dates(options["dates"])
+            levels = self.create(
+                models.Level,
+                (models.Level(level=level) for level in LEVELS),
+            )
+            positions = self.create(
+                models.Position,
+                (models.Position(name=name) for name in POSITIONS),
+            )
+            datafiles = self.create_datafiles(dates, levels)
+            orgs = self.create(
+                models.Organisation,
+                (
+                    models.Organisation(name=f"ГБОУ Школа № {i + 1}")
+                    for i in range(options["organisations"])
+                ),
+            )
+            places = self.create(
+                models.Place,
+                (
+                    models.Place(
+                        code=f"{i + 1:04d}",
+                        name=f"ГБОУ Школа № {i + 1}, ППЭ",
+                        addr=f"г. Москва, {self.rng.choice(STREETS)}, д. {i + 1}",
+                    )
+                    for i in range(options["places"])
+                ),
+            )
+            employees = self.create(
+                models.Employee,
+                (
+                    models.Employee(
+                        name=self.employee_name(i // len(orgs), i % len(orgs)),
+                        org_id=orgs[i % len(orgs)],
+                    )
+                    for i in range(options["employees"])
+                ),
+            )
+            self.create(
+                models.Exam,
+                self.exams(
+                    options["exams"],
+                    {
+                        "dates": dates,
+                        "levels": levels,
+                        "positions": positions,
+                        "datafiles": datafiles,
+                        "places": places,
+                        "employees": employees,
+                    },
+                ),
+                ids=False,
+            )
+            models.refresh_exam_view()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        caching.invalidate_models(
+            [
+                models.Date,
+                models.Level,
+                models.Position,
+                models.DataFile,
+                models.Organisation,
+                models.Place,
+                models.Employee,
+                models.Exam,
+                models.ExamView,
+            ],
+        )
+        self.stdout.write(
+            f"{options['exams']} exams of {len(employees)} employees generated "
+            f"in {time.perf_counter() - start:.1f} s",
+        )
+
+    def create(self, model, objects, *, ids=True):
+        """Insert objects in batches.
+
+        :return: ids of created objects (if `ids`)
+        :rtype: list
+        """
+        result = []
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                result += self.insert(model, batch, ids=ids)
+                batch = []
+        result += self.insert(model, batch, ids=ids)
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {len(result)}")  # noqa: SLF001
+        return result
+
+    @staticmethod
+    def insert(model, batch, *, ids):
+        created = model.objects.bulk_create(batch)
+        return [obj.pk for obj in created] if ids else [None] * len(created)
+
+    def create_dates(self, number):
+        first = datetime.date(2020, 5, 25)
+        return self.create(
+            models.Date,
+            (
+                models.Date(date=first + datetime.timedelta(days=i))
+                for i in range(number)
+            ),
+        )
+
+    def create_datafiles(self, dates, levels):
+        """Create data file for each date and level.
+
+        :return: {(date_id, level_id): datafile_id}
+        :rtype: dict
+        """
+        keys = [(date, level) for date in dates for level in levels]
+        ids = self.create(
+            models.DataFile,
+            (
+                models.DataFile(
+                    name=f"{date}__{level}__.xlsx",
+                    url=f"https://rcoi.example.com/{date}__{level}__.xlsx",
+                )
+                for date, level in keys
+            ),
+        )
+        return dict(zip(keys, ids, strict=True))
+
+    @staticmethod
+    def employee_name(number, org):
+        """Name of employee, unique by number of employee in organisation."""
+        surname = (number + org) % len(SURNAMES)
+        number, first_name = divmod(number // len(SURNAMES), len(FIRST_NAMES))
+        patronymic = number % len(PATRONYMICS)
+        return (
+            f"{SURNAMES[surname]} {FIRST_NAMES[first_name]} {PATRONYMICS[patronymic]}"
+        )
+
+    def exams(self, number, ids):
+        """Generate exams, each employee has at most one exam per date.
+
+        :param ids: ids of related objects by name of model
+        :type ids: dict
+        """
+        employees, levels = ids["employees"], ids["levels"]
+        for i in range(number):
+            date = ids["dates"][i // len(employees)]
+            level = levels[i % len(levels)]
+            yield models.Exam(
+                date_id=date,
+                level_id=level,
+                place_id=self.rng.choice(ids["places"]),
+                employee_id=employees[i % len(employees)],
+                position_id=self.rng.choice(ids["positions"]),
+                datafile_id=ids["datafiles"][date, level],
+            )
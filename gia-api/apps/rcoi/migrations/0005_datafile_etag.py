@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0004_alter_datafile_options_alter_datasource_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datafile",
+            name="etag",
+            field=models.CharField(
+                blank=True,
+                default="",
+                max_length=255,
+                verbose_name="ETag",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.15 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0005_datafile_etag"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exam",
+            index=models.Index(
+                fields=["date", "id"], name="rcoi_exam_date_id_e45f4e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.15 on 2026-10-18 18:47
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0006_exam_date_id_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE MATERIALIZED VIEW rcoi_exam_view AS
+            SELECT
+                e.id,
+                e.date_id,
+                d.date,
+                e.level_id,
+                l.level,
+                e.place_id,
+                p.code AS place_code,
+                p.name AS place_name,
+                p.addr AS place_addr,
+                e.position_id,
+                pos.name AS position,
+                e.employee_id,
+                emp.name AS employee,
+                emp.org_id,
+                org.name AS org,
+                e.datafile_id,
+                df.url AS datafile_url,
+                coalesce(emp.search_vector, ''::tsvector) ||
+                coalesce(org.search_vector, ''::tsvector) ||
+                coalesce(pos.search_vector, ''::tsvector) ||
+                coalesce(p.search_vector, ''::tsvector) AS search_vector
+            FROM rcoi_exam e
+                JOIN rcoi_date d ON d.id = e.date_id
+                JOIN rcoi_level l ON l.id = e.level_id
+                JOIN rcoi_place p ON p.id = e.place_id
+                JOIN rcoi_position pos ON pos.id = e.position_id
+                JOIN rcoi_employee emp ON emp.id = e.employee_id
+                JOIN rcoi_organisation org ON org.id = emp.org_id
+                JOIN rcoi_datafile df ON df.id = e.datafile_id;
+
+            CREATE UNIQUE INDEX rcoi_exam_view_id ON rcoi_exam_view (id);
+            CREATE INDEX rcoi_exam_view_date_id ON rcoi_exam_view (date DESC, id);
+            CREATE INDEX rcoi_exam_view_place_id ON rcoi_exam_view (place_id);
+            CREATE INDEX rcoi_exam_view_employee_id ON rcoi_exam_view (employee_id);
+            CREATE INDEX rcoi_exam_view_org_id ON rcoi_exam_view (org_id);
+            CREATE INDEX rcoi_exam_view_search_vector
+                ON rcoi_exam_view USING gin (search_vector);
+            """,
+            reverse_sql="DROP MATERIALIZED VIEW rcoi_exam_view;",
+        ),
+        migrations.CreateModel(
+            name="ExamView",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date_id", models.IntegerField()),
+                ("date", models.DateField(verbose_name="Дата экзамена")),
+                ("level_id", models.IntegerField()),
+                (
+                    "level",
+                    models.CharField(max_length=3, verbose_name="Уровень экзамена"),
+                ),
+                ("place_id", models.IntegerField()),
+                ("place_code", models.CharField(max_length=5, verbose_name="Код ППЭ")),
+                (
+                    "place_name",
+                    models.CharField(max_length=500, verbose_name="Наименование ППЭ"),
+                ),
+                (
+                    "place_addr",
+                    models.CharField(max_length=255, verbose_name="Адрес ППЭ"),
+                ),
+                ("position_id", models.IntegerField()),
+                (
+                    "position",
+                    models.CharField(max_length=100, verbose_name="Должность в ППЭ"),
+                ),
+                ("employee_id", models.IntegerField()),
+                ("employee", models.CharField(max_length=150, verbose_name="ФИО")),
+                ("org_id", models.IntegerField()),
+                ("org", models.CharField(max_length=500, verbose_name="Место работы")),
+                ("datafile_id", models.IntegerField()),
+                ("datafile_url", models.URLField(verbose_name="Ссылка на файл")),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        blank=True, null=True
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "rcoi_exam_view",
+                "ordering": ("-date", "id"),
+                "managed": False,
+            },
+        ),
+    ]
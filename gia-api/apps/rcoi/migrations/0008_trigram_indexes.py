@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0007_exam_view"),
+    ]
+
+    operations = [
+        # pg_trgm is in contrib of official postgres images, but may be missing
+        # in minimal builds, where trigram_icontains lookup works without indexes
+        migrations.RunSQL(
+            sql="""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'
+                ) THEN
+                    RAISE WARNING 'pg_trgm is not available, trigram indexes skipped';
+                    RETURN;
+                END IF;
+
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX rcoi_employee_name_trgm
+                    ON rcoi_employee USING gin (name gin_trgm_ops);
+                CREATE INDEX rcoi_organisation_name_trgm
+                    ON rcoi_organisation USING gin (name gin_trgm_ops);
+                CREATE INDEX rcoi_place_name_trgm
+                    ON rcoi_place USING gin (name gin_trgm_ops);
+                CREATE INDEX rcoi_place_addr_trgm
+                    ON rcoi_place USING gin (addr gin_trgm_ops);
+                CREATE INDEX rcoi_position_name_trgm
+                    ON rcoi_position USING gin (name gin_trgm_ops);
+                CREATE INDEX rcoi_exam_view_employee_trgm
+                    ON rcoi_exam_view USING gin (employee gin_trgm_ops);
+                CREATE INDEX rcoi_exam_view_org_trgm
+                    ON rcoi_exam_view USING gin (org gin_trgm_ops);
+                CREATE INDEX rcoi_exam_view_place_name_trgm
+                    ON rcoi_exam_view USING gin (place_name gin_trgm_ops);
+                CREATE INDEX rcoi_exam_view_place_addr_trgm
+                    ON rcoi_exam_view USING gin (place_addr gin_trgm_ops);
+                CREATE INDEX rcoi_exam_view_position_trgm
+                    ON rcoi_exam_view USING gin (position gin_trgm_ops);
+            END
+            $$;
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS rcoi_employee_name_trgm;
+            DROP INDEX IF EXISTS rcoi_organisation_name_trgm;
+            DROP INDEX IF EXISTS rcoi_place_name_trgm;
+            DROP INDEX IF EXISTS rcoi_place_addr_trgm;
+            DROP INDEX IF EXISTS rcoi_position_name_trgm;
+            DROP INDEX IF EXISTS rcoi_exam_view_employee_trgm;
+            DROP INDEX IF EXISTS rcoi_exam_view_org_trgm;
+            DROP INDEX IF EXISTS rcoi_exam_view_place_name_trgm;
+            DROP INDEX IF EXISTS rcoi_exam_view_place_addr_trgm;
+            DROP INDEX IF EXISTS rcoi_exam_view_position_trgm;
+            """,
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.15 on 2026-10-18 18:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0008_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="search_document",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_document"], name="rcoi_employ_search__41f780_gin"
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+            CREATE FUNCTION tsv_employee_document_trigger() RETURNS trigger AS $$
+            begin
+                new.search_document :=
+                    setweight(to_tsvector('pg_catalog.russian', coalesce(new.name, '')), 'A') ||
+                    coalesce(
+                        (SELECT search_vector FROM rcoi_organisation WHERE id = new.org_id),
+                        ''::tsvector
+                    );
+                return new;
+            end
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER search_document_update BEFORE INSERT OR UPDATE
+                ON rcoi_employee FOR EACH ROW EXECUTE FUNCTION tsv_employee_document_trigger();
+
+            CREATE FUNCTION tsv_organisation_employees_trigger() RETURNS trigger AS $$
+            begin
+                UPDATE rcoi_employee SET id = id WHERE org_id = new.id;
+                return null;
+            end
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER search_document_update AFTER UPDATE OF name
+                ON rcoi_organisation FOR EACH ROW
+                WHEN (old.name IS DISTINCT FROM new.name)
+                EXECUTE FUNCTION tsv_organisation_employees_trigger();
+
+            UPDATE rcoi_employee SET id = id;
+            """,
+            reverse_sql="""
+            DROP TRIGGER search_document_update ON rcoi_organisation;
+            DROP FUNCTION tsv_organisation_employees_trigger;
+            DROP TRIGGER search_document_update ON rcoi_employee;
+            DROP FUNCTION tsv_employee_document_trigger;
+            """,
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.15 on 2026-10-18 19:29
+
+import django_extensions.db.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0009_employee_search_document"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, verbose_name="modified"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("success", "Данные обновлены"),
+                            ("unchanged", "Изменений нет"),
+                            ("failed", "Ошибка"),
+                        ],
+                        max_length=10,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "duration",
+                    models.FloatField(default=0, verbose_name="Длительность, с"),
+                ),
+                (
+                    "stages",
+                    models.JSONField(
+                        default=dict, verbose_name="Длительность этапов, с"
+                    ),
+                ),
+                (
+                    "files_found",
+                    models.IntegerField(default=0, verbose_name="Найдено файлов"),
+                ),
+                (
+                    "files_downloaded",
+                    models.IntegerField(default=0, verbose_name="Загружено файлов"),
+                ),
+                (
+                    "files_skipped",
+                    models.IntegerField(default=0, verbose_name="Пропущено файлов"),
+                ),
+                (
+                    "bytes_downloaded",
+                    models.BigIntegerField(default=0, verbose_name="Загружено байт"),
+                ),
+                (
+                    "rows_inserted",
+                    models.IntegerField(default=0, verbose_name="Добавлено строк"),
+                ),
+                (
+                    "rows_updated",
+                    models.IntegerField(default=0, verbose_name="Обновлено строк"),
+                ),
+                (
+                    "rows_deleted",
+                    models.IntegerField(default=0, verbose_name="Удалено строк"),
+                ),
+                (
+                    "rows",
+                    models.JSONField(default=dict, verbose_name="Строки по таблицам"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="Ошибка"),
+                ),
+            ],
+            options={
+                "ordering": ("-created",),
+            },
+        ),
+    ]
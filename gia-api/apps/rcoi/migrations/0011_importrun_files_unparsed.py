@@ -0,0 +1,17 @@
+# Generated by Django 5.2.15 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rcoi", "0010_import_run"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importrun",
+            name="files_unparsed",
+            field=models.IntegerField(default=0, verbose_name="Не разобрано файлов"),
+        ),
+    ]
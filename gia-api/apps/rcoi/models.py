@@ -1,17 +1,21 @@
 import datetime
 import logging
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
-from django.db import connection, models
+from django.db import DatabaseError, connection, models, transaction
 from django.template import defaultfilters
 from django.urls import reverse
 from django_extensions.db.models import TimeStampedModel
 from psycopg import sql
 
-from apps.rcoi import xlsx_to_csv
+from apps.rcoi import caching, instrumentation, xlsx_to_csv
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +42,7 @@ class DataFile(TimeStampedModel):
     url = models.URLField("Ссылка на файл", unique=True)
     size = models.IntegerField("Content-Length", blank=True, null=True)
     last_modified = models.DateTimeField("Last-Modified", blank=True, null=True)
+    etag = models.CharField("ETag", max_length=255, blank=True, default="")
 
     class Meta:
         ordering = ("-last_modified",)
@@ -46,6 +51,36 @@ class DataFile(TimeStampedModel):
         return str(self.name)
 
 
+class ImportRun(TimeStampedModel):
+    """Data import run with durations of stages and numbers of files and rows."""
+
+    class Status(models.TextChoices):
+        SUCCESS = "success", "Данные обновлены"
+        UNCHANGED = "unchanged", "Изменений нет"
+        FAILED = "failed", "Ошибка"
+
+    status = models.CharField("Статус", max_length=10, choices=Status.choices)
+    duration = models.FloatField("Длительность, с", default=0)
+    stages = models.JSONField("Длительность этапов, с", default=dict)
+    files_found = models.IntegerField("Найдено файлов", default=0)
+    files_downloaded = models.IntegerField("Загружено файлов", default=0)
+    files_skipped = models.IntegerField("Пропущено файлов", default=0)
+    files_unparsed = models.IntegerField("Не разобрано файлов", default=0)
+    bytes_downloaded = models.BigIntegerField("Загружено байт", default=0)
+    rows_inserted = models.IntegerField("Добавлено строк", default=0)
+    rows_updated = models.IntegerField("Обновлено строк", default=0)
+    rows_deleted = models.IntegerField("Удалено строк", default=0)
+    rows = models.JSONField("Строки по таблицам", default=dict)
+    error = models.TextField("Ошибка", blank=True, default="")
+
+    class Meta:
+        ordering = ("-created",)
+
+    def __str__(self):
+        created = defaultfilters.date(self.created, "SHORT_DATETIME_FORMAT")
+        return f"{created} {self.get_status_display()}"
+
+
 class Date(TimeStampedModel):
     """Date."""
 
@@ -130,11 +165,16 @@ class Employee(TimeStampedModel):
         on_delete=models.CASCADE,
     )
     search_vector = SearchVectorField(blank=True, null=True)
+    # search_vector of employee and organisation, set by trigger
+    search_document = SearchVectorField(blank=True, null=True)
 
     class Meta:
         unique_together = (("name", "org"),)
         ordering = ("name",)
-        indexes = [GinIndex(fields=["search_vector"])]
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(fields=["search_document"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -190,6 +230,7 @@ class Exam(TimeStampedModel):
             ("date", "level", "place", "employee", "position", "datafile"),
         )
         ordering = ("date", "id")
+        indexes = [models.Index(fields=["date", "id"])]
 
     def __str__(self):
         return str(self.date) + ", " + str(self.place) + ", " + str(self.employee)
@@ -198,6 +239,53 @@ class Exam(TimeStampedModel):
         return reverse("rcoi:exam_detail", args=(self.id,))
 
 
+class ExamView(models.Model):
+    """Exam with display fields of related objects, read-only.
+
+    Backed by materialized view, refreshed by `refresh_exam_view` after import.
+    Search vector combines vectors of employee, organisation, position and place.
+    """
+
+    date_id = models.IntegerField()
+    date = models.DateField("Дата экзамена")
+    level_id = models.IntegerField()
+    level = models.CharField("Уровень экзамена", max_length=3)
+    place_id = models.IntegerField()
+    place_code = models.CharField("Код ППЭ", max_length=5)
+    place_name = models.CharField("Наименование ППЭ", max_length=500)
+    place_addr = models.CharField("Адрес ППЭ", max_length=255)
+    position_id = models.IntegerField()
+    position = models.CharField("Должность в ППЭ", max_length=100)
+    employee_id = models.IntegerField()
+    employee = models.CharField("ФИО", max_length=150)
+    org_id = models.IntegerField()
+    org = models.CharField("Место работы", max_length=500)
+    datafile_id = models.IntegerField()
+    datafile_url = models.URLField("Ссылка на файл")
+    search_vector = SearchVectorField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = "rcoi_exam_view"
+        ordering = ("-date", "id")
+
+    def __str__(self):
+        date = defaultfilters.date(self.date, "SHORT_DATE_FORMAT")
+        return f"{date}, {self.place_name}, {self.employee}"
+
+    def get_absolute_url(self):
+        return reverse("rcoi:exam_detail", args=(self.id,))
+
+
+def refresh_exam_view():
+    """Refresh materialized view of exams without blocking reads."""
+    refresh = sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {view};").format(
+        view=sql.Identifier(ExamView._meta.db_table),  # noqa: SLF001
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(refresh.as_string(cursor))
+
+
 class Subscription(TimeStampedModel):
     """Subscription."""
 
@@ -222,201 +310,398 @@ class Subscription(TimeStampedModel):
 
 
 def send_subscriptions():
-    """Send email with updates in user subscriptions."""
+    """Send email with updates in user subscriptions.
+
+    New exams of all subscriptions are selected with one query and grouped
+    by user email. Messages are sent over one mail connection, then `last_send`
+    of notified subscriptions is updated with one query.
+    """
     from allauth.account.adapter import get_adapter
     from allauth.utils import build_absolute_uri
+    from django.contrib.sites.shortcuts import get_current_site
+    from django.core.mail import get_connection
 
     template_prefix = "mail/new_exams"
     location = "/employees/detail/"
     url = build_absolute_uri(None, location, protocol="https")
 
-    subscriptions = Subscription.objects.all().select_related()
+    now = datetime.datetime.now()  # noqa: DTZ005
+    new_exams = (
+        Exam.objects.filter(
+            employee__subscriptions__last_send__lt=models.F("created"),
+            created__lte=now,
+        )
+        .annotate(
+            subscription_id=models.F("employee__subscriptions__id"),
+            email=models.F("employee__subscriptions__user__email"),
+        )
+        .select_related("date", "place", "position", "employee")
+        .defer(
+            "place__search_vector",
+            "position__search_vector",
+            "employee__search_vector",
+            "employee__search_document",
+        )
+        .order_by("email", "employee__name", "subscription_id", "date", "id")
+    )
     send_queue = {}
-    for sub in subscriptions:
-        new_exams = [
-            exam for exam in sub.employee.exams.all() if exam.created > sub.last_send
-        ]
-        context = {
-            "exams": new_exams,
-            "sub_page": f"{url}{sub.employee.id}",
-            "employee": sub.employee.name,
-        }
-        if new_exams:
-            send_queue.setdefault(sub.user.email, []).append(context)
-            sub.last_send = datetime.datetime.now()  # noqa: DTZ005
-            sub.save()
-    if send_queue:
-        adapter = get_adapter()
-        for email, context in send_queue.items():
-            adapter.send_mail(template_prefix, email, {"context": context})
+    for exam in new_exams.iterator(chunk_size=2000):
+        subs = send_queue.setdefault(exam.email, {})
+        if exam.subscription_id not in subs:
+            subs[exam.subscription_id] = {
+                "exams": [],
+                "sub_page": f"{url}{exam.employee_id}",
+                "employee": exam.employee.name,
+            }
+        subs[exam.subscription_id]["exams"].append(exam)
+    if not send_queue:
+        return
+
+    adapter = get_adapter()
+    current_site = get_current_site(None)
+    messages = [
+        adapter.render_mail(
+            template_prefix,
+            email,
+            {
+                "email": email,
+                "current_site": current_site,
+                "context": list(subs.values()),
+            },
+        )
+        for email, subs in send_queue.items()
+    ]
+    with get_connection() as connection:
+        connection.send_messages(messages)
+    Subscription.objects.filter(
+        id__in=[sub_id for subs in send_queue.values() for sub_id in subs],
+    ).update(last_send=now)
 
 
 class RcoiUpdater:
     """Data processing class.
 
-    :type data: dict
+    Durations of import stages (discover, download, parse, delete_files,
+    upsert, reconcile, update_datafiles, refresh_view, invalidate_caches)
+    are collected in `stages`, numbers of files, bytes and rows in `stats`
+    and rows by tables in `rows`. Files that are not modified or failed
+    to download are skipped, downloaded files that failed to parse are
+    unparsed. Stages are traced and counted in metrics
+    (see `instrumentation`), finished runs are saved as ImportRun.
+
+    :type data: xlsx_to_csv.ExamBatch
     :type updated_files: list
+    :type stages: dict
+    :type stats: dict
+    :type rows: dict
     """
 
     def __init__(self):
+        self._prepare(self.__prepare_data)
+
+    def _prepare(self, prepare_data):
+        """Prepare data for update, save run if there is nothing to update.
+
+        :param prepare_data: function returning data and updated files
+        """
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.stats = dict.fromkeys(
+            (
+                "files_found",
+                "files_downloaded",
+                "files_skipped",
+                "files_unparsed",
+                "bytes_downloaded",
+                "rows_inserted",
+                "rows_updated",
+                "rows_deleted",
+            ),
+            0,
+        )
+        self.rows = {}
         try:
-            self.data, self.updated_files = self.__prepare_data()
-        except Exception:
+            self.data, self.updated_files = prepare_data()
+        except Exception as e:
             logger.exception("Prepare data for update failed!")
+            self._save_run(ImportRun.Status.FAILED, error=e)
             raise
+        self._count_files(
+            skipped=self.stats["files_found"] - self.stats["files_downloaded"],
+            unparsed=self.stats["files_downloaded"] - len(self.updated_files or ()),
+        )
+        if not self.data:
+            self._save_run(ImportRun.Status.UNCHANGED)
 
     def run(self):
         """Run data processing."""
         if self.data:
+            self.__changed_models = set()
             try:
-                self.__update_simple_tables()
-                self.__update_employee()
-                self.__update_place()
-                self.__update_exam()
-                self.__update_datafile()
-                self.__cleanup()
-                return True  # noqa: TRY300
-            except Exception:
+                try:
+                    with self.stage("upsert"):
+                        self.__update_simple_tables()
+                        self.__update_employee()
+                        self.__update_place()
+                    with self.stage("reconcile"):
+                        self.__update_exam()
+                    with self.stage("update_datafiles"):
+                        self.__update_datafile()
+                    with self.stage("refresh_view"):
+                        self.__refresh_exam_view()
+                finally:
+                    with self.stage("invalidate_caches"):
+                        self.__invalidate_caches()
+            except Exception as e:
                 logger.exception("Update failed!")
+                self._save_run(ImportRun.Status.FAILED, error=e)
                 raise
+            self._save_run(ImportRun.Status.SUCCESS)
+            return True
         return None
 
-    @staticmethod
-    def __prepare_data():
-        """Check if new data available and prepare it for processing."""
-        import csv
-        import shutil
-        import tempfile
-        from collections import defaultdict
+    @contextmanager
+    def stage(self, name):
+        """Measure duration of import stage.
 
-        urls = DataSource.objects.all()
-        files_info = [xlsx_to_csv.get_files_info(url.url) for url in urls]
-        files_info_flat = [file for files in files_info for file in files]
+        Stage is traced as span with numbers of files, bytes and rows
+        counted during stage.
 
-        updated_files = []
-        for file in files_info_flat:
-            name = file["name"]
-            minutes_ago = datetime.datetime.now() - datetime.timedelta(minutes=5)  # noqa: DTZ005
+        :param name: stage name
+        :type name: str
+        """
+        stats = self.stats.copy()
+        start = time.perf_counter()
+        with instrumentation.span(f"rcoi.import.{name}") as span:
             try:
-                existing_file = DataFile.objects.get(name=name)
-                if existing_file.last_modified == file["last_modified"]:
-                    logger.debug("%s: dates are the same, SKIP", name)
-                    continue
-                if existing_file.modified >= minutes_ago:
-                    logger.error(
-                        "There are more than 1 file for exam date. Existing file: %s. Other file: %s",
-                        existing_file.__dict__,
-                        file,
+                yield
+            finally:
+                self.stages[name] = time.perf_counter() - start
+                instrumentation.STAGE_SECONDS.labels(name).observe(self.stages[name])
+                logger.debug("stage %s: %.3f s", name, self.stages[name])
+                if span is not None:
+                    span.set_attributes(
+                        {
+                            f"rcoi.{key}": value - stats[key]
+                            for key, value in self.stats.items()
+                            if value != stats[key]
+                        },
                     )
-                    continue
-                logger.debug("%s: dates differ, DOWNLOAD", name)
-                updated_files.append(file)
-            except DataFile.DoesNotExist:
-                logger.debug("%s: file not found, DOWNLOAD", name)
-                DataFile.objects.create(**file)
-                updated_files.append(file)
 
-        if not updated_files:
-            return None, None
+    def _count_files(self, *, found=0, downloaded=0, skipped=0, unparsed=0, size=0):
+        """Count data files and downloaded bytes."""
+        for result, number in (
+            ("found", found),
+            ("downloaded", downloaded),
+            ("skipped", skipped),
+            ("unparsed", unparsed),
+        ):
+            self.stats[f"files_{result}"] += number
+            instrumentation.FILES.labels(result).inc(number)
+        self.stats["bytes_downloaded"] += size
+        instrumentation.DOWNLOADED_BYTES.inc(size)
+
+    def __count_rows(self, table, **counts):
+        """Count rows of table by action (inserted, updated, deleted)."""
+        rows = self.rows.setdefault(table, dict.fromkeys(counts, 0))
+        for action, number in counts.items():
+            rows[action] = rows.get(action, 0) + number
+            self.stats[f"rows_{action}"] += number
+            instrumentation.ROWS.labels(table, action).inc(number)
+
+    def _save_run(self, status, error=""):
+        """Save run to history, errors of saving do not break update.
+
+        :type status: ImportRun.Status
+        :param error: exception of failed run
+        """
+        instrumentation.RUNS.labels(status).inc()
+        try:
+            ImportRun.objects.create(
+                status=status,
+                duration=time.perf_counter() - self.started,
+                stages=self.stages,
+                rows=self.rows,
+                error=repr(error) if error else "",
+                **self.stats,
+            )
+        except DatabaseError:
+            logger.exception("Save import run failed!")
+
+    def __prepare_data(self):
+        """Check if new data available and prepare it for processing."""
+        import shutil
+        import tempfile
+
+        with self.stage("discover"):
+            urls = DataSource.objects.all()
+            files_info = xlsx_to_csv.get_all_files_info(
+                (url.url for url in urls),
+                head=False,
+            )
+            files = xlsx_to_csv.unique_files(
+                file for files in files_info for file in files
+            )
+            self._count_files(found=len(files))
 
         tmp_path = Path(tempfile.mkdtemp())
-        [
-            xlsx_to_csv.download_file(file["url"], file["name"], tmp_path)
-            for file in updated_files
-        ]
-        csv_stream = xlsx_to_csv.save_to_stream(tmp_path)
-
-        data = defaultdict(list)
-        for row in csv.DictReader(csv_stream, delimiter="\t"):
-            for k, v in row.items():
-                data[k].append(v)
-        logger.debug("cleanup downloaded files")
-        shutil.rmtree(tmp_path)
+        try:
+            with self.stage("download"):
+                updated_files = download_updated_files(files, tmp_path)
+                self._count_files(
+                    downloaded=len(updated_files),
+                    size=sum(int(file.get("size") or 0) for file in updated_files),
+                )
+            if not updated_files:
+                return None, None
+            with self.stage("parse"):
+                data, updated_files = read_data(tmp_path, updated_files)
+        finally:
+            with self.stage("delete_files"):
+                logger.debug("delete downloaded files")
+                shutil.rmtree(tmp_path)
         return data, updated_files
 
-    @staticmethod
-    def __cleanup():
-        """Cleanup tables after processing."""
-        from django.core.cache import cache
+    def __invalidate_caches(self):
+        """Invalidate caches of changed models once after all updates."""
+        logger.debug(
+            "updated files: %s",
+            [file["name"] for file in self.updated_files],
+        )
+        caching.invalidate_models(self.__changed_models)
+
+    def __table_changed(self, table):
+        """Mark model of table changed and drop its querysets cached by cacheops.
 
-        cache.clear()
+        Tables are read by lookups of ids right after upserts, cached pages
+        are invalidated once after all updates.
+        """
+        model = apps.get_model("rcoi", table)
+        self.__changed_models.add(model)
+        caching.invalidate_querysets([model])
 
-        logger.debug("cleanup unneeded exam rows from updated files")
-        files = DataFile.objects.all()
-        files_modified = files.filter(
-            modified__gte=datetime.datetime.now() - datetime.timedelta(minutes=5),  # noqa: DTZ005
-        )
-        exams = Exam.objects.all()
-        to_delete = []
-        for file in files_modified:
-            modified = file.modified - datetime.timedelta(minutes=5)
-            filtered = exams.filter(modified__lt=modified, datafile_id=file.id)
-            if filtered.count() > 0:
-                to_delete.append(filtered)
-        for qs in to_delete:
-            count = qs.delete()
-            logger.debug("rows deleted: %s: %s", file, count[0])
-        cache.clear()
-
-    @staticmethod
-    def __sql_insert_or_update(table, columns, data, uniq):
-        """Prepare raw SQL queries, then execute it with cursor.
+    def __sql_insert_or_update(self, table, columns, rows, uniq):
+        """Bulk load rows with COPY into a staging table, then merge it into table.
 
         :param table: table name
         :type table: str
-        :param columns: table columns
+        :param columns: table columns (without timestamps)
         :type columns: tuple
-        :param data: table data
-        :type data: list
+        :param rows: table rows
+        :type rows: collections.abc.Iterable
         :param uniq: unique constraint
         """
-        from django.core.cache import cache
-
-        cache.clear()
-
         table_name = sql.Identifier(f"rcoi_{table}")
         col_names = sql.SQL(", ").join(map(sql.Identifier, columns))
         if isinstance(uniq, list | tuple | set):
             uniq_names = sql.SQL(", ").join(map(sql.Identifier, uniq))
         else:
             uniq_names = sql.Identifier(uniq)
-        placeholder = (
-            sql.SQL("(")
-            + sql.SQL(", ").join(sql.Placeholder() * len(columns))
-            + sql.SQL(")")
-        )
-        rows = sql.SQL(", ").join(placeholder * (len(data) // len(columns)))
-        query = sql.SQL(
-            "INSERT INTO {table_name} ({col_names}) VALUES {rows} "
-            "ON CONFLICT ({uniq_names}) DO UPDATE SET modified=excluded.modified;",
-        ).format(
-            table_name=table_name,
-            col_names=col_names,
-            rows=rows,
-            uniq_names=uniq_names,
+        now = datetime.datetime.now()  # noqa: DTZ005
+        with staging_table(table, columns, rows) as (cursor, staging_name):
+            # xmax of inserted row version is 0, updated row is locked by update
+            merge = sql.SQL(
+                "WITH merged AS ("
+                "INSERT INTO {table_name} ({col_names}, created, modified) "
+                "SELECT {col_names}, %(now)s, %(now)s FROM {staging_name} "
+                "ON CONFLICT ({uniq_names}) DO UPDATE SET modified=excluded.modified "
+                "RETURNING xmax = 0 AS inserted) "
+                "SELECT count(*) FILTER (WHERE inserted), "
+                "count(*) FILTER (WHERE NOT inserted) FROM merged;",
+            ).format(
+                table_name=table_name,
+                col_names=col_names,
+                staging_name=staging_name,
+                uniq_names=uniq_names,
+            )
+            cursor.execute(merge.as_string(cursor), {"now": now})
+            inserted, updated = cursor.fetchone()
+        self.__count_rows(table, inserted=inserted, updated=updated)
+        if inserted or updated:
+            self.__table_changed(table)
+
+    def __sql_reconcile(self, table, columns, rows, key, key_values):
+        """Make rows of table with key in key_values exactly equal to given rows.
+
+        Stored rows missing from given rows are deleted and new rows are inserted
+        with one statement each. Unchanged rows are not touched.
+
+        :param table: table name
+        :type table: str
+        :param columns: table columns (without timestamps), unique together
+        :type columns: tuple
+        :param rows: all rows for key_values
+        :type rows: collections.abc.Iterable
+        :param key: column to select reconciled rows
+        :type key: str
+        :param key_values: values of key column
+        :type key_values: list
+        """
+        table_name = sql.Identifier(f"rcoi_{table}")
+        col_names = sql.SQL(", ").join(map(sql.Identifier, columns))
+        same_row = sql.SQL(" AND ").join(
+            sql.SQL("s.{col} = t.{col}").format(col=sql.Identifier(col))
+            for col in columns
         )
-        with connection.cursor() as cursor:
-            cursor.execute(query.as_string(cursor), data)
+        now = datetime.datetime.now()  # noqa: DTZ005
+        with staging_table(table, columns, rows) as (cursor, staging_name):
+            delete = sql.SQL(
+                "DELETE FROM {table_name} t WHERE t.{key} = ANY(%(key_values)s) "
+                "AND NOT EXISTS (SELECT 1 FROM {staging_name} s WHERE {same_row});",
+            ).format(
+                table_name=table_name,
+                key=sql.Identifier(key),
+                staging_name=staging_name,
+                same_row=same_row,
+            )
+            cursor.execute(delete.as_string(cursor), {"key_values": key_values})
+            deleted = cursor.rowcount
+            insert = sql.SQL(
+                "INSERT INTO {table_name} ({col_names}, created, modified) "
+                "SELECT DISTINCT {col_names}, %(now)s, %(now)s FROM {staging_name} "
+                "ON CONFLICT ({col_names}) DO NOTHING;",
+            ).format(
+                table_name=table_name,
+                col_names=col_names,
+                staging_name=staging_name,
+            )
+            cursor.execute(insert.as_string(cursor), {"now": now})
+            inserted = cursor.rowcount
+        self.__count_rows(table, inserted=inserted, deleted=deleted)
+        if deleted or inserted:
+            self.__table_changed(table)
+        logger.debug("rows deleted: %s, inserted: %s", deleted, inserted)
 
     def __update_datafile(self):
         """Update DataFile table."""
         for file in self.updated_files:
             name = file["name"]
             logger.debug("update or create file: %s", name)
-            DataFile.objects.update_or_create(name=name, defaults=file)
+            _, created = DataFile.objects.update_or_create(name=name, defaults=file)
+            self.__count_rows(
+                "datafile",
+                inserted=int(created),
+                updated=int(not created),
+            )
+        self.__changed_models.add(DataFile)
+
+    def __refresh_exam_view(self):
+        """Refresh read model of exams with updated data."""
+        logger.debug("refresh exam view")
+        refresh_exam_view()
+        self.__changed_models.add(ExamView)
 
     def __update_simple_tables(self):
         """Update simple tables with one data column."""
         for key in ("date", "level", "position", "organisation"):
-            values = sorted(set(self.data[key]))
-            stream = timestamp_list(values)
+            values = [(value,) for value in sorted(set(self.data[key]))]
             table = key
             col = "name"
             if key in {"date", "level"}:
                 col = key
-            columns = (col, "created", "modified")
+            columns = (col,)
             logger.debug("processing model: %s", table)
-            self.__sql_insert_or_update(table, columns, stream, col)
+            self.__sql_insert_or_update(table, columns, values, col)
 
     def __update_employee(self):
         """Update Employee table."""
@@ -426,34 +711,28 @@ class RcoiUpdater:
         values = sorted(
             set(zip(self.data["name"], self.data["organisation"], strict=True)),
         )
-        values_with_id = [[val[0], organisation_db.get(val[1])] for val in values]
-        stream = timestamp_list(values_with_id)
+        values_with_id = [(val[0], organisation_db.get(val[1])) for val in values]
         table = "employee"
-        columns = ("name", "org_id", "created", "modified")
+        columns = ("name", "org_id")
         logger.debug("processing model: %s", table)
-        self.__sql_insert_or_update(table, columns, stream, columns[:2])
+        self.__sql_insert_or_update(table, columns, values_with_id, columns)
 
     def __update_place(self):
         """Update Place table."""
-        ppe_code = self.data["ppe_code"][:]
-        for i, _v in enumerate(ppe_code):
-            ppe_code[i] = int(ppe_code[i])
-
         values = sorted(
             set(
                 zip(
-                    ppe_code,
+                    self.data["ppe_code"],
                     self.data["ppe_name"],
                     self.data["ppe_addr"],
                     strict=True,
                 ),
             ),
         )
-        stream = timestamp_list(values)
         table = "place"
-        columns = ("code", "name", "addr", "created", "modified")
+        columns = ("code", "name", "addr")
         logger.debug("processing model: %s", table)
-        self.__sql_insert_or_update(table, columns, stream, columns[:3])
+        self.__sql_insert_or_update(table, columns, values, columns)
 
     def __update_exam(self):
         """Update Exam table."""
@@ -476,7 +755,7 @@ class RcoiUpdater:
         place_db = {(p.code, p.name, p.addr): p.id for p in place}
         place_id = list(
             zip(
-                self.data["ppe_code"],
+                map(str, self.data["ppe_code"]),
                 self.data["ppe_name"],
                 self.data["ppe_addr"],
                 strict=True,
@@ -496,19 +775,16 @@ class RcoiUpdater:
         datafile_id = self.data["datafile"][:]
         replace_items(datafile_id, datafile_db)
 
-        exams = list(
-            set(
-                zip(
-                    date_id,
-                    level_id,
-                    place_id,
-                    employee_id,
-                    position_id,
-                    datafile_id,
-                    strict=True,
-                ),
-            ),
+        exams = zip(
+            date_id,
+            level_id,
+            place_id,
+            employee_id,
+            position_id,
+            datafile_id,
+            strict=True,
         )
+        updated_files = [file["name"] for file in self.updated_files]
 
         table = "exam"
         columns = (
@@ -518,20 +794,21 @@ class RcoiUpdater:
             "employee_id",
             "position_id",
             "datafile_id",
-            "created",
-            "modified",
         )
         logger.debug("processing model: %s", table)
-
-        for chunk in split_list(exams, 20):
-            stream = timestamp_list(chunk)
-            self.__sql_insert_or_update(table, columns, stream, columns[:6])
+        self.__sql_reconcile(
+            table,
+            columns,
+            exams,
+            "datafile_id",
+            [datafile_db[name] for name in updated_files],
+        )
 
 
 class ExamImporter(RcoiUpdater):
     """Import exam data from single file url.
 
-    :type data: dict
+    :type data: xlsx_to_csv.ExamBatch
     :type updated_files: list
     """
 
@@ -548,55 +825,142 @@ class ExamImporter(RcoiUpdater):
         self.datafile_url = datafile_url
         self.date = date
         self.level = level
-        try:
-            self.data, self.updated_files = self.__prepare_data()
-        except Exception:
-            logger.exception("Prepare data for update failed!")
-            raise
+        self._prepare(self.__prepare_data)
 
     def __prepare_data(self):
         """Check if new data available and prepare it for processing.
 
         :return: data, updated files
         """
-        import csv
         import shutil
         import tempfile
-        from collections import defaultdict
 
-        datafile = xlsx_to_csv.prepare_file_info(
-            self.datafile_url,
-            self.date,
-            self.level,
-        )
-        datafile_updated = False
+        datafile = xlsx_to_csv.file_link_info(self.datafile_url, self.date, self.level)
         name = datafile["name"]
-        try:
-            f = DataFile.objects.get(name=name)
-            if f.last_modified != datafile["last_modified"]:
-                datafile_updated = True
-                logger.debug("%s: dates differ, DOWNLOAD", name)
-            else:
-                logger.debug("%s: dates are the same, SKIP", name)
-        except DataFile.DoesNotExist:
-            logger.debug("%s: file not found, DOWNLOAD", name)
-            DataFile.objects.create(**datafile)
-            datafile_updated = True
-
-        if not datafile_updated:
-            return None, None
+        existing_file = DataFile.objects.filter(name=name).first()
+        if existing_file:
+            datafile["last_modified"] = existing_file.last_modified
+            datafile["etag"] = existing_file.etag
+        self._count_files(found=1)
 
         tmp_path = Path(tempfile.mkdtemp())
-        xlsx_to_csv.download_file(datafile["url"], datafile["name"], tmp_path)
-        csv_stream = xlsx_to_csv.save_to_stream(tmp_path)
+        try:
+            with self.stage("download"):
+                manager = xlsx_to_csv.DownloadManager(tmp_path, workers=1)
+                datafile = manager.fetch(datafile)
+                if datafile:
+                    self._count_files(
+                        downloaded=1,
+                        size=int(datafile.get("size") or 0),
+                    )
+            if not datafile:
+                logger.debug("%s: file not modified, SKIP", name)
+                return None, None
+            if not existing_file:
+                logger.debug("%s: new file", name)
+                DataFile.objects.create(**datafile)
+            with self.stage("parse"):
+                data, updated_files = read_data(tmp_path, [datafile])
+        finally:
+            with self.stage("delete_files"):
+                logger.debug("delete downloaded files")
+                shutil.rmtree(tmp_path)
+        return data, updated_files
+
+
+def download_updated_files(files, path):
+    """Download files that differ from their known versions in DataFile table.
+
+    New files are added to DataFile table.
+
+    :param files: info about remote files (name and url)
+    :type files: list
+    :param path: directory for downloaded files
+    :type path: Path
+    :return: info about downloaded files
+    :rtype: list
+    """
+    known_files = {
+        datafile.name: datafile
+        for datafile in DataFile.objects.filter(name__in=[f["name"] for f in files])
+    }
+    conditional_files = []
+    for file in files:
+        known_file = known_files.get(file["name"])
+        conditional_files.append(
+            {
+                "name": file["name"],
+                "url": file["url"],
+                "last_modified": known_file.last_modified if known_file else None,
+                "etag": known_file.etag if known_file else "",
+            },
+        )
+    manager = xlsx_to_csv.DownloadManager(
+        path,
+        workers=settings.RCOI_DOWNLOAD_WORKERS,
+    )
+    updated_files = manager.fetch_all(conditional_files)
+    for file in updated_files:
+        if file["name"] in known_files:
+            logger.debug("%s: file modified", file["name"])
+        else:
+            logger.debug("%s: new file", file["name"])
+            DataFile.objects.create(**file)
+    return updated_files
+
+
+def read_data(path, files):
+    """Parse downloaded files into columnar batch.
+
+    :param path: directory with downloaded files
+    :type path: Path
+    :param files: info about downloaded files
+    :type files: list
+    :return: parsed data, info about successfully parsed files
+    :rtype: tuple
+    """
+    data = xlsx_to_csv.load_batch(path, workers=settings.RCOI_PARSE_WORKERS)
+    parsed_files = set(data.files)
+    return data, [file for file in files if file["name"] in parsed_files]
+
+
+@contextmanager
+def staging_table(table, columns, rows):
+    """Bulk load rows with COPY into a temporary copy of table.
+
+    Yields cursor and name of staging table inside a transaction,
+    staging table is dropped on exit.
 
-        data = defaultdict(list)
-        for row in csv.DictReader(csv_stream, delimiter="\t"):
-            for k, v in row.items():
-                data[k].append(v)
-        logger.debug("cleanup downloaded files")
-        shutil.rmtree(tmp_path)
-        return data, [datafile]
+    :param table: table name
+    :type table: str
+    :param columns: table columns
+    :type columns: tuple
+    :param rows: table rows
+    :type rows: collections.abc.Iterable
+    """
+    table_name = sql.Identifier(f"rcoi_{table}")
+    staging_name = sql.Identifier(f"staging_rcoi_{table}")
+    col_names = sql.SQL(", ").join(map(sql.Identifier, columns))
+    create = sql.SQL(
+        "CREATE TEMPORARY TABLE {staging_name} AS "
+        "SELECT {col_names} FROM {table_name} WITH NO DATA;",
+    ).format(
+        staging_name=staging_name,
+        col_names=col_names,
+        table_name=table_name,
+    )
+    copy = sql.SQL("COPY {staging_name} ({col_names}) FROM STDIN;").format(
+        staging_name=staging_name,
+        col_names=col_names,
+    )
+    drop = sql.SQL("DROP TABLE {staging_name};").format(staging_name=staging_name)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(create.as_string(cursor))
+        with cursor.copy(copy.as_string(cursor)) as copy_:
+            for row in rows:
+                copy_.write_row(row)
+        yield cursor, staging_name
+        cursor.execute(drop.as_string(cursor))
 
 
 def replace_items(s_list, s_dict):
@@ -617,42 +981,6 @@ def replace_items(s_list, s_dict):
         s_list[i] = s_dict.get(item)
 
 
-def timestamp_list(data):
-    """Convert iterable to list and add two timestamps.
-
-    :param data:
-    :return: list of timestamped lists
-    :rtype: list
-    """
-    datetime_now = datetime.datetime.now()  # noqa: DTZ005
-    created = [datetime_now, datetime_now]
-    data_list = []
-    for row in data:
-        row_ = list(row) if isinstance(row, list | tuple | set) else [row]
-        row_.extend(created)
-        data_list.extend(row_)
-    return data_list
-
-
-def split_list(seq, chunks):
-    """Convert list to list of lists of a given size.
-
-    :param seq: source list
-    :type seq: list
-    :param chunks: size of every list
-    :type chunks: int
-    :return: list of lists
-    :rtype: list
-    """
-    avg = (len(seq) // chunks) + 1
-    out = []
-    last = 0
-    while last < len(seq):
-        out.append(seq[last : last + avg])
-        last += avg
-    return out
-
-
 def cursor_execute(sql):  # pragma: no cover
     """Execute raw SQL query with cursor.
 
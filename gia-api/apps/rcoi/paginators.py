@@ -0,0 +1,83 @@
+"""Pagination of HTML tables without exact COUNT on every page view."""
+
+import hashlib
+import json
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage
+from django_tables2.paginators import LazyPaginator
+
+from . import caching
+
+COUNT_ESTIMATE_THRESHOLD = 10000
+"""min number of rows estimated by planner to skip exact count"""
+
+
+def estimate_count(queryset):
+    """Count rows of queryset, approximately for large results.
+
+    Planner estimate is used if it is above `COUNT_ESTIMATE_THRESHOLD`,
+    otherwise rows are counted exactly. Result is cached under versioned key
+    of query, so it is computed once per filter until the next data update.
+
+    :type queryset: django.db.models.QuerySet
+    :return: number of rows, True if it is estimated
+    :rtype: tuple
+    """
+    queryset = queryset.order_by()
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0, False
+    key = caching.versioned_key("count", hashlib.md5(sql.encode()).hexdigest())  # noqa: S324
+    result = cache.get(key)
+    if result is None:
+        plan = json.loads(queryset.explain(format="json"))
+        count = int(plan[0]["Plan"]["Plan Rows"])
+        result = (count, True)
+        if count < COUNT_ESTIMATE_THRESHOLD:
+            result = (queryset.count(), False)
+        cache.set(key, result, settings.CACHE_MIDDLEWARE_SECONDS)
+    return result
+
+
+class EstimatedCountPaginator(LazyPaginator):
+    """Lazy paginator with known (cached or estimated) total count.
+
+    Next page is detected by fetching `per_page + 1` rows, so there is no
+    COUNT query. Total count is taken from `count` argument and corrected by
+    rows actually fetched: it is exact on the last page, and at least covers
+    the next page on other ones.
+    """
+
+    def __init__(self, object_list, per_page, *, count=None, estimated=False, **kwargs):
+        self._count = count
+        self.count_is_estimated = estimated
+        super().__init__(object_list, per_page, **kwargs)
+
+    def page(self, number):
+        try:
+            page = super().page(number)
+        except EmptyPage:
+            # page is out of range of estimated count
+            self._count = None
+            raise
+        if self.is_last_page(page.number):
+            self._count = (page.number - 1) * self.per_page + len(page.object_list)
+            self.count_is_estimated = False
+        else:
+            self._count = max(self._count or 0, page.number * self.per_page + 1)
+        return page
+
+    @property
+    def count(self):
+        return self._count or 0
+
+    @property
+    def num_pages(self):
+        if self._num_pages is None or self._final_num_pages is not None:
+            return self._num_pages or 1
+        return max(self._num_pages, math.ceil(self.count / self.per_page))
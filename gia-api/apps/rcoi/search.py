@@ -0,0 +1,82 @@
+"""Search-as-you-type over names of employees, organisations and places."""
+
+import re
+from functools import lru_cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+from . import caching, models
+
+AUTOCOMPLETE_LIMIT = 10
+"""default number of suggestions of each kind"""
+
+AUTOCOMPLETE_MAX_LIMIT = 20
+"""max number of suggestions of each kind"""
+
+AUTOCOMPLETE_MIN_LENGTH = 2
+"""min length of query to search"""
+
+AUTOCOMPLETE_CACHE_SIZE = 4096
+"""max number of memoized queries in current process"""
+
+AUTOCOMPLETE_SOURCES = {
+    "employees": (models.Employee.objects.all(), ("id", "name", "org_id")),
+    "organisations": (models.Organisation.objects.all(), ("id", "name")),
+    "places": (models.Place.objects.all(), ("id", "code", "name")),
+}
+
+
+def normalize_query(value):
+    """Lowercase words of query without tsquery operators.
+
+    :type value: str
+    :rtype: str
+    """
+    return " ".join(re.sub(r"[\\()&!|<>:*\']", " ", value).lower().split())
+
+
+def prefix_search_query(value):
+    """Build query matching all words of value, the last one as a prefix.
+
+    :param value: normalized query
+    :type value: str
+    :rtype: SearchQuery
+    """
+    *words, last = value.split()
+    raw = " & ".join([*words, f"{last}:*"])
+    return SearchQuery(raw, search_type="raw", config="russian")
+
+
+def autocomplete(q, limit=AUTOCOMPLETE_LIMIT):
+    """Suggest employees, organisations and places by prefix of their names.
+
+    Uses GIN indexes of search_vector columns. Results of popular prefixes
+    are memoized in process until the next data update.
+
+    :param q: beginning of name
+    :type q: str
+    :param limit: max number of suggestions of each kind
+    :type limit: int
+    :return: {kind: [{field: value}]}
+    :rtype: dict
+    """
+    value = normalize_query(q)
+    if len(value) < AUTOCOMPLETE_MIN_LENGTH:
+        return {kind: [] for kind in AUTOCOMPLETE_SOURCES}
+    return _autocomplete(caching.get_data_version(), value, limit)
+
+
+@lru_cache(maxsize=AUTOCOMPLETE_CACHE_SIZE)
+def _autocomplete(version, value, limit):
+    """Search suggestions, data version is used only as a part of memo key."""
+    query = prefix_search_query(value)
+    return {
+        kind: list(
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "name")
+            .values(*fields)[:limit],
+        )
+        for kind, (queryset, fields) in AUTOCOMPLETE_SOURCES.items()
+    }
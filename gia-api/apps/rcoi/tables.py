@@ -20,7 +20,7 @@ class EmployeeTable(tables.Table):
     class Meta:
         model = models.Employee
         sequence = ("name", "org")
-        exclude = ("id", "created", "modified", "search_vector")
+        exclude = ("id", "created", "modified", "search_vector", "search_document")
 
 
 class OrganisationTable(tables.Table):
@@ -63,7 +63,6 @@ class ExamTable(tables.Table):
         attrs={"td": {"data-title": "Дата", "style": "white-space: nowrap"}},
     )
     level = tables.Column(
-        accessor="level__level",
         verbose_name="Уровень",
         attrs={"td": {"data-title": "Уровень"}},
     )
@@ -71,9 +70,9 @@ class ExamTable(tables.Table):
         template_name="rcoi/cols/exam_place.html",
         verbose_name="Код ППЭ, наименование, адрес",
         attrs={"td": {"data-title": "ППЭ"}},
+        order_by="place_name",
     )
     position = tables.Column(
-        accessor="position__name",
         verbose_name="Должность",
         attrs={"td": {"data-title": "Должность"}},
     )
@@ -86,10 +85,12 @@ class ExamTable(tables.Table):
         template_name="rcoi/cols/exam_org.html",
         verbose_name="Место работы",
         attrs={"td": {"data-title": "Место работы"}},
+        order_by="org",
     )
 
     class Meta:
-        model = models.Exam
+        model = models.ExamView
+        fields = ()
         sequence = (
             "date",
             "level",
@@ -98,7 +99,6 @@ class ExamTable(tables.Table):
             "position",
             "place",
         )
-        exclude = ("id", "created", "modified", "datafile")
 
 
 class PlaceWithExamsTable(tables.Table):
@@ -110,7 +110,6 @@ class PlaceWithExamsTable(tables.Table):
         attrs={"td": {"data-title": "Дата", "style": "white-space: nowrap"}},
     )
     level = tables.Column(
-        accessor="level__level",
         verbose_name="Уровень",
         attrs={"td": {"data-title": "Уровень"}},
     )
@@ -123,15 +122,16 @@ class PlaceWithExamsTable(tables.Table):
         template_name="rcoi/cols/exam_org.html",
         verbose_name="Место работы",
         attrs={"td": {"data-title": "Место работы"}},
+        order_by="org",
     )
     position = tables.Column(
-        accessor="position__name",
         verbose_name="Должность",
         attrs={"td": {"data-title": "Должность"}},
     )
 
     class Meta:
-        model = models.Exam
+        model = models.ExamView
+        fields = ()
         sequence = (
             "date",
             "level",
@@ -139,4 +139,3 @@ class PlaceWithExamsTable(tables.Table):
             "employee__org",
             "position",
         )
-        exclude = ("id", "created", "modified", "datafile", "place")
@@ -1,6 +1,4 @@
-import csv
 import datetime
-from io import StringIO
 from pathlib import Path
 
 import pytest
@@ -98,52 +96,73 @@ def exam_file_diff_date():
 
 
 @pytest.fixture
-def exams_csv(csv_headers, csv_data_row):
+def exam_batch(csv_data_row):
     """
-    csv file
+    parsed exams
     """
-    stream = StringIO()
-    writer = csv.writer(stream, delimiter="\t", quotechar="'")
-    writer.writerow(csv_headers)
-    writer.writerow(csv_data_row)
-    stream.seek(0)
-    return stream
+    return xlsx_to_csv.ExamBatch([csv_data_row], files=[csv_data_row[0]])
 
 
 @pytest.fixture
-def mocker_xlsx_to_csv(mocker, exams_csv):
+def mock_fetch(mocker):
+    """
+    mock of 'DownloadManager.fetch', emulates conditional GET of remote files
+    """
+    remote_files = []
+
+    def fetch(_, file):
+        remote = {f["name"]: f for f in remote_files}
+        remote_file = remote.get(file["name"], remote_files[0])
+        if file.get("last_modified") == remote_file["last_modified"]:
+            return None
+        return {**remote_file, "name": file["name"], "url": file["url"], "etag": ""}
+
+    mocker.patch.object(
+        xlsx_to_csv.DownloadManager,
+        "fetch",
+        autospec=True,
+        side_effect=fetch,
+    )
+
+    def set_remote_files(files):
+        remote_files[:] = files
+
+    return set_remote_files
+
+
+@pytest.fixture
+def mocker_xlsx_to_csv(mocker, exam_batch, mock_fetch):
     """
     mock of 'apps.rcoi.xlsx_to_csv'
     """
     mocker.patch("apps.rcoi.xlsx_to_csv.get_files_info", return_value=DIFF_FILES)
-    mocker.patch("apps.rcoi.xlsx_to_csv.download_file")
-    mocker.patch("apps.rcoi.xlsx_to_csv.save_to_stream", return_value=exams_csv)
+    mock_fetch(DIFF_FILES)
+    mocker.patch("apps.rcoi.xlsx_to_csv.load_batch", return_value=exam_batch)
     yield mocker
     mocker.resetall()
 
 
 @pytest.fixture
-def mocker_xlsx_to_csv_single_file(mocker, exams_csv):
+def mocker_xlsx_to_csv_single_file(mocker, exam_batch, mock_fetch):
     """
     mock of 'apps.rcoi.xlsx_to_csv'
     """
     mocker.patch("apps.rcoi.xlsx_to_csv.get_files_info", return_value=[EXAM_FILE])
-    mocker.patch("apps.rcoi.xlsx_to_csv.download_file")
-    mocker.patch("apps.rcoi.xlsx_to_csv.save_to_stream", return_value=exams_csv)
+    mock_fetch([EXAM_FILE])
+    mocker.patch("apps.rcoi.xlsx_to_csv.load_batch", return_value=exam_batch)
     yield mocker
     mocker.resetall()
 
 
 @pytest.fixture
-def mocker_xlsx_to_csv_simple(mocker, exams_csv):
+def mocker_xlsx_to_csv_simple(mocker, exam_batch, mock_fetch):
     """
     mock of 'apps.rcoi.xlsx_to_csv'
     """
     mocker.patch("apps.rcoi.xlsx_to_csv.get_files_info", return_value=[EXAM_FILE])
-    mocker.patch("apps.rcoi.xlsx_to_csv.prepare_file_info", return_value=EXAM_FILE)
-    mocker.patch("apps.rcoi.xlsx_to_csv.download_file")
+    mock_fetch([EXAM_FILE])
     mocker.patch("apps.rcoi.xlsx_to_csv.save_to_csv")
-    mocker.patch("apps.rcoi.xlsx_to_csv.save_to_stream", return_value=exams_csv)
+    mocker.patch("apps.rcoi.xlsx_to_csv.load_batch", return_value=exam_batch)
     yield mocker
     mocker.resetall()
 
@@ -151,7 +170,10 @@ def mocker_xlsx_to_csv_simple(mocker, exams_csv):
 @pytest.fixture
 def mocker_parse_sheet_data(mocker, csv_data_row):
     mocker.patch("apps.rcoi.xlsx_to_csv.load_sheet_data", return_value=["OK"])
-    mocker.patch("apps.rcoi.xlsx_to_csv.parse_sheet_data", return_value=[csv_data_row])
+    mocker.patch(
+        "apps.rcoi.xlsx_to_csv.parse_sheet_data",
+        return_value=xlsx_to_csv.ExamBatch([csv_data_row]),
+    )
     yield mocker
     mocker.resetall()
 
@@ -205,3 +227,56 @@ def max_age_response(request):
     response with and without header
     """
     return request.param
+
+
+@pytest.fixture
+def cacheops_cache(mocker):
+    """
+    emulation of cacheops: results of querysets of rcoi models are cached by
+    SQL until model is saved or invalidated with 'cacheops.invalidate_model'
+    """
+    from django.apps import apps
+    from django.core.exceptions import EmptyResultSet
+    from django.db.models import QuerySet
+    from django.db.models.signals import post_delete, post_save
+
+    cached = {}
+    fetch_all = QuerySet._fetch_all
+    is_installed = apps.is_installed
+
+    def cached_fetch_all(queryset):
+        if (
+            queryset._result_cache is not None
+            or queryset.model._meta.app_label != "rcoi"
+            or queryset.query.select_for_update
+        ):
+            return fetch_all(queryset)
+        try:
+            key = (queryset.model, queryset._iterable_class, str(queryset.query))
+        except EmptyResultSet:
+            return fetch_all(queryset)
+        if key not in cached:
+            fetch_all(queryset)
+            cached[key] = queryset._result_cache
+        queryset._result_cache = list(cached[key])
+        return None
+
+    def invalidate_model(model, **_):
+        for key in [key for key in cached if key[0] is model]:
+            del cached[key]
+
+    def invalidate_sender(sender, **_):
+        invalidate_model(sender)
+
+    mocker.patch.object(QuerySet, "_fetch_all", cached_fetch_all)
+    mocker.patch.object(
+        apps,
+        "is_installed",
+        side_effect=lambda name: name == "cacheops" or is_installed(name),
+    )
+    mocker.patch("cacheops.invalidate_model", side_effect=invalidate_model)
+    post_save.connect(invalidate_sender, weak=False)
+    post_delete.connect(invalidate_sender, weak=False)
+    yield cached
+    post_save.disconnect(invalidate_sender)
+    post_delete.disconnect(invalidate_sender)
@@ -77,3 +77,24 @@ def test_exam_import_post_fail(
 
     assert resp.status_code == HTTPStatus.OK
     assert bytes(assertion, "utf-8") in resp.content
+
+
+def test_import_run_changelist(admin_client):
+    """
+    Test Import Run Admin View - history of runs with the slowest stage first,
+    runs cannot be added
+    """
+    G(
+        models.ImportRun,
+        status=models.ImportRun.Status.SUCCESS,
+        stages={"download": 1.5, "upsert": 12.5},
+    )
+    resp = admin_client.get(reverse("admin:rcoi_importrun_changelist"))
+
+    assert resp.status_code == HTTPStatus.OK
+    assert "Данные обновлены" in resp.content.decode()
+    assert "upsert 12.5, download 1.5" in resp.content.decode()
+    assert (
+        admin_client.get(reverse("admin:rcoi_importrun_add")).status_code
+        == HTTPStatus.FORBIDDEN
+    )
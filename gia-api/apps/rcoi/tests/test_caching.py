@@ -0,0 +1,91 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.rcoi import caching, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_bump_data_version():
+    """
+    Test - data version is incremented
+    """
+    version = caching.get_data_version()
+    assert caching.get_data_version() == version
+    assert caching.bump_data_version() == version + 1
+    assert caching.get_data_version() == version + 1
+
+
+def test_bump_data_version_if_key_is_lost():
+    """
+    Test - data version is restored if key is evicted from cache
+    """
+    from django.core.cache import cache
+
+    cache.delete(caching.DATA_VERSION_KEY)
+    assert caching.bump_data_version() == caching.get_data_version()
+
+
+def test_invalidate_models(mocker):
+    """
+    Test - cacheops models are invalidated if cacheops is installed
+    """
+    mocker.patch("django.apps.apps.is_installed", return_value=True)
+    invalidate_model = mocker.patch("cacheops.invalidate_model")
+    version = caching.get_data_version()
+
+    caching.invalidate_models([models.Exam, models.Place])
+
+    assert {c.args[0] for c in invalidate_model.call_args_list} == {
+        models.Exam,
+        models.Place,
+    }
+    assert caching.get_data_version() == version + 1
+
+
+def test_cache_page_is_versioned():
+    """
+    Test - cached page is not served after data version is changed
+    """
+    calls = []
+
+    @caching.cache_page(60)
+    def view(request):
+        calls.append(request)
+        return HttpResponse(f"response {len(calls)}")
+
+    factory = RequestFactory()
+    assert view(factory.get("/page/")).content == b"response 1"
+    assert view(factory.get("/page/")).content == b"response 1"
+
+    caching.bump_data_version()
+    assert view(factory.get("/page/")).content == b"response 2"
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("middleware", ["decorator", "two-part"])
+def test_cache_page_rendered_while_data_version_changed(middleware):
+    """
+    Test - page rendered while data version is changed is not cached under
+    new version
+    """
+    calls = []
+
+    def view(request):
+        calls.append(request)
+        if len(calls) == 1:
+            # data is updated while the first page is rendered
+            caching.bump_data_version()
+        return HttpResponse(f"response {len(calls)}")
+
+    if middleware == "decorator":
+        handler = caching.cache_page(60)(view)
+    else:
+        handler = caching.VersionedUpdateCacheMiddleware(
+            caching.VersionedFetchFromCacheMiddleware(view),
+        )
+    factory = RequestFactory()
+    assert handler(factory.get(f"/{middleware}/")).content == b"response 1"
+    assert handler(factory.get(f"/{middleware}/")).content == b"response 2"
+    assert handler(factory.get(f"/{middleware}/")).content == b"response 2"
@@ -0,0 +1,104 @@
+import io
+import json
+
+import pytest
+from ddf import G
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.rcoi import models
+
+pytestmark = pytest.mark.django_db
+
+SMALL_DATA = {
+    "exams": 30,
+    "employees": 12,
+    "organisations": 3,
+    "places": 4,
+    "dates": 3,
+}
+
+
+def test_generate_data_command():
+    """
+    Test - generate_data command creates synthetic exams
+    """
+    call_command("generate_data", stdout=io.StringIO(), **SMALL_DATA)
+
+    assert models.Exam.objects.count() == SMALL_DATA["exams"]
+    assert models.Employee.objects.count() == SMALL_DATA["employees"]
+    assert models.ExamView.objects.count() == SMALL_DATA["exams"]
+    assert models.Employee.objects.filter(search_document__isnull=True).count() == 0
+
+    with pytest.raises(CommandError, match="not empty"):
+        call_command("generate_data", stdout=io.StringIO(), **SMALL_DATA)
+
+
+def test_generate_data_command_too_many_exams():
+    """
+    Test - generate_data command refuses more exams than employees and dates allow
+    """
+    with pytest.raises(CommandError, match="Too many exams"):
+        call_command("generate_data", exams=100, employees=10, dates=2)
+
+
+def test_benchmark_endpoints_command(tmp_path):
+    """
+    Test - benchmark_endpoints command saves baseline and fails on regressions
+    """
+    call_command("generate_data", stdout=io.StringIO(), **SMALL_DATA)
+    baseline = tmp_path / "baseline.json"
+    out = io.StringIO()
+
+    call_command("benchmark_endpoints", repeat=2, save_baseline=baseline, stdout=out)
+
+    results = json.loads(baseline.read_text())
+    assert set(results["organisation_detail"]) == {"queries", "p50", "p95", "bytes"}
+    assert results["api_employee_detail"]["queries"] > 0
+    assert "organisation_detail" in out.getvalue()
+
+    results["organisation_detail"]["queries"] -= 1
+    results["api_exam_list"]["bytes"] //= 10
+    results["home"]["p95"] = 1000
+    baseline.write_text(json.dumps(results))
+    with pytest.raises(CommandError) as error:
+        call_command("benchmark_endpoints", repeat=2, baseline=baseline, stdout=out)
+    assert "organisation_detail:" in str(error.value)
+    assert "api_exam_list: bytes" in str(error.value)
+    assert "home:" not in str(error.value)
+
+
+def test_benchmark_endpoints_command_without_data():
+    """
+    Test - benchmark_endpoints command requires data
+    """
+    with pytest.raises(CommandError, match="No data"):
+        call_command("benchmark_endpoints", repeat=1)
+
+
+@pytest.mark.withoutresponses
+def test_benchmark_import_command():
+    """
+    Test - benchmark_import command imports workbooks from stub server and rolls back
+    """
+    source = G(models.DataSource)
+    out = io.StringIO()
+
+    call_command("benchmark_import", files=3, rows=20, parse_workers=1, stdout=out)
+
+    output = out.getvalue()
+    assert "60 rows imported" in output
+    for stage in (
+        "discover",
+        "download",
+        "parse",
+        "delete_files",
+        "upsert",
+        "reconcile",
+        "update_datafiles",
+        "refresh_view",
+        "invalidate_caches",
+    ):
+        assert f"{stage} " in output
+    assert list(models.DataSource.objects.all()) == [source]
+    assert not models.Exam.objects.exists()
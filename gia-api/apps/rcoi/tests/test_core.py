@@ -3,8 +3,9 @@ from pathlib import Path
 
 import pytest
 from ddf import G
+from prometheus_client import REGISTRY
 
-from apps.rcoi import models
+from apps.rcoi import models, xlsx_to_csv
 
 pytestmark = pytest.mark.django_db
 
@@ -55,6 +56,43 @@ def test_send_subscriptions_when_already_sent(mailoutbox):
     assert len(mailoutbox) == 0
 
 
+def test_send_subscriptions_batched(mailoutbox, django_assert_max_num_queries):
+    """
+    Test - Send Subscriptions - one message per user, sent in one batch
+    """
+    users = G(models.User, n=3)
+    employees = [G(models.Employee, name=f"employee name {i}") for i in range(4)]
+    for emp in employees:
+        G(models.Exam, employee=emp, n=2)
+    for user in users:
+        for emp in employees[:2]:
+            G(models.Subscription, user=user, employee=emp)
+    # user without new exams
+    G(
+        models.Subscription,
+        user=users[0],
+        employee=employees[2],
+        last_send=datetime.datetime(2035, 1, 1),
+    )
+
+    with django_assert_max_num_queries(4):
+        models.send_subscriptions()
+
+    assert len(mailoutbox) == 3
+    assert sorted(m.to[0] for m in mailoutbox) == sorted(u.email for u in users)
+    for message in mailoutbox:
+        assert employees[0].name in message.body
+        assert employees[1].name in message.body
+        assert employees[2].name not in message.body
+    assert not models.Subscription.objects.filter(
+        last_send=datetime.datetime(2017, 5, 1),
+    ).exists()
+
+    # nothing new on the next run
+    models.send_subscriptions()
+    assert len(mailoutbox) == 3
+
+
 def test_send_subscriptions_when_no_subs(mailoutbox):
     """
     Test - Send Subscriptions when no subs
@@ -63,36 +101,28 @@ def test_send_subscriptions_when_no_subs(mailoutbox):
     assert len(mailoutbox) == 0
 
 
-def test_rcoi_updater(mocker_xlsx_to_csv):
+def test_rcoi_updater(mocker_xlsx_to_csv, exam_file):
     """
     Test - DB Updater
     """
     G(models.DataSource)
 
-    # Create an "updated" datafile with "old" exam for cleanup method (must delete exam)
-    updated_datafile = G(models.DataFile)
-    old_exam_in_updated_datafile = G(
-        models.Exam,
-        datafile=updated_datafile,
-        created=datetime.datetime(2019, 1, 1),
-        modified=datetime.datetime(2019, 1, 1),
-    )
-    # Create an "old" datafile with "old" exam for cleanup method (must skip exam)
-    old_exam_in_old_datafile = G(
-        models.Exam,
-        created=datetime.datetime(2019, 1, 1),
-        modified=datetime.datetime(2019, 1, 1),
-        datafile__created=datetime.datetime(2019, 1, 1),
-        datafile__modified=datetime.datetime(2019, 1, 1),
+    # Create an "updated" datafile with "old" exam (must be deleted by reconciliation)
+    updated_datafile = G(
+        models.DataFile,
+        name=exam_file["name"],
+        last_modified=datetime.datetime(2019, 1, 1),
     )
+    old_exam_in_updated_datafile = G(models.Exam, datafile=updated_datafile)
+    # Create a not updated datafile with exam (must be skipped)
+    old_exam_in_old_datafile = G(models.Exam)
 
     models.RcoiUpdater().run()
 
-    # assertions for cleanup method
     assert not models.Exam.objects.filter(pk=old_exam_in_updated_datafile.id).exists()
     assert models.Exam.objects.filter(pk=old_exam_in_old_datafile.id).exists()
 
-    # +2 from G() +1 from run() -1 from cleanup = 2
+    # +2 from G() +1 from run() -1 from reconciliation = 2
     exam_count = models.Exam.objects.count()
     assert exam_count == 2
 
@@ -102,6 +132,49 @@ def test_rcoi_updater(mocker_xlsx_to_csv):
     assert exam_count == 2
 
 
+def test_rcoi_updater_bulk_rows(mocker, mock_fetch, exam_file, csv_data_row):
+    """
+    Test - DB Updater - many rows are loaded at once, only changed rows are
+    replaced on repeated run
+    """
+    rows = [
+        [
+            *csv_data_row[:3],
+            1000 + i % 7,
+            *csv_data_row[4:7],
+            f"employee {i}",
+            csv_data_row[8],
+        ]
+        for i in range(100)
+    ]
+    mocker.patch("apps.rcoi.xlsx_to_csv.get_files_info", return_value=[exam_file])
+    mock_fetch([exam_file])
+    mocker.patch(
+        "apps.rcoi.xlsx_to_csv.load_batch",
+        side_effect=lambda *_, **__: xlsx_to_csv.ExamBatch(
+            rows,
+            files=[exam_file["name"]],
+        ),
+    )
+    G(models.DataSource)
+
+    models.RcoiUpdater().run()
+    created = dict(models.Exam.objects.values_list("id", "created"))
+    assert len(created) == 100
+    assert models.Place.objects.count() == 7
+    assert models.Employee.objects.count() == 100
+
+    # employee of the first row is replaced, other rows are unchanged
+    rows[0][7] = "new employee"
+    models.DataFile.objects.update(last_modified=None)
+    models.RcoiUpdater().run()
+    exams = dict(models.Exam.objects.values_list("id", "created"))
+    assert len(exams) == 100
+    assert len(exams.keys() - created.keys()) == 1
+    assert models.Exam.objects.filter(employee__name="employee 0").count() == 0
+    assert models.Exam.objects.filter(employee__name="new employee").count() == 1
+
+
 def test_rcoi_updater_same_file(mocker_xlsx_to_csv_single_file, exam_file):
     """
     Test - DB Updater - must process update because last_modified field for file is different
@@ -120,6 +193,78 @@ def test_rcoi_updater_same_file(mocker_xlsx_to_csv_single_file, exam_file):
     assert exam_count == 1
 
 
+def test_rcoi_updater_invalidates_caches_once(mocker_xlsx_to_csv, mocker):
+    """
+    Test - DB Updater - caches of changed models are invalidated once after run
+    """
+    clear = mocker.patch("django.core.cache.cache.clear")
+    invalidate = mocker.patch("apps.rcoi.caching.invalidate_models")
+    G(models.DataSource)
+
+    models.RcoiUpdater().run()
+
+    clear.assert_not_called()
+    invalidate.assert_called_once()
+    assert invalidate.call_args.args[0] == {
+        models.Date,
+        models.Level,
+        models.Position,
+        models.Organisation,
+        models.Employee,
+        models.Place,
+        models.Exam,
+        models.DataFile,
+        models.ExamView,
+    }
+
+
+def test_rcoi_updater_with_cached_querysets(mocker_xlsx_to_csv, cacheops_cache):
+    """
+    Test - DB Updater - querysets cached by cacheops before run do not hide
+    rows inserted by run from lookups of ids
+    """
+    G(models.DataSource)
+    for model in (
+        models.Date,
+        models.Level,
+        models.Position,
+        models.Organisation,
+        models.Place,
+        models.DataFile,
+    ):
+        assert list(model.objects.all()) == []
+    assert list(models.Employee.objects.all().select_related()) == []
+    assert cacheops_cache
+
+    models.RcoiUpdater().run()
+
+    exam = models.Exam.objects.select_related().get()
+    assert exam.employee.name == "employee"
+    assert exam.employee.org.name == "org"
+    assert exam.place.code == "1000"
+    assert exam.datafile.name == "2020-06-13__11__.xlsx"
+
+
+def test_rcoi_updater_refreshes_exam_view(mocker_xlsx_to_csv):
+    """
+    Test - DB Updater - materialized view of exams is refreshed after run
+    """
+    G(models.DataSource)
+    assert models.ExamView.objects.count() == 0
+
+    models.RcoiUpdater().run()
+
+    exam = models.Exam.objects.select_related().first()
+    exam_view = models.ExamView.objects.get(id=exam.id)
+    assert models.ExamView.objects.count() == models.Exam.objects.count()
+    assert exam_view.date == exam.date.date
+    assert exam_view.place_name == exam.place.name
+    assert exam_view.employee == exam.employee.name
+    assert exam_view.org == exam.employee.org.name
+    assert exam_view.datafile_url == exam.datafile.url
+    assert exam_view.search_vector
+
+
 def test_rcoi_updater_if_tmp_path_exists(mocker_xlsx_to_csv_simple, mocker):
     """
     Test - DB Updater - tmp_path exists ('if' branch coverage)
@@ -155,27 +300,102 @@ def test_rcoi_updater_if_data_is_bad(mocker):
     mocker.resetall()
 
 
-def test_exam_importer(mocker_xlsx_to_csv_simple, exam_file_diff_date):
+def test_exam_importer(mocker_xlsx_to_csv_simple, mock_fetch, exam_file_diff_date):
     """
     Test - Exam Importer
     """
-    exam_url = "http://123"
-    exam_date = datetime.date(2020, 6, 1)
-    exam_level = "123"
+    exam_url = "http://123.xlsx"
+    exam_date = datetime.date(2020, 6, 13)
+    exam_level = "11"
 
     # no file
     r1 = models.ExamImporter(exam_url, exam_date, exam_level)
-    assert len(r1.data) == 9
+    assert len(r1.data) == 1
+    assert [f["name"] for f in r1.updated_files] == ["2020-06-13__11__.xlsx"]
 
     # same file
     r2 = models.ExamImporter(exam_url, exam_date, exam_level)
     assert r2.data is None
 
     # updated file
-    mocker_xlsx_to_csv_simple.patch(
-        "apps.rcoi.xlsx_to_csv.prepare_file_info",
-        return_value=exam_file_diff_date,
-    )
+    mock_fetch([exam_file_diff_date])
     r3 = models.ExamImporter(exam_url, exam_date, exam_level)
-    # because of mocker, after first read stream stays at the end
-    assert len(r3.data) == 0
+    assert len(r3.data) == 1
+
+
+def test_rcoi_updater_saves_import_run(mocker_xlsx_to_csv):
+    """
+    Test - DB Updater - run with stages, files and rows is saved and counted
+    in metrics
+    """
+    G(models.DataSource)
+    downloaded_bytes = REGISTRY.get_sample_value(
+        "rcoi_import_downloaded_bytes_total",
+    )
+    exams_inserted = (
+        REGISTRY.get_sample_value(
+            "rcoi_import_rows_total",
+            {"table": "exam", "action": "inserted"},
+        )
+        or 0
+    )
+
+    models.RcoiUpdater().run()
+
+    run = models.ImportRun.objects.get()
+    assert run.status == models.ImportRun.Status.SUCCESS
+    assert run.stages.keys() == {
+        "discover",
+        "download",
+        "parse",
+        "delete_files",
+        "upsert",
+        "reconcile",
+        "update_datafiles",
+        "refresh_view",
+        "invalidate_caches",
+    }
+    assert run.duration >= sum(run.stages.values())
+    assert (run.files_found, run.files_downloaded, run.files_skipped) == (2, 2, 0)
+    assert run.files_unparsed == 1
+    assert run.bytes_downloaded == 1024000 + 2048000
+    assert (run.rows_inserted, run.rows_updated, run.rows_deleted) == (7, 1, 0)
+    assert run.rows["exam"] == {"inserted": 1, "deleted": 0}
+    assert run.rows["datafile"] == {"inserted": 0, "updated": 1}
+    assert (
+        REGISTRY.get_sample_value("rcoi_import_downloaded_bytes_total")
+        == downloaded_bytes + run.bytes_downloaded
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "rcoi_import_rows_total",
+            {"table": "exam", "action": "inserted"},
+        )
+        == exams_inserted + 1
+    )
+
+    # files are not modified
+    models.RcoiUpdater().run()
+    run = models.ImportRun.objects.first()
+    assert run.status == models.ImportRun.Status.UNCHANGED
+    assert (run.files_found, run.files_downloaded, run.files_skipped) == (2, 0, 2)
+    assert run.files_unparsed == 0
+    assert run.stages.keys() == {"discover", "download", "delete_files"}
+
+
+def test_rcoi_updater_saves_failed_run(mocker):
+    """
+    Test - DB Updater - run failed while preparing data is saved with error
+    """
+    mocker.patch(
+        "apps.rcoi.xlsx_to_csv.get_all_files_info",
+        side_effect=ValueError("bad page"),
+    )
+
+    with pytest.raises(ValueError, match="bad page"):
+        models.RcoiUpdater()
+
+    run = models.ImportRun.objects.get()
+    assert run.status == models.ImportRun.Status.FAILED
+    assert run.error == "ValueError('bad page')"
+    assert run.stages.keys() == {"discover"}
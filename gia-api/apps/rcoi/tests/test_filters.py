@@ -56,3 +56,40 @@ def test_dates_filtered_by_exams_in_place(client, req, count):
     if req:
         req = client.get(url)
     assert dates_filtered_by_exams_in_place(req).count() == count
+
+
+def test_trigram_icontains_lookup():
+    """
+    Test trigram_icontains lookup - case-insensitive, wildcards are escaped
+    """
+    G(models.Place, name="Школа № 1")
+    G(models.Place, name="100% школа_2")
+
+    qs = models.Place.objects.all()
+    assert qs.filter(name__trigram_icontains="шкОЛА").count() == 2
+    assert qs.filter(name__trigram_icontains="0% ш").count() == 1
+    assert qs.filter(name__trigram_icontains="%").count() == 1
+    assert qs.filter(name__trigram_icontains="а_").count() == 1
+    assert "ILIKE" in str(qs.filter(name__trigram_icontains="школа").query)
+
+
+def test_employee_search_document():
+    """
+    Test employee search document - combined vector of employee and organisation
+    """
+    org = G(models.Organisation, name="Школа первая")
+    G(models.Employee, name="Иванов Иван", org=org)
+    G(models.Employee, name="Петров Пётр")
+
+    qs = models.Employee.objects.all()
+    f = SearchVectorFilter(search_fields=["search_document"])
+
+    assert f.filter(qs, "иванов").count() == 1
+    assert f.filter(qs, "школа").count() == 1
+    assert str(f.filter(qs, "школа").query).count("@@") == 1
+
+    # document is updated after organisation is renamed
+    org.name = "Лицей"
+    org.save()
+    assert f.filter(qs, "школа").count() == 0
+    assert f.filter(qs, "лицей").count() == 1
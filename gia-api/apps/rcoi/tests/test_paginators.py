@@ -0,0 +1,70 @@
+import pytest
+from ddf import G
+from django.core.paginator import EmptyPage
+
+from apps.rcoi import caching, models, paginators
+
+pytestmark = pytest.mark.django_db
+
+
+def test_estimated_count_paginator():
+    """
+    Test - count of paginator is estimated until the last page is fetched
+    """
+    paginator = paginators.EstimatedCountPaginator(
+        list(range(120)),
+        50,
+        count=1000,
+        estimated=True,
+    )
+    page = paginator.page(2)
+    assert list(page.object_list) == list(range(50, 100))
+    assert page.has_next()
+    assert paginator.count == 1000
+    assert paginator.num_pages == 20
+    assert paginator.count_is_estimated
+
+    page = paginator.page(3)
+    assert list(page.object_list) == list(range(100, 120))
+    assert not page.has_next()
+    assert paginator.count == 120
+    assert paginator.num_pages == 3
+    assert not paginator.count_is_estimated
+
+
+def test_estimated_count_paginator_out_of_range():
+    """
+    Test - page out of range of overestimated count falls back to the first page
+    """
+    paginator = paginators.EstimatedCountPaginator(
+        list(range(10)),
+        5,
+        count=1000,
+        estimated=True,
+    )
+    with pytest.raises(EmptyPage):
+        paginator.page(100)
+    assert paginator.page(paginator.num_pages).number == 1
+
+
+def test_estimate_count(mocker, django_assert_num_queries):
+    """
+    Test - count is exact for small results, estimated by planner for large ones, and cached
+    """
+    caching.bump_data_version()
+    G(models.Place, n=3)
+    queryset = models.Place.objects.all()
+
+    with django_assert_num_queries(2):
+        assert paginators.estimate_count(queryset) == (3, False)
+    with django_assert_num_queries(0):
+        assert paginators.estimate_count(queryset) == (3, False)
+
+    mocker.patch.object(paginators, "COUNT_ESTIMATE_THRESHOLD", 0)
+    caching.bump_data_version()
+    with django_assert_num_queries(1):
+        count, estimated = paginators.estimate_count(queryset)
+    assert estimated
+    assert count > 0
+
+    assert paginators.estimate_count(queryset.none()) == (0, False)
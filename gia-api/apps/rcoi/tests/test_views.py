@@ -1,3 +1,4 @@
+import datetime
 from http import HTTPStatus
 
 import pytest
@@ -136,6 +137,7 @@ def test_view_place_detail(client):
     name = "test place"
     place = G(models.Place, name=name)
     G(models.Exam, place=place)
+    models.refresh_exam_view()
     url = reverse(
         "rcoi:place_detail",
         args=[
@@ -302,3 +304,166 @@ def test_view_sitemap_section_page_404(client, page_num):
     )
     resp = client.get(url, {"p": page_num})
     assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_view_exam_list_reads_exam_view(client):
+    """
+    Test View - Exam - table is built from refreshed materialized view
+    """
+    employee = G(models.Employee, name="Иванов Иван")
+    G(models.Exam, employee=employee)
+    G(models.Exam)
+    url = reverse("rcoi:exam")
+
+    resp = client.get(url)
+    assert len(resp.context["table"].paginated_rows) == 0
+
+    models.refresh_exam_view()
+    resp = client.get(url)
+    assert len(resp.context["table"].paginated_rows) == 2
+
+    resp = client.get(url, {"search": "иванов", "sort": "employee__org"})
+    assert len(resp.context["table"].paginated_rows) == 1
+    assert "Иванов Иван" in resp.content.decode()
+
+
+def test_view_place_detail_filter_by_date(client):
+    """
+    Test View - Place - Detail - filter exams by date
+    """
+    place = G(models.Place)
+    date = G(models.Date)
+    G(models.Exam, place=place, date=date)
+    G(models.Exam, place=place)
+    models.refresh_exam_view()
+    url = reverse("rcoi:place_detail", args=[place.pk])
+
+    resp = client.get(url, {"date": date.pk})
+    assert resp.status_code == HTTPStatus.OK
+    assert len(resp.context["table"].paginated_rows) == 1
+
+
+def test_view_site_metadata_cached_until_data_update(client, django_assert_num_queries):
+    """
+    Test View - data sources and last update are cached until data update
+    """
+    from apps.rcoi import caching
+
+    caching.bump_data_version()
+    source = G(models.DataSource, name="rcoi")
+    datafile = G(models.DataFile)
+    url = reverse("rcoi:home")
+    client.get(url)
+
+    # savepoint and its release of ATOMIC_REQUESTS only
+    with django_assert_num_queries(2) as captured:
+        resp = client.get(url)
+    assert not any("rcoi_" in query["sql"] for query in captured.captured_queries)
+    assert resp.context["sources"] == [source]
+    assert resp.context["updated"] == datafile.modified
+
+    other = G(models.DataSource, name="other")
+    assert client.get(url).context["sources"] == [source]
+    caching.bump_data_version()
+    assert set(client.get(url).context["sources"]) == {source, other}
+
+
+def test_view_exam_list_without_count(client, django_assert_max_num_queries):
+    """
+    Test View - Exam list - next page is detected without COUNT query
+    """
+    from apps.rcoi import caching
+
+    caching.bump_data_version()
+    G(models.Exam, n=3)
+    models.refresh_exam_view()
+    url = reverse("rcoi:exam")
+    client.get(url, {"per_page": 2})
+
+    with django_assert_max_num_queries(3) as captured:
+        resp = client.get(url, {"per_page": 2})
+    assert not any("COUNT" in query["sql"] for query in captured.captured_queries)
+    page = resp.context["table"].page
+    assert page.has_next()
+    assert page.paginator.count == 3
+
+    resp = client.get(url, {"per_page": 2, "page": 2})
+    assert not resp.context["table"].page.has_next()
+
+
+def test_view_organisation_detail_table(client, django_assert_num_queries):
+    """
+    Test View - Organisation - Detail - table is built by one query and cached
+    """
+    from apps.rcoi import caching, context_processors
+
+    caching.bump_data_version()
+    org = G(models.Organisation)
+    employee = G(models.Employee, org=org, name="Иванов Иван")
+    idle = G(models.Employee, org=org, name="Петров Петр")
+    dates = [G(models.Date, date=datetime.date(2020, 6, day)) for day in (11, 15)]
+    exams = [G(models.Exam, employee=employee, date=date) for date in dates]
+    url = reverse("rcoi:organisation_detail", args=[org.pk])
+    context_processors.get_site_metadata()
+
+    # savepoint, organisation, employees with exams, release savepoint
+    with django_assert_num_queries(4):
+        resp = client.get(url)
+    assert resp.context["num_employees"] == 2
+    content = resp.content.decode()
+    assert content.index(str(dates[1])) < content.index(str(dates[0]))
+    for exam in exams:
+        assert exam.place.get_absolute_url() in content
+    assert idle.get_absolute_url() in content
+
+    G(models.Employee, org=org)
+    with django_assert_num_queries(3):
+        assert client.get(url).context["num_employees"] == 2
+    caching.bump_data_version()
+    assert client.get(url).context["num_employees"] == 3
+
+
+@pytest.mark.parametrize(
+    ("url_name", "model_name", "num_queries"),
+    [
+        ("employee_detail", "employee", 2),
+        ("exam_detail", "exam", 1),
+        ("date_detail", "date", 1),
+        ("level_detail", "level", 1),
+        ("position_detail", "position", 1),
+    ],
+)
+@pytest.mark.parametrize("num_exams", [1, 10])
+def test_view_detail_query_budget(
+    client,
+    django_assert_num_queries,
+    url_name,
+    model_name,
+    num_queries,
+    num_exams,
+):
+    """
+    Test View - Detail - number of queries does not depend on size of data
+    """
+    from apps.rcoi import context_processors
+
+    employee = G(models.Employee)
+    date, level, position = G(models.Date), G(models.Level), G(models.Position)
+    exams = [
+        G(models.Exam, employee=employee, date=date, level=level, position=position)
+        for _ in range(num_exams)
+    ]
+    obj = {
+        "employee": employee,
+        "exam": exams[0],
+        "date": date,
+        "level": level,
+        "position": position,
+    }[model_name]
+    url = reverse(f"rcoi:{url_name}", args=[obj.pk])
+    context_processors.get_site_metadata()
+
+    # plus savepoint and its release of ATOMIC_REQUESTS
+    with django_assert_num_queries(num_queries + 2):
+        resp = client.get(url)
+    assert resp.status_code == HTTPStatus.OK
@@ -1,11 +1,21 @@
-import csv
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from pathlib import Path
 
 import pytest
 import responses
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
 
 from apps.rcoi import xlsx_to_csv
+from apps.rcoi.management.benchmarking import StubFile, StubServer, generate_workbook
 
 
 def test_prepare_file_info():
@@ -80,44 +90,165 @@ def test_get_files_info(level, filename):
     assert r[0]["url"] == file_url
 
 
-def test_download_file(mocker):
-    """Test Parser - Download File."""
-    url = "http://url"
-    name = "name"
-    path = Path("path")
-    body = b"body"
-    responses.add(responses.GET, url, body=body)
-    opener = mocker.mock_open()
-    mocker.patch.object(Path, "open", opener)
-
-    xlsx_to_csv.download_file(url, name, path)
-
-    opener().write.assert_any_call(body)
-    mocker.resetall()
-
-
-@pytest.mark.skip("need to fix")
-def test_download_file_if_exists(mocker):
-    """Test Parser - Download File if exists."""
-    url = "http://url"
-    name = "name"
-    path = Path("path")
-    mocker.patch.object(Path, "exists", return_value=True)
-
-    with pytest.raises(NotImplementedError):
-        xlsx_to_csv.download_file(url, name, path)
-
-    mocker.resetall()
+def test_get_all_files_info():
+    """Test Parser - Get Files Info from all pages (order of pages is kept)."""
+    url = "https://rcoi.mcko.ru/"
+    last_modified = "Fri, 15 May 2020 16:23:42 GMT"
+    pages = [f"{url}oge/?period={i}" for i in range(1, 4)]
+    for i, page in enumerate(pages, start=1):
+        idents = [f"2020052{i}000000", f"2020062{i}000000"]
+        responses.add(
+            responses.GET,
+            page,
+            body="".join(
+                f'<span data-id="{n}" data-class="info" data-ident="{ident}">'
+                for n, ident in enumerate(idents)
+            ),
+        )
+        for n, ident in enumerate(idents):
+            responses.add(
+                responses.POST,
+                page,
+                body=f'<p><a href="/oge/rab_{i}_{n}.xlsx">file</a></p>',
+                match=[
+                    responses.matchers.urlencoded_params_matcher(
+                        {"id": str(n), "data": ident, "val": "1"}
+                    )
+                ],
+            )
+            responses.add(
+                responses.HEAD,
+                f"{url}oge/rab_{i}_{n}.xlsx",
+                headers={"Content-Length": "1", "Last-Modified": last_modified},
+            )
+
+    r = xlsx_to_csv.get_all_files_info(pages, workers=2)
+
+    assert [[file["name"] for file in files] for files in r] == [
+        [f"2020-05-2{i}__9__.xlsx", f"2020-06-2{i}__9__.xlsx"] for i in range(1, 4)
+    ]
+    assert xlsx_to_csv.get_all_files_info([]) == []
+
+
+def test_host_slot_limits_concurrency(mocker):
+    """Test Parser - number of simultaneous requests to a single host is limited."""
+    mocker.patch.object(xlsx_to_csv, "MAX_CONNECTIONS_PER_HOST", 2)
+    mocker.patch.object(xlsx_to_csv, "_host_slots", {})
+    lock = threading.Lock()
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    def request(host):
+        with xlsx_to_csv.host_slot(f"https://{host}/page"):
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+            time.sleep(0.01)
+            with lock:
+                active[host] -= 1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(request, ["a", "b"] * 8))
+
+    assert peak == {"a": 2, "b": 2}
+
+
+@pytest.fixture
+def stub_files():
+    return {
+        "/a.xlsx": StubFile(
+            b"a" * 100_000,
+            etag='"a1"',
+            last_modified=datetime(2020, 5, 15, 16, 23, 42),
+        ),
+        "/b.xlsx": StubFile(b"b" * 1000, last_modified=datetime(2020, 5, 16)),
+    }
+
+
+@pytest.mark.withoutresponses
+def test_download_manager_fetch_all(stub_files, tmp_path):
+    """Test Parser - Download Manager - concurrent download, then 304 for all files."""
+    with StubServer(stub_files) as server:
+        files = [
+            {"name": "a.xlsx", "url": server.url("/a.xlsx")},
+            {"name": "b.xlsx", "url": server.url("/b.xlsx")},
+            {"name": "missing.xlsx", "url": server.url("/missing.xlsx")},
+        ]
+        manager = xlsx_to_csv.DownloadManager(tmp_path, attempts=1)
+        downloaded = manager.fetch_all(files)
+
+        assert [f["name"] for f in downloaded] == ["a.xlsx", "b.xlsx"]
+        assert downloaded[0]["etag"] == '"a1"'
+        assert downloaded[0]["size"] == 100_000
+        assert downloaded[1]["last_modified"] == datetime(2020, 5, 16)
+        assert tmp_path.joinpath("a.xlsx").read_bytes() == stub_files["/a.xlsx"].content
+        assert tmp_path.joinpath("b.xlsx").read_bytes() == stub_files["/b.xlsx"].content
+
+        server.requests.clear()
+        assert manager.fetch_all(downloaded) == []
+        headers = dict(server.requests)
+        assert headers["/a.xlsx"]["If-None-Match"] == '"a1"'
+        assert (
+            headers["/b.xlsx"]["If-Modified-Since"] == "Sat, 16 May 2020 00:00:00 GMT"
+        )
+
+
+@pytest.mark.withoutresponses
+def test_download_manager_fetch_modified(stub_files, tmp_path):
+    """Test Parser - Download Manager - download file with changed validators."""
+    stub_files["/a.xlsx"].content = b"new"
+    stub_files["/a.xlsx"].etag = '"a2"'
+    with StubServer(stub_files) as server:
+        manager = xlsx_to_csv.DownloadManager(tmp_path)
+        file = manager.fetch(
+            {"name": "a.xlsx", "url": server.url("/a.xlsx"), "etag": '"a1"'},
+        )
+
+    assert file["etag"] == '"a2"'
+    assert tmp_path.joinpath("a.xlsx").read_bytes() == b"new"
+
+
+@pytest.mark.withoutresponses
+@pytest.mark.parametrize("etag", ['"a1"', ""])
+def test_download_manager_resume(stub_files, tmp_path, etag):
+    """Test Parser - Download Manager - resume interrupted transfer with Range request."""
+    stub = stub_files["/a.xlsx"]
+    stub.etag = etag
+    stub.truncate_at = 30_000
+    with StubServer(stub_files) as server:
+        manager = xlsx_to_csv.DownloadManager(tmp_path)
+        file = manager.fetch({"name": "a.xlsx", "url": server.url("/a.xlsx")})
+
+    assert file["size"] == len(stub.content)
+    assert tmp_path.joinpath("a.xlsx").read_bytes() == stub.content
+    assert not tmp_path.joinpath("a.xlsx.part").exists()
+    (_, first), (_, last) = server.requests
+    assert "Range" not in first
+    assert last["Range"].startswith("bytes=")
+    assert last["Range"] != "bytes=0-"
+    assert last["If-Range"] == (etag or "Fri, 15 May 2020 16:23:42 GMT")
 
 
 def test_load_sheet_data(xlsx_file):
     """Test Parser - Load Sheet Data."""
 
-    res = xlsx_to_csv.load_sheet_data(xlsx_file)
+    res = list(xlsx_to_csv.load_sheet_data(xlsx_file))
     # column header
-    assert isinstance(res[0][0].value, str)
+    assert isinstance(res[0][0], str)
     # row counter
-    assert isinstance(res[1][0].value, int)
+    assert isinstance(res[1][0], int)
+
+
+def test_load_sheet_data_is_lazy(xlsx_file, mocker):
+    """Test Parser - Load Sheet Data reads rows only when iterated."""
+    spy = mocker.spy(xlsx_to_csv, "iter_sheet_rows")
+
+    res = xlsx_to_csv.load_sheet_data(xlsx_file)
+
+    assert spy.call_count == 1
+    assert not isinstance(res, list | tuple)
+    assert next(res)
+    res.close()
 
 
 def test_load_sheet_data_if_file_is_bad(xlsx_file_bad):
@@ -130,15 +261,148 @@ def test_load_sheet_data_if_file_is_bad(xlsx_file_bad):
 def test_parse_data(xlsx_data, xlsx_file):
     """Test Parser - Parse sheet data."""
 
-    res = xlsx_to_csv.parse_sheet_data(xlsx_data, xlsx_file.name)
+    batch = xlsx_to_csv.parse_sheet_data(xlsx_data, xlsx_file.name)
+    res = list(batch.rows())
 
-    assert len(res) == 10
+    assert len(batch) == 10
+    assert batch.files == [xlsx_file.name]
+    assert all(isinstance(code, int) for code in batch["ppe_code"])
     assert res[0][0] == xlsx_file.name
     assert res[3][1] == "2020-06-13"
     assert res[5][2] == "11"
     assert "Организатор" in res[8][6]
 
 
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (
+            "Государствнное бюджетного образовательное уччреждение города Москвы "
+            "Школа им. Пушкина",
+            "ГБОУ Школа имени Пушкина",
+        ),
+        (
+            "Государственное бюджетное общеобразовательное учреждение Школа № 1",
+            "ГБОУ Школа № 1",
+        ),
+        (
+            "Государственное автономное общеобразовательное учреждение "
+            "дополнительного профессионального образования города Москвы",
+            "ГАОУ ДПО",
+        ),
+        ("Федеральное казенное учреждение", "ФКУ"),
+        ("ООО Ромашка", "ООО Ромашка"),
+    ],
+)
+def test_format_org_name(value, expected):
+    """Test Parser - format organisation name."""
+    assert xlsx_to_csv.format_org_name(value) == expected
+
+
+def test_format_cell_is_memoized():
+    """Test Parser - format cell values once per column and raw value."""
+    xlsx_to_csv.format_cell.cache_clear()
+    value = "Федеральное  казенное учреждение «Школа»"
+
+    for _ in range(3):
+        assert xlsx_to_csv.format_cell("место работы", value) == "ФКУ Школа"
+    assert xlsx_to_csv.format_cell("адрес ппэ", value) == (
+        "Федеральное казенное учреждение Школа"
+    )
+    assert xlsx_to_csv.format_cell("код ппэ", 1) == "1"
+    assert xlsx_to_csv.format_cell("код ппэ", True) == "True"  # noqa: FBT003
+
+    stats = xlsx_to_csv.format_cell_stats()
+    assert stats == {"hits": 2, "misses": 4, "size": 4, "hit_rate": 0.333}
+
+
+def test_parse_file_counts_format_cell_cache(settings):
+    """Test Parser - hits and misses of format cell memo are counted in metrics."""
+
+    def sample(result):
+        return REGISTRY.get_sample_value(
+            "rcoi_import_format_cell_cache_total",
+            {"result": result},
+        )
+
+    xlsx_to_csv.format_cell.cache_clear()
+    before = sample("hit") or 0, sample("miss") or 0
+    xlsx_dir = Path(settings.APPS_DIR) / "rcoi" / "tests" / "xlsx"
+    file = xlsx_dir / "2020-06-13__11__good.xlsx"
+
+    xlsx_to_csv.parse_file(file)
+    xlsx_to_csv.parse_file(file)
+
+    info = xlsx_to_csv.format_cell.cache_info()
+    assert info.hits > info.misses > 0
+    assert sample("hit") - before[0] == info.hits
+    assert sample("miss") - before[1] == info.misses
+
+
+def test_parse_files_counts_format_cell_cache_of_all_processes(settings, tmp_path):
+    """Test Parser - format cell memo of parser processes is counted in
+    prometheus multiprocess mode.
+    """
+    xlsx_dir = Path(settings.APPS_DIR) / "rcoi" / "tests" / "xlsx"
+    file = xlsx_dir / "2020-06-13__11__good.xlsx"
+    for name in ("2020-06-13__11__.xlsx", "2020-06-14__11__.xlsx"):
+        shutil.copy(file, tmp_path / name)
+    xlsx_to_csv.format_cell.cache_clear()
+    xlsx_to_csv.parse_file(file)
+    info = xlsx_to_csv.format_cell.cache_info()
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+
+    subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            "import sys; from pathlib import Path; "
+            "from apps.rcoi.xlsx_to_csv import parse_files; "
+            "list(parse_files(Path(sys.argv[1]).glob('*.xlsx'), workers=2))",
+            str(tmp_path),
+        ],
+        cwd=str(settings.ROOT_DIR),
+        env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(metrics_dir)},
+        check=True,
+    )
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=metrics_dir)
+    lookups = sum(
+        registry.get_sample_value(
+            "rcoi_import_format_cell_cache_total",
+            {"result": result},
+        )
+        for result in ("hit", "miss")
+    )
+    # lookups of both files are counted, whichever process parsed them
+    assert lookups == 2 * (info.hits + info.misses)
+
+
+def test_parse_files(settings, tmp_path):
+    """Test Parser - parse files in process pool, skip broken file."""
+    xlsx_dir = Path(settings.APPS_DIR) / "rcoi" / "tests" / "xlsx"
+    names = ["2020-06-15__9__.xlsx", "2020-06-13__11__.xlsx", "2020-06-14__11__.xlsx"]
+    shutil.copy(xlsx_dir / "2020-06-13__11__good.xlsx", tmp_path / names[0])
+    shutil.copy(
+        xlsx_dir / "2020-06-13__11__bad_missing_column.xlsx", tmp_path / names[1]
+    )
+    shutil.copy(xlsx_dir / "2020-06-13__11__good_msu.xlsx", tmp_path / names[2])
+
+    res = list(xlsx_to_csv.parse_files(tmp_path.glob("*.xlsx"), workers=2))
+
+    assert [path.name for path, _ in res] == sorted(names)[1:]
+    assert all(len(rows) == 10 for _, rows in res)
+    assert next(res[0][1].rows())[:3] == (names[2], "2020-06-14", "11")
+
+
+def test_parse_files_if_file_is_bad(xlsx_file_bad):
+    """Test Parser - parse files in process, skip broken file."""
+    res = list(xlsx_to_csv.parse_files([xlsx_file_bad]))
+    assert res == []
+
+
 def test_save_to_csv(mocker_parse_sheet_data, csv_headers, csv_data_row, mocker):
     """Test Parser - save to csv."""
     path = Path("/test/data.csv")
@@ -154,18 +418,103 @@ def test_save_to_csv(mocker_parse_sheet_data, csv_headers, csv_data_row, mocker)
     mocker.resetall()
 
 
-def test_save_to_stream(mocker_parse_sheet_data, csv_headers, csv_data_row, mocker):
-    """Test Parser - save to StringIO."""
-    path = Path("/test")
-    mocker.patch("pathlib.Path.glob", return_value=[Path("file.xlsx")])
-    res = xlsx_to_csv.save_to_stream(path)
-    reader = csv.DictReader(res, delimiter="\t")
+def test_load_batch(settings, tmp_path):
+    """Test Parser - merge parsed files into single batch, skip broken file."""
+    xlsx_dir = Path(settings.APPS_DIR) / "rcoi" / "tests" / "xlsx"
+    shutil.copy(
+        xlsx_dir / "2020-06-13__11__good.xlsx", tmp_path / "2020-06-13__11__.xlsx"
+    )
+    shutil.copy(
+        xlsx_dir / "2020-06-13__11__bad_missing_column.xlsx",
+        tmp_path / "2020-06-14__11__.xlsx",
+    )
+    shutil.copy(
+        xlsx_dir / "2020-06-13__11__good_msu.xlsx", tmp_path / "2020-06-15__9__.xlsx"
+    )
 
-    for row in reader:
-        for i in range(9):
-            assert row[csv_headers[i]] == csv_data_row[i]
+    batch = xlsx_to_csv.load_batch(tmp_path, workers=1)
 
-    mocker.resetall()
+    assert batch.files == ["2020-06-13__11__.xlsx", "2020-06-15__9__.xlsx"]
+    assert len(batch) == 20
+    assert set(batch["level"]) == {"11", "9"}
+    # repeated values are stored once
+    assert len({id(value) for value in batch["organisation"]}) == len(
+        set(batch["organisation"]),
+    )
+
+
+@pytest.mark.parametrize("msu", [False, True])
+def test_parse_generated_workbook(tmp_path, msu):
+    """Test Parser - synthetic workbook is parsed like a real one."""
+    path = tmp_path / "2020-06-13__11__.xlsx"
+    path.write_bytes(generate_workbook(50, msu=msu))
+
+    batch = xlsx_to_csv.parse_file(path)
+
+    assert len(batch) == 50
+    assert all(batch["name"])
+    # long names are abbreviated, quotes are removed
+    assert {name.split()[0] for name in batch["organisation"]} <= {
+        "ГБОУ",
+        "ГАОУ",
+        "ГБПОУ",
+    }
+    assert not any('"' in name or "«" in name for name in batch["organisation"])
+
+
+@pytest.mark.parametrize(
+    "dimension",
+    ['<dimension ref="A1:C3"/>', '<dimension ref="A1"/>', ""],
+)
+def test_parse_file_with_wrong_dimension(settings, tmp_path, dimension):
+    """Test Parser - stale or missing sheet dimension does not truncate data."""
+    source = (
+        Path(settings.APPS_DIR)
+        / "rcoi"
+        / "tests"
+        / "xlsx"
+        / "2020-06-13__11__good.xlsx"
+    )
+    path = tmp_path / "2020-06-13__11__.xlsx"
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, "w") as dst:
+        for item in src.infolist():
+            content = src.read(item)
+            if item.filename == "xl/worksheets/sheet3.xml":
+                content = re.sub(rb"<dimension [^>]*/>", dimension.encode(), content)
+            dst.writestr(item, content)
+
+    batch = xlsx_to_csv.parse_file(path)
+    expected = xlsx_to_csv.parse_sheet_data(
+        xlsx_to_csv.load_sheet_data(source),
+        path.name,
+    )
+
+    assert len(batch) == 10
+    assert list(batch.rows()) == list(expected.rows())
+
+
+def test_parse_file_without_data_rows(tmp_path):
+    """Test Parser - sheet without data rows is invalid, exams are not reconciled."""
+    path = tmp_path / "2020-06-13__11__.xlsx"
+    path.write_bytes(generate_workbook(0))
+
+    with pytest.raises(xlsx_to_csv.InvalidFileError, match="no data rows"):
+        xlsx_to_csv.parse_file(path)
+    assert list(xlsx_to_csv.parse_files([path])) == []
+
+
+def test_exam_batch(csv_headers, csv_data_row):
+    """Test Parser - columnar batch of rows."""
+    batch = xlsx_to_csv.ExamBatch([csv_data_row, [*csv_data_row[:8], None]])
+    other = xlsx_to_csv.ExamBatch([csv_data_row], files=["file.xlsx"])
+    batch.extend(other)
+
+    assert len(batch) == 3
+    assert batch.files == ["file.xlsx"]
+    assert list(batch["ppe_code"]) == [1000, 1000, 1000]
+    assert batch["organisation"] == ["org", "", "org"]
+    assert next(batch.rows()) == (*csv_data_row[:3], 1000, *csv_data_row[4:])
+    assert list(batch.columns) == csv_headers
 
 
 def test_main(mocker_xlsx_to_csv_simple, mocker_path):
@@ -1,8 +1,8 @@
 from django.urls import path
-from django.views.decorators.cache import cache_page
 from django.views.generic import TemplateView
 
 from . import views
+from .caching import cache_page
 from .sitemap import index, sitemap, sitemaps_context
 
 urlpatterns = [
@@ -1,17 +1,20 @@
 import contextlib
 import sys
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.sites.requests import RequestSite
-from django.db.models import Count
+from django.core.cache import cache
 from django.http import Http404
 from django.shortcuts import redirect
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.datastructures import MultiValueDictKeyError
 from django.views.generic import DetailView, ListView, TemplateView
 from django_tables2 import RequestConfig
 
+from . import caching
 from .filters import (
     EmployeeFilter,
     ExamFilter,
@@ -20,17 +23,17 @@ from .filters import (
     PlaceWithExamsFilter,
 )
 from .models import (
-    DataFile,
-    DataSource,
     Date,
     Employee,
     Exam,
+    ExamView,
     Level,
     Organisation,
     Place,
     Position,
     RcoiUpdater,
 )
+from .paginators import EstimatedCountPaginator, estimate_count
 from .tables import (
     EmployeeTable,
     ExamTable,
@@ -40,26 +43,27 @@ from .tables import (
 )
 
 
-class TemplateViewWithContext(TemplateView):
-    """Base template view that provides additional context data for templates."""
+class LinkRelMixin:
+    """Add absolute url of page to context for link relations.
 
-    model = None
-    template_name = None
+    Data sources and last update are added by `site_metadata` context processor.
+    """
 
     def get_context_data(self, **kwargs):
-        """Get the context data for the template, including data sources, last update, and link relation."""
         context = super().get_context_data(**kwargs)
-        context["sources"] = DataSource.objects.all()
-        try:
-            context["updated"] = DataFile.objects.latest("modified").modified
-        except DataFile.DoesNotExist:
-            context["updated"] = ""
         context["link_rel"] = (
             f"{self.request.scheme}://{RequestSite(self.request).domain}{self.request.path}"
         )
         return context
 
 
+class TemplateViewWithContext(LinkRelMixin, TemplateView):
+    """Base template view that provides additional context data for templates."""
+
+    model = None
+    template_name = None
+
+
 class HomeView(TemplateViewWithContext):
     """Home page view."""
 
@@ -85,9 +89,16 @@ class FilteredSingleTableView(TemplateViewWithContext):
         )
         filter_.form.helper = self.filter_class().helper
         table = self.table_class(filter_.qs)
-        RequestConfig(self.request, paginate={"per_page": self.paginate_by}).configure(
-            table,
-        )
+        count, estimated = estimate_count(filter_.qs)
+        RequestConfig(
+            self.request,
+            paginate={
+                "paginator_class": EstimatedCountPaginator,
+                "per_page": self.paginate_by,
+                "count": count,
+                "estimated": estimated,
+            },
+        ).configure(table)
         context["filter"] = filter_
         context["table"] = table
         with contextlib.suppress(MultiValueDictKeyError):
@@ -126,60 +137,104 @@ class PlaceTableView(FilteredSingleTableView):
 class ExamTableView(FilteredSingleTableView):
     """Table view for exams."""
 
-    model = Exam
+    model = ExamView
     table_class = ExamTable
     filter_class = ExamFilter
     template_name = "rcoi/exam.html"
 
 
-class DetailViewWithContext(DetailView):
+class DetailViewWithContext(LinkRelMixin, DetailView):
     """Base detail view that provides additional context data for templates."""
 
     model = None
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["sources"] = DataSource.objects.all()
-        try:
-            context["updated"] = DataFile.objects.latest("modified").modified
-        except DataFile.DoesNotExist:
-            context["updated"] = ""
-        context["link_rel"] = (
-            f"{self.request.scheme}://{RequestSite(self.request).domain}{self.request.path}"
-        )
-        return context
-
 
 class OrganisationDetailView(DetailViewWithContext):
-    """Detail view for organisation."""
+    """Detail view for organisation.
+
+    Table of employees by exam dates is built from one joined query,
+    rendered fragment is cached until the next data update.
+    """
 
     model = Organisation
+    table_template_name = "rcoi/organisation_detail_table.html"
+    columns = (
+        "id",
+        "name",
+        "exams__id",
+        "exams__date_id",
+        "exams__date__date",
+        "exams__level__level",
+        "exams__place_id",
+        "exams__place__code",
+        "exams__place__name",
+        "exams__position__name",
+    )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["employees"] = (
-            self.object.employees.annotate(num_exams=Count("exams"))
-            .prefetch_related(
-                "exams__date",
-                "exams__level",
-                "exams__place",
-                "exams__position",
-            )
-            .order_by("name")
-        )
-        context["dates"] = (
-            Date.objects.filter(
-                id__in=[
-                    exam.date_id
-                    for employee in context["employees"]
-                    for exam in employee.exams.all()
-                ],
-            )
-            .distinct()
-            .order_by("-date")
-        )
+        key = caching.versioned_key("organisation_detail", self.object.pk)
+        fragment = cache.get(key)
+        if fragment is None:
+            employees, dates = self.get_employees()
+            fragment = {
+                "num_employees": len(employees),
+                "table": render_to_string(
+                    self.table_template_name,
+                    {"employees": employees, "dates": dates},
+                ),
+            }
+            cache.set(key, fragment, settings.CACHE_MIDDLEWARE_SECONDS)
+        context.update(fragment)
         return context
 
+    def get_employees(self):
+        """Get employees with exams grouped by dates.
+
+        :return: employees with cells of exams for every date, dates of exams
+        :rtype: tuple
+        """
+        rows = self.object.employees.order_by(
+            "name",
+            "id",
+            "exams__date__date",
+            "exams__id",
+        ).values_list(*self.columns)
+        employees = {}
+        dates = {}
+        for row in rows:
+            employee_id, name, exam_id, date_id, date, level, *place_and_position = row
+            employee = employees.get(employee_id)
+            if employee is None:
+                employee = employees[employee_id] = {
+                    "id": employee_id,
+                    "name": name,
+                    "num_exams": 0,
+                    "exams": {},
+                }
+            if exam_id is None:
+                continue
+            place_id, place_code, place_name, position = place_and_position
+            dates.setdefault(date_id, Date(id=date_id, date=date))
+            employee["num_exams"] += 1
+            employee["exams"].setdefault(date_id, []).append(
+                {
+                    "date_id": date_id,
+                    "level": level,
+                    "place_id": place_id,
+                    "place_code": place_code,
+                    "place_name": place_name,
+                    "position": position,
+                },
+            )
+        dates = sorted(dates.values(), key=lambda d: d.date, reverse=True)
+        for employee in employees.values():
+            exams = employee.pop("exams")
+            employee["cells"] = [
+                {"date": date, "exams": exams.get(date.id, [])} for date in dates
+            ]
+        return list(employees.values()), dates
+
 
 class EmployeeDetailView(DetailViewWithContext):
     """Detail view for employee."""
@@ -187,24 +242,47 @@ class EmployeeDetailView(DetailViewWithContext):
     model = Employee
 
     def get_queryset(self):
-        return super().get_queryset().select_related()
+        return (
+            super()
+            .get_queryset()
+            .select_related("org")
+            .only("id", "name", "org__id", "org__name")
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["exams"] = self.object.exams.select_related()
+        context["exams"] = self.object.exams.select_related(
+            "date",
+            "place",
+            "position",
+            "datafile",
+        ).only(
+            "id",
+            "employee",
+            "date__id",
+            "date__date",
+            "place__id",
+            "place__code",
+            "place__name",
+            "place__addr",
+            "position__id",
+            "position__name",
+            "datafile__id",
+            "datafile__url",
+        )
         return context
 
 
 class PlaceDetailView(FilteredSingleTableView):
     """Detail view for place."""
 
-    model = Exam
+    model = ExamView
     table_class = PlaceWithExamsTable
     filter_class = PlaceWithExamsFilter
     template_name = "rcoi/place_detail.html"
 
     def get_queryset(self, **kwargs):
-        return self.model.objects.filter(place=self.kwargs.get("pk")).select_related()
+        return self.model.objects.filter(place_id=self.kwargs.get("pk"))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -224,11 +302,14 @@ class DateListView(ListView):
     model = Date
 
 
-class DateDetailView(DetailView):
+class DateDetailView(DetailViewWithContext):
     """Detail view for a date."""
 
     model = Date
 
+    def get_queryset(self):
+        return super().get_queryset().only("id", "date")
+
 
 class LevelListView(ListView):
     """List view for levels."""
@@ -236,11 +317,14 @@ class LevelListView(ListView):
     model = Level
 
 
-class LevelDetailView(DetailView):
+class LevelDetailView(DetailViewWithContext):
     """Detail view for a level."""
 
     model = Level
 
+    def get_queryset(self):
+        return super().get_queryset().only("id", "level")
+
 
 class PositionListView(ListView):
     """List view for positions."""
@@ -248,17 +332,40 @@ class PositionListView(ListView):
     model = Position
 
 
-class PositionDetailView(DetailView):
+class PositionDetailView(DetailViewWithContext):
     """Detail view for a position."""
 
     model = Position
 
+    def get_queryset(self):
+        return super().get_queryset().only("id", "name")
+
 
-class ExamDetailView(DetailView):
+class ExamDetailView(DetailViewWithContext):
     """Detail view for an exam."""
 
     model = Exam
 
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .select_related("date", "level", "place", "employee")
+            .only(
+                "id",
+                "created",
+                "modified",
+                "date__id",
+                "date__date",
+                "level__id",
+                "level__level",
+                "place__id",
+                "place__name",
+                "employee__id",
+                "employee__name",
+            )
+        )
+
 
 @staff_member_required
 def update_db_view(request):
@@ -1,16 +1,33 @@
+from __future__ import annotations
+
 import csv
 import logging
 import re
-from datetime import datetime
-from io import StringIO
-from multiprocessing.pool import ThreadPool
+import sys
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from email.utils import format_datetime
+from functools import lru_cache, partial
+from http import HTTPStatus
 from pathlib import Path
-from urllib.parse import urljoin
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin, urlsplit
 
 import requests
 import stamina
 from bs4 import BeautifulSoup, Comment
 from openpyxl import load_workbook
+from prometheus_client import Counter
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from openpyxl.workbook.workbook import Workbook
+    from openpyxl.worksheet.worksheet import Worksheet
 
 logger = logging.getLogger(__name__)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -43,57 +60,306 @@ COLUMN_HEADERS_CSV = [
     "organisation",
 ]
 
+ORG_NAME_FIXES = {
+    "Государствнное": "Государственное",
+    "уччреждение": "учреждение",
+    "бюджетного": "бюджетное",
+    " образовательное": " общеобразовательное",
+    "им.": "имени",
+}
+ORG_NAME_ABBREVIATIONS_MAP = {
+    "Государственное бюджетное общеобразовательное учреждение города Москвы": "ГБОУ",
+    "Государственное бюджетное общеобразовательное учреждение": "ГБОУ",
+    "Государственное казенное общеобразовательное учреждение города Москвы": "ГКОУ",
+    "Государственное автономное общеобразовательное учреждение города Москвы": "ГАОУ",
+    "Государственное автономное общеобразовательное учреждение дополнительного профессионального образования города Москвы": "ГАОУ ДПО",
+    "Государственное автономное профессиональное общеобразовательное учреждение города Москвы": "ГАПОУ",
+    "Государственное бюджетное профессиональное общеобразовательное учреждение города Москвы": "ГБПОУ",
+    "Государственное общеобразовательное учреждение города Москвы": "ГОУ",
+    "Муниципальное автономное общеобразовательное учреждение": "МАОУ",
+    "Федеральное казенное учреждение": "ФКУ",
+}
+ORG_NAME_REPLACEMENTS = ORG_NAME_FIXES | ORG_NAME_ABBREVIATIONS_MAP
+
+
+def _alternation(words: Iterable[str]) -> re.Pattern:
+    """Compile regexp matching any of words, longest first."""
+    return re.compile("|".join(map(re.escape, sorted(words, key=len, reverse=True))))
+
+
+ORG_NAME_TYPOS = _alternation(ORG_NAME_FIXES)
+"""regexp for typos in organization names (applied first)"""
+ORG_NAME_ABBREVIATIONS = _alternation(ORG_NAME_ABBREVIATIONS_MAP)
+"""regexp for full organization names to be abbreviated"""
+
+FORMAT_CELL_CACHE_SIZE = 65536
+"""max number of memoized formatted cell values"""
+FORMAT_CELL_CACHE = Counter(
+    "rcoi_import_format_cell_cache",
+    "Lookups of memoized formatted cell values by result",
+    ["result"],
+)
+"""hits and misses of format_cell memo, summed over processes in multiprocess mode"""
+
+MAX_CONNECTIONS_PER_HOST = 4
+"""limit of simultaneous requests to a single host"""
+
 client = requests.Session()
+client.mount(
+    "https://",
+    HTTPAdapter(pool_connections=8, pool_maxsize=MAX_CONNECTIONS_PER_HOST),
+)
+client.mount(
+    "http://",
+    HTTPAdapter(pool_connections=8, pool_maxsize=MAX_CONNECTIONS_PER_HOST),
+)
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+class ExamBatch:
+    """Parsed exam rows stored by columns (see COLUMN_HEADERS_CSV).
+
+    String columns are lists of interned strings (empty cell is ""),
+    "ppe_code" column is an array of ints. Names of the parsed files
+    are kept in `files`.
+    """
+
+    INT_COLUMNS = frozenset({"ppe_code"})
+
+    def __init__(self, rows: Iterable[Iterable] = (), files: Iterable[str] = ()):
+        self.columns = {
+            name: array("q") if name in self.INT_COLUMNS else []
+            for name in COLUMN_HEADERS_CSV
+        }
+        self.files = list(files)
+        for row in rows:
+            self.append(row)
+
+    def __len__(self) -> int:
+        return len(self.columns["datafile"])
+
+    def __getitem__(self, name: str) -> list | array:
+        return self.columns[name]
+
+    def append(self, row: Iterable) -> None:
+        """Append row of values in order of COLUMN_HEADERS_CSV."""
+        for (name, column), value in zip(self.columns.items(), row, strict=True):
+            if name in self.INT_COLUMNS:
+                column.append(int(value))
+            else:
+                column.append(sys.intern(value or ""))
+
+    def extend(self, other: ExamBatch) -> None:
+        """Append all rows and files of other batch."""
+        for name, column in self.columns.items():
+            if name in self.INT_COLUMNS:
+                column.extend(other[name])
+            else:
+                # strings are not interned after unpickling in parent process
+                column.extend(map(sys.intern, other[name]))
+        self.files.extend(other.files)
+
+    def rows(self) -> Iterator[tuple]:
+        """Iterate over rows as tuples in order of COLUMN_HEADERS_CSV."""
+        return zip(*self.columns.values(), strict=True)
 
 
 class InvalidFileError(Exception):
     """Invalid file error."""
 
 
-@stamina.retry(on=requests.HTTPError, attempts=5)
-def download_file(url: str, file_name: str, file_path: Path) -> None:
-    """Download file from URL."""
-    logger.debug("download file %s as %s", url, file_name)
-    f = file_path.joinpath(file_name)
-    if f.exists():
-        logger.error(
-            "There are more than 1 file for exam date: %s. SKIP download %s",
-            file_name,
-            url,
+@contextmanager
+def host_slot(url: str) -> Iterator[None]:
+    """Limit number of simultaneous requests to the host of URL."""
+    host = urlsplit(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.setdefault(
+            host,
+            threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST),
         )
-        return
-    with client.get(url, stream=True, timeout=5) as res:
-        res.raise_for_status()
-        with f.open("wb") as fp:
-            for chunk in res.iter_content(chunk_size=8192):
-                fp.write(chunk)
+    with slot:
+        yield
+
+
+def http_date(value: datetime) -> str:
+    """Format naive UTC datetime as HTTP date."""
+    return format_datetime(value.replace(tzinfo=UTC), usegmt=True)
+
+
+def parse_http_date(value: str) -> datetime:
+    """Parse HTTP date as naive UTC datetime."""
+    return datetime.strptime(value, "%a, %d %b %Y %H:%M:%S %Z")  # noqa: DTZ007
+
+
+class RequestsTransport:
+    """HTTP transport for DownloadManager based on requests session.
+
+    Transport is any object with `get(url, headers)` method returning context manager
+    with response that has `status_code`, `headers`, `raise_for_status()`
+    and `iter_content(chunk_size)`.
+    """
+
+    def __init__(self, session: requests.Session | None = None, timeout: float = 5):
+        self.session = session or client
+        self.timeout = timeout
+
+    @contextmanager
+    def get(self, url: str, headers: dict) -> Iterator[requests.Response]:
+        """Send GET request and stream the response."""
+        with (
+            host_slot(url),
+            self.session.get(
+                url,
+                headers=headers,
+                stream=True,
+                timeout=self.timeout,
+            ) as res,
+        ):
+            yield res
+
+
+class DownloadManager:
+    """Download exam files concurrently.
+
+    Requests are conditional (If-None-Match, If-Modified-Since), so an unchanged file
+    costs a single 304 response. Interrupted transfer is retried and resumed
+    from the received part with Range request.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        transport: RequestsTransport | None = None,
+        workers: int | None = None,
+        attempts: int = 5,
+    ):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self.workers = workers or MAX_CONNECTIONS_PER_HOST
+        self.attempts = attempts
+
+    def fetch_all(self, files: Iterable[dict]) -> list:
+        """Download files concurrently and return info about modified files.
+
+        Result keeps the order of files. Unchanged files and files
+        that failed to download are skipped.
+        """
+        files = list(files)
+        if not files:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.fetch, file) for file in files]
+        result = []
+        for file, future in zip(files, futures, strict=True):
+            try:
+                file_info = future.result()
+            except Exception:
+                logger.exception("%s: download failed, SKIP", file["name"])
+                continue
+            if file_info:
+                result.append(file_info)
+        return result
+
+    def fetch(self, file: dict) -> dict | None:
+        """Download single file if it is modified.
+
+        :param file: file info with "name" and "url", and optionally
+            "last_modified" and "etag" of the known version of file
+        :return: info about downloaded file or None if file is not modified
+        """
+        logger.debug("download file %s as %s", file["url"], file["name"])
+        part = self.path.joinpath(f"{file['name']}.part")
+        state = {}
+        for attempt in stamina.retry_context(on=OSError, attempts=self.attempts):
+            with attempt:
+                modified = self._transfer(file, part, state)
+        if not modified:
+            logger.debug("%s: not modified, SKIP", file["name"])
+            part.unlink(missing_ok=True)
+            return None
+        target = part.replace(self.path.joinpath(file["name"]))
+        return {
+            "name": file["name"],
+            "url": file["url"],
+            "size": target.stat().st_size,
+            "last_modified": state["last_modified"],
+            "etag": state["etag"],
+        }
+
+    def _transfer(self, file: dict, part: Path, state: dict) -> bool:
+        """Send conditional or range request and write response body to partial file.
+
+        :return: False if file is not modified
+        """
+        offset = part.stat().st_size if state.get("validator") and part.exists() else 0
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = state["validator"]
+        else:
+            if file.get("etag"):
+                headers["If-None-Match"] = file["etag"]
+            if file.get("last_modified"):
+                headers["If-Modified-Since"] = http_date(file["last_modified"])
+
+        with self.transport.get(file["url"], headers) as res:
+            if res.status_code == HTTPStatus.NOT_MODIFIED:
+                return False
+            res.raise_for_status()
+            if offset and res.status_code == HTTPStatus.PARTIAL_CONTENT:
+                mode = "ab"
+            else:
+                etag = res.headers.get("ETag", "")
+                last_modified = res.headers.get("Last-Modified")
+                if last_modified:
+                    last_modified = parse_http_date(last_modified)
+                # server may ignore conditional headers
+                if (etag and etag == file.get("etag")) or (
+                    last_modified and last_modified == file.get("last_modified")
+                ):
+                    return False
+                state["etag"] = etag
+                state["last_modified"] = last_modified
+                # only strong validator can be used for If-Range
+                state["validator"] = (
+                    etag
+                    if etag and not etag.startswith("W/")
+                    else res.headers.get("Last-Modified")
+                )
+                mode = "wb"
+            with part.open(mode) as fp:
+                for chunk in res.iter_content(chunk_size=8192):
+                    fp.write(chunk)
+        return True
+
+
+def file_link_info(url: str, date: str, level: str) -> dict:
+    """Prepare name and url of single exam file."""
+    ext = Path(url).suffix
+    return {"name": f"{date}__{level}__{ext}", "url": url}
 
 
 @stamina.retry(on=requests.HTTPError, attempts=5)
 def prepare_file_info(url: str, date: str, level: str) -> dict:
     """Prepare info about single exam file from direct url."""
     logger.debug("get file info: %s", url)
-    ext = Path(url).suffix
-    local_filename = f"{date}__{level}__{ext}"
+    file_info = file_link_info(url, date, level)
 
-    res = client.head(url, stream=True, timeout=5)
+    with host_slot(url):
+        res = client.head(url, stream=True, timeout=5)
     res.raise_for_status()
-    last_modified = datetime.strptime(  # noqa: DTZ007
-        res.headers["Last-Modified"],
-        "%a, %d %b %Y %H:%M:%S %Z",
-    )
-    return {
-        "name": local_filename,
-        "url": url,
-        "size": res.headers["Content-Length"],
-        "last_modified": last_modified,
-    }
+    file_info["size"] = res.headers["Content-Length"]
+    file_info["last_modified"] = parse_http_date(res.headers["Last-Modified"])
+    return file_info
 
 
 @stamina.retry(on=requests.HTTPError, attempts=5)
 def get_content_blocks_ids(url: str) -> list:
     """Get content blocks ids from exams page."""
-    res = client.get(url, timeout=5)
+    with host_slot(url):
+        res = client.get(url, timeout=5)
     res.raise_for_status()
     soup = BeautifulSoup(res.text, "lxml").select('span[data-class="info"]')
     return [
@@ -104,15 +370,16 @@ def get_content_blocks_ids(url: str) -> list:
 @stamina.retry(on=requests.HTTPError, attempts=5)
 def get_content_block_soup(url: str, data_id: str, data_ident: str) -> BeautifulSoup:
     """Get soup from specific exam content block."""
-    res = client.post(
-        url,
-        data=f"id={data_id}&data={data_ident}&val=1",
-        headers={
-            "content-type": "application/x-www-form-urlencoded",
-            "cache-control": "no-cache",
-        },
-        timeout=5,
-    )
+    with host_slot(url):
+        res = client.post(
+            url,
+            data=f"id={data_id}&data={data_ident}&val=1",
+            headers={
+                "content-type": "application/x-www-form-urlencoded",
+                "cache-control": "no-cache",
+            },
+            timeout=5,
+        )
     res.raise_for_status()
     return BeautifulSoup(res.text, "lxml")
 
@@ -132,8 +399,36 @@ def extract_href(soup: BeautifulSoup) -> str | None:
     return None
 
 
-def get_files_info(url: str) -> list:
-    """Compose custom info about remote files."""
+def get_block_file_info(
+    url: str,
+    level: str,
+    data_id: str,
+    data_ident: str,
+    *,
+    head: bool = True,
+) -> dict | None:
+    """Compose custom info about remote file from specific exam content block."""
+    block_soup = get_content_block_soup(url, data_id, data_ident)
+    if not (file_link := extract_href(block_soup)):
+        return None
+    date = f"{data_ident[0:4]}-{data_ident[4:6]}-{data_ident[6:8]}"
+    if not head:
+        return file_link_info(urljoin(url, file_link), date, level)
+    return prepare_file_info(urljoin(url, file_link), date, level)
+
+
+def get_files_info(
+    url: str,
+    workers: int = MAX_CONNECTIONS_PER_HOST,
+    *,
+    head: bool = True,
+) -> list:
+    """Compose custom info about remote files.
+
+    Content blocks are requested concurrently in a pool of `workers` threads,
+    the result keeps the order of blocks on the page. Without `head`
+    only names and urls of files are returned, no HEAD requests are sent.
+    """
     logger.debug("get file links: %s", url)
     level = "0"
     if "/ege/" in url:
@@ -141,17 +436,53 @@ def get_files_info(url: str) -> list:
     elif "/oge/" in url:
         level = "9"
 
-    result = []
-    for data_id, data_ident in get_content_blocks_ids(url):
-        if not data_id or not data_ident:
-            continue
-        block_soup = get_content_block_soup(url, data_id, data_ident)
-        if not (file_link := extract_href(block_soup)):
+    blocks = [
+        (data_id, data_ident)
+        for data_id, data_ident in get_content_blocks_ids(url)
+        if data_id and data_ident
+    ]
+    if not blocks:
+        return []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        files_info = pool.map(
+            lambda block: get_block_file_info(url, level, *block, head=head),
+            blocks,
+        )
+        return [file_info for file_info in files_info if file_info]
+
+
+def get_all_files_info(
+    urls: Iterable[str],
+    workers: int | None = None,
+    *,
+    head: bool = True,
+) -> list:
+    """Compose custom info about remote files from all pages concurrently.
+
+    Pages are processed in a pool of `workers` threads (one per page if None),
+    the number of simultaneous requests to a single host is limited
+    by MAX_CONNECTIONS_PER_HOST. Result is a list of lists in the order of urls.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=workers or len(urls)) as pool:
+        return list(pool.map(partial(get_files_info, head=head), urls))
+
+
+def unique_files(files: Iterable[dict]) -> list:
+    """Drop files with the same local name (only first file for exam date is kept)."""
+    result = {}
+    for file in files:
+        if file["name"] in result:
+            logger.error(
+                "There are more than 1 file for exam date: %s. SKIP download %s",
+                file["name"],
+                file["url"],
+            )
             continue
-        date = f"{data_ident[0:4]}-{data_ident[4:6]}-{data_ident[6:8]}"
-        file_info = prepare_file_info(urljoin(url, file_link), date, level)
-        result.append(file_info)
-    return result
+        result[file["name"]] = file
+    return list(result.values())
 
 
 def cleanup_value(value: str) -> str:
@@ -166,30 +497,16 @@ def format_employee_name(value: str) -> str:
 
 def format_org_name(value: str) -> str:
     """Replace full organization name with abbreviation."""
-    org_names = {
-        "Государствнное": "Государственное",
-        "уччреждение": "учреждение",
-        "бюджетного": "бюджетное",
-        " образовательное": " общеобразовательное",
-        "им.": "имени",
-        "Государственное бюджетное общеобразовательное учреждение города Москвы": "ГБОУ",
-        "Государственное бюджетное общеобразовательное учреждение": "ГБОУ",
-        "Государственное казенное общеобразовательное учреждение города Москвы": "ГКОУ",
-        "Государственное автономное общеобразовательное учреждение города Москвы": "ГАОУ",
-        "Государственное автономное общеобразовательное учреждение дополнительного профессионального образования города Москвы": "ГАОУ ДПО",
-        "Государственное автономное профессиональное общеобразовательное учреждение города Москвы": "ГАПОУ",
-        "Государственное бюджетное профессиональное общеобразовательное учреждение города Москвы": "ГБПОУ",
-        "Государственное общеобразовательное учреждение города Москвы": "ГОУ",
-        "Муниципальное автономное общеобразовательное учреждение": "МАОУ",
-        "Федеральное казенное учреждение": "ФКУ",
-    }
-    for name, abbreviation in org_names.items():
-        value = value.replace(name, abbreviation)
-    return value
+    value = ORG_NAME_TYPOS.sub(lambda m: ORG_NAME_REPLACEMENTS[m[0]], value)
+    return ORG_NAME_ABBREVIATIONS.sub(lambda m: ORG_NAME_REPLACEMENTS[m[0]], value)
 
 
+@lru_cache(maxsize=FORMAT_CELL_CACHE_SIZE, typed=True)
 def format_cell(col_name: str, cell_value: str) -> str:
-    """Format cell value based on logical column name."""
+    """Format cell value based on logical column name.
+
+    Results are memoized: the same organisation and PPE names repeat in many rows.
+    """
     org_columns = {"наименование ппэ", "место работы"}
     employee_columns = {"ф. и. о."}
     result = cleanup_value(cell_value)
@@ -200,10 +517,33 @@ def format_cell(col_name: str, cell_value: str) -> str:
     return result
 
 
+def format_cell_stats() -> dict:
+    """Get hit/miss counters of format_cell memo in current process."""
+    info = format_cell.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "hit_rate": round(info.hits / total, 3) if total else 0.0,
+    }
+
+
+def count_format_cell_cache(since: tuple) -> None:
+    """Count hits and misses of format_cell memo since `since` cache info.
+
+    Parser processes count into their own metric files in prometheus_client
+    multiprocess mode (PROMETHEUS_MULTIPROC_DIR), the files are summed on export.
+    """
+    info = format_cell.cache_info()
+    FORMAT_CELL_CACHE.labels("hit").inc(info.hits - since.hits)
+    FORMAT_CELL_CACHE.labels("miss").inc(info.misses - since.misses)
+
+
 def get_cell_indexes(header_row: tuple) -> dict:
     """Map COLUMN_HEADERS to actual column indexes in the sheet."""
     header_map = {
-        cleanup_value(cell.value).lower(): idx for idx, cell in enumerate(header_row)
+        cleanup_value(value).lower(): idx for idx, value in enumerate(header_row)
     }
     result = {}
     for col in COLUMN_HEADERS:
@@ -214,54 +554,67 @@ def get_cell_indexes(header_row: tuple) -> dict:
     return result
 
 
-def parse_sheet_data(data: tuple, filename: str) -> list:
-    """Parse data and output result as list of lists (rows)."""
+def parse_sheet_data(data: Iterable[tuple], filename: str) -> ExamBatch:
+    """Parse rows of cell values and output result as columnar batch."""
     exam_date, exam_level, *_ = filename.split("__")
     logger.debug(
-        "parse file: %s (date %s, level %s, rows %s)",
+        "parse file: %s (date %s, level %s)",
         filename,
         exam_date,
         exam_level,
-        len(data),
     )
 
-    header_row = data[0]
+    rows = iter(data)
+    header_row = next(rows, ())
     cell_indexes = get_cell_indexes(header_row)
 
-    result = []
-    for row in data[1:]:
+    cache_info = format_cell.cache_info()
+    result = ExamBatch(files=[filename])
+    for row in rows:
         # process only rows where first cell (row counter) is int (1, 2, 3...) or float (5.333, 8.833...)
-        if not isinstance(row[0].value, int | float):
+        if not row or not isinstance(row[0], int | float):
             continue
         parsed_row = [filename, exam_date, exam_level]
         # skip first cell (row counter)
         for col in COLUMN_HEADERS[1:]:
             idx = cell_indexes.get(col)
-            cell = row[idx].value if idx is not None else None
+            # read-only rows may be shorter than the header if trailing cells are empty
+            cell = row[idx] if idx is not None and idx < len(row) else None
             if cell:
                 cell = format_cell(col, cell)
             # append any cell values, including None
             parsed_row.append(cell)
         result.append(parsed_row)
+    count_format_cell_cache(cache_info)
+    if not result:
+        # reconciliation would delete all exams of the file
+        msg = f"{filename}: there are no data rows"
+        raise InvalidFileError(msg)
+    logger.debug(
+        "parsed file: %s (rows %s, format cache %s)",
+        filename,
+        len(result),
+        format_cell_stats(),
+    )
     return result
 
 
-def load_sheet_data(file_path: Path) -> tuple:
-    """Detect target sheet in Excel file and load its data."""
-    wb = load_workbook(file_path)
+def find_target_sheet(wb: Workbook, file_path: Path) -> Worksheet:
+    """Detect target sheet by the mark in its first row.
+
+    Only the first row of every sheet is read, the rest of the sheet is not parsed.
+    """
     sheet_mark = "список"
     sheet_count = 0
     sheet_name = ""
-    for name in wb.sheetnames:
-        ws = wb[name]
-        try:
-            first_row = next(ws.rows)
-        except StopIteration:
+    for ws in wb.worksheets:
+        first_row = next(ws.iter_rows(max_row=1, values_only=True), None)
+        if not first_row:
             # empty sheet
             continue
-        if (first_cell := first_row[0].value) and sheet_mark in str(first_cell).lower():
+        if (first_cell := first_row[0]) and sheet_mark in str(first_cell).lower():
             sheet_count += 1
-            sheet_name = name
+            sheet_name = ws.title
 
     if sheet_count > 1:
         msg = f"{file_path.name}: there are more than 1 sheet with '{sheet_mark}' in first row"
@@ -273,46 +626,93 @@ def load_sheet_data(file_path: Path) -> tuple:
 
     ws = wb[sheet_name]
 
-    first_row = next(ws.rows)
-    if len(first_row) < 7:  # noqa: PLR2004
+    # title in the first row is merged across columns, count cells of header
+    header_row = next(ws.iter_rows(min_row=2, max_row=2, values_only=True), ())
+    if sum(value is not None for value in header_row) < len(COLUMN_HEADERS):
         msg = f"{file_path.name}: wrong number of columns"
         raise InvalidFileError(msg)
+    return ws
+
+
+def iter_sheet_rows(wb: Workbook, ws: Worksheet) -> Iterator[tuple]:
+    """Yield cell values of the sheet row by row, then close the workbook."""
+    try:
+        yield from ws.iter_rows(min_row=2, values_only=True)
+    finally:
+        wb.close()
+
+
+def load_sheet_data(file_path: Path) -> Iterator[tuple]:
+    """Detect target sheet in Excel file and stream its data.
+
+    Workbook is opened in read-only mode and the rows of the target sheet
+    are read lazily as the returned iterator is consumed. Dimensions stored
+    in sheets are not trusted, rows are read as far as their cells go.
+    """
+    wb = load_workbook(file_path, read_only=True)
+    for ws in wb.worksheets:
+        ws.reset_dimensions()
+    try:
+        ws = find_target_sheet(wb, file_path)
+    except Exception:
+        wb.close()
+        raise
+    return iter_sheet_rows(wb, ws)
+
+
+def parse_file(file_path: Path) -> ExamBatch:
+    """Load and parse single Excel file."""
+    return parse_sheet_data(load_sheet_data(file_path), file_path.name)
+
+
+def parse_files(
+    paths: Iterable[Path],
+    workers: int | None = None,
+) -> Iterator[tuple[Path, ExamBatch]]:
+    """Parse Excel files in parallel and yield (file, batch) in order of file names.
+
+    Files are parsed in a process pool of `workers` processes
+    (number of CPUs if None). A file that fails to parse is logged
+    and skipped without aborting the rest of the batch.
+    """
+    files = sorted(paths, key=lambda path: path.name)
+    if workers == 1 or len(files) < 2:  # noqa: PLR2004
+        for file_path in files:
+            try:
+                rows = parse_file(file_path)
+            except Exception:
+                logger.exception("%s: parsing failed, SKIP", file_path.name)
+                continue
+            yield file_path, rows
+        return
 
-    sheet_data_without_title = tuple(ws.iter_rows(min_row=2))
-    return sheet_data_without_title  # noqa: RET504
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(parse_file, file_path) for file_path in files]
+        for file_path, future in zip(files, futures, strict=True):
+            try:
+                rows = future.result()
+            except Exception:
+                logger.exception("%s: parsing failed, SKIP", file_path.name)
+                continue
+            yield file_path, rows
 
 
-def save_to_csv(csv_file: Path) -> None:
+def save_to_csv(csv_file: Path, workers: int | None = None) -> None:
     """Save list of rows to CSV in local file."""
+    parent_dir = Path(csv_file).parent
     with csv_file.open("w+", newline="", encoding="utf-8") as fp:
         a = csv.writer(fp, delimiter=";")
         a.writerow(COLUMN_HEADERS_CSV)
-
-    parent_dir = Path(csv_file).parent
-    for exam_file in parent_dir.glob("*.xlsx"):
-        if not (sheet_data := load_sheet_data(exam_file)):
-            continue
-        result = parse_sheet_data(sheet_data, exam_file.name)
-        with Path(csv_file).open("a+", newline="", encoding="utf-8") as fp:
-            a = csv.writer(fp, delimiter=";")
-            for line in result:
-                a.writerow(line)
+        for _, result in parse_files(parent_dir.glob("*.xlsx"), workers):
+            a.writerows(result.rows())
 
 
-def save_to_stream(path: Path) -> StringIO:
-    """Save list of rows to CSV in string buffer (memory file)."""
-    stream = StringIO()
-    writer = csv.writer(stream, delimiter="\t", quotechar="'")
-    writer.writerow(COLUMN_HEADERS_CSV)
-
-    for exam_file in path.glob("*.xlsx"):
-        if not (sheet_data := load_sheet_data(exam_file)):
-            continue
-        result = parse_sheet_data(sheet_data, exam_file.name)
-        for line in result:
-            writer.writerow(line)
-    stream.seek(0)
-    return stream
+def load_batch(path: Path, workers: int | None = None) -> ExamBatch:
+    """Parse Excel files in directory and merge results into single batch."""
+    batch = ExamBatch()
+    for _, result in parse_files(path.glob("*.xlsx"), workers):
+        batch.extend(result)
+    return batch
 
 
 def main():
@@ -328,12 +728,9 @@ def main():
         "https://rcoi.mcko.ru/organizers/schedule/oge/?period=3",
         "https://rcoi.mcko.ru/organizers/schedule/ege/?period=3",
     ]
-    with ThreadPool(4) as pool:
-        files_info = pool.map(get_files_info, urls)
-        files_info_flat = [
-            (file["url"], file["name"], path) for files in files_info for file in files
-        ]
-        pool.starmap(download_file, files_info_flat)
+    files_info = get_all_files_info(urls, head=False)
+    files_info_flat = [file for files in files_info for file in files]
+    DownloadManager(path).fetch_all(unique_files(files_info_flat))
     save_to_csv(csv_file)
 
 
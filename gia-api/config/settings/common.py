@@ -164,6 +164,7 @@ TEMPLATES = [
                 "django.template.context_processors.static",
                 "django.template.context_processors.tz",
                 "django.contrib.messages.context_processors.messages",
+                "apps.rcoi.context_processors.site_metadata",
             ],
         },
     },
@@ -346,6 +347,13 @@ FILTERS_HELP_TEXT_FILTER = False
 
 DEBUG_TOOLBAR = env.bool("DJANGO_DEBUG_TOOLBAR", default=False)
 
+# rcoi import
+# ------------------------------------------------------------------------------
+# Number of processes used to parse Excel files (number of CPUs if not set)
+RCOI_PARSE_WORKERS = env.int("RCOI_PARSE_WORKERS", default=None)
+# Number of threads used to download Excel files
+RCOI_DOWNLOAD_WORKERS = env.int("RCOI_DOWNLOAD_WORKERS", default=4)
+
 # opentelemetry
 # ------------------------------------------------------------------------------
 OTEL_TRACING_ENABLED = env.bool("OTEL_TRACING_ENABLED", default=False)
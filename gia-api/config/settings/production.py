@@ -52,7 +52,7 @@ SERVER_EMAIL = env.str("DJANGO_SERVER_EMAIL", default=EMAIL_HOST_USER)
 CACHE_MIDDLEWARE = [
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "apps.rcoi.middleware.SetBrowserCacheTimeoutMiddleware",
-    "django.middleware.cache.UpdateCacheMiddleware",
+    "apps.rcoi.caching.VersionedUpdateCacheMiddleware",
     "django.middleware.gzip.GZipMiddleware",
     "django_brotli.middleware.BrotliMiddleware",
     "django.middleware.http.ConditionalGetMiddleware",
@@ -60,7 +60,7 @@ CACHE_MIDDLEWARE = [
 MIDDLEWARE = [*MIDDLEWARE[:2], *CACHE_MIDDLEWARE, *MIDDLEWARE[2:]]
 MIDDLEWARE = [
     *MIDDLEWARE[:-1],
-    "django.middleware.cache.FetchFromCacheMiddleware",
+    "apps.rcoi.caching.VersionedFetchFromCacheMiddleware",
     *MIDDLEWARE[-1:],
 ]
 
@@ -26,7 +26,7 @@ SERVER_EMAIL = env.str("DJANGO_SERVER_EMAIL", default=EMAIL_HOST_USER)
 CACHE_MIDDLEWARE = [
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "apps.rcoi.middleware.SetBrowserCacheTimeoutMiddleware",
-    "django.middleware.cache.UpdateCacheMiddleware",
+    "apps.rcoi.caching.VersionedUpdateCacheMiddleware",
     "django.middleware.gzip.GZipMiddleware",
     "django_brotli.middleware.BrotliMiddleware",
     "django.middleware.http.ConditionalGetMiddleware",
@@ -37,13 +37,13 @@ if DEBUG and DEBUG_TOOLBAR:
     # django-debug-toolbar must be after all cache
     MIDDLEWARE = [
         *MIDDLEWARE[:-2],
-        "django.middleware.cache.FetchFromCacheMiddleware",
+        "apps.rcoi.caching.VersionedFetchFromCacheMiddleware",
         *MIDDLEWARE[-2:],
     ]
 else:
     MIDDLEWARE = [
         *MIDDLEWARE[:-1],
-        "django.middleware.cache.FetchFromCacheMiddleware",
+        "apps.rcoi.caching.VersionedFetchFromCacheMiddleware",
         *MIDDLEWARE[-1:],
     ]
 